@@ -0,0 +1,36 @@
+"""classification cache
+
+Revision ID: 0002_classification_cache
+Revises: 0001_initial_schema
+Create Date: 2026-10-16
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0002_classification_cache"
+down_revision: Union[str, None] = "0001_initial_schema"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "classification_cache",
+        sa.Column("name_key", sa.String(length=255), nullable=False),
+        sa.Column("biomarker_id", sa.Integer(), nullable=True),
+        sa.Column("score", sa.Float(), nullable=False),
+        sa.Column("source", sa.String(length=10), nullable=False),
+        sa.Column("catalog_version", sa.String(length=40), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["biomarker_id"], ["biomarker_reference.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("name_key"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("classification_cache")
@@ -0,0 +1,42 @@
+"""ingest jobs
+
+Revision ID: 0003_ingest_jobs
+Revises: 0002_classification_cache
+Create Date: 2026-10-16
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0003_ingest_jobs"
+down_revision: Union[str, None] = "0002_classification_cache"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "ingest_jobs",
+        sa.Column("id", sa.String(length=36), nullable=False),
+        sa.Column("user_id", sa.String(length=36), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("stage", sa.String(length=30), nullable=False),
+        sa.Column("progress", sa.Integer(), nullable=False),
+        sa.Column("original_filename", sa.String(length=255), nullable=True),
+        sa.Column("doc_id", sa.String(length=36), nullable=True),
+        sa.Column("result", sa.Text(), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_ingest_jobs_user_id", "ingest_jobs", ["user_id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_ingest_jobs_user_id", table_name="ingest_jobs")
+    op.drop_table("ingest_jobs")
@@ -0,0 +1,38 @@
+"""parse artifacts and report file hashes
+
+Revision ID: 0004_parse_artifacts
+Revises: 0003_ingest_jobs
+Create Date: 2026-10-16
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0004_parse_artifacts"
+down_revision: Union[str, None] = "0003_ingest_jobs"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "parse_artifacts",
+        sa.Column("file_sha256", sa.String(length=64), nullable=False),
+        sa.Column("raw_parsed_text", sa.Text(), nullable=False),
+        sa.Column("report_json", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("file_sha256"),
+    )
+    with op.batch_alter_table("lab_reports") as batch_op:
+        batch_op.add_column(sa.Column("file_sha256", sa.String(length=64), nullable=True))
+    op.create_index("ix_lab_reports_file_sha256", "lab_reports", ["file_sha256"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_lab_reports_file_sha256", table_name="lab_reports")
+    with op.batch_alter_table("lab_reports") as batch_op:
+        batch_op.drop_column("file_sha256")
+    op.drop_table("parse_artifacts")
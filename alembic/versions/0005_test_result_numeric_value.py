@@ -0,0 +1,66 @@
+"""typed numeric test result values
+
+Revision ID: 0005_test_result_numeric_value
+Revises: 0004_parse_artifacts
+Create Date: 2026-10-16
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from backend.services.trend_analyzer import parse_value
+
+
+revision: str = "0005_test_result_numeric_value"
+down_revision: Union[str, None] = "0004_parse_artifacts"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 5000
+
+test_results = sa.table(
+    "test_results",
+    sa.column("id", sa.BigInteger()),
+    sa.column("value", sa.String(length=50)),
+    sa.column("value_numeric", sa.Float()),
+    sa.column("value_qualifier", sa.String(length=8)),
+)
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("test_results") as batch_op:
+        batch_op.add_column(sa.Column("value_numeric", sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column("value_qualifier", sa.String(length=8), nullable=True))
+
+    connection = op.get_bind()
+    update = (
+        sa.update(test_results)
+        .where(test_results.c.id == sa.bindparam("row_id"))
+        .values(value_numeric=sa.bindparam("numeric"), value_qualifier=sa.bindparam("qualifier"))
+    )
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select(test_results.c.id, test_results.c.value)
+            .where(test_results.c.id > last_id, test_results.c.value.is_not(None))
+            .order_by(test_results.c.id)
+            .limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        params = []
+        for row in rows:
+            numeric, qualifier = parse_value(row.value)
+            if numeric is not None or qualifier is not None:
+                params.append({"row_id": row.id, "numeric": numeric, "qualifier": qualifier})
+        if params:
+            connection.execute(update, params)
+        last_id = rows[-1].id
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("test_results") as batch_op:
+        batch_op.drop_column("value_qualifier")
+        batch_op.drop_column("value_numeric")
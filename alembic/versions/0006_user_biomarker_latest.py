@@ -0,0 +1,133 @@
+"""materialized latest result per user and biomarker
+
+Revision ID: 0006_user_biomarker_latest
+Revises: 0005_test_result_numeric_value
+Create Date: 2026-10-16
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0006_user_biomarker_latest"
+down_revision: Union[str, None] = "0005_test_result_numeric_value"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 5000
+
+lab_reports = sa.table(
+    "lab_reports",
+    sa.column("doc_id", sa.String(length=36)),
+    sa.column("user_id", sa.String(length=36)),
+    sa.column("report_date", sa.Date()),
+    sa.column("created_at", sa.DateTime()),
+)
+
+test_results = sa.table(
+    "test_results",
+    sa.column("id", sa.BigInteger()),
+    sa.column("doc_id", sa.String(length=36)),
+    sa.column("biomarker_id", sa.Integer()),
+    sa.column("test_name", sa.String(length=255)),
+    sa.column("value", sa.String(length=50)),
+    sa.column("value_numeric", sa.Float()),
+    sa.column("value_qualifier", sa.String(length=8)),
+    sa.column("unit", sa.String(length=50)),
+    sa.column("reference_range", sa.String(length=100)),
+    sa.column("flag", sa.String(length=20)),
+)
+
+
+def upgrade() -> None:
+    latest_table = op.create_table(
+        "user_biomarker_latest",
+        sa.Column("user_id", sa.String(length=36), sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("biomarker_key", sa.String(length=300), primary_key=True),
+        sa.Column("biomarker_id", sa.Integer(), sa.ForeignKey("biomarker_reference.id"), nullable=True),
+        sa.Column("test_name", sa.String(length=255), nullable=False),
+        sa.Column("result_id", sa.BigInteger().with_variant(sa.Integer(), "sqlite"), nullable=False),
+        sa.Column("doc_id", sa.String(length=36), nullable=False),
+        sa.Column("value", sa.String(length=50), nullable=True),
+        sa.Column("value_numeric", sa.Float(), nullable=True),
+        sa.Column("value_qualifier", sa.String(length=8), nullable=True),
+        sa.Column("unit", sa.String(length=50), nullable=True),
+        sa.Column("reference_range", sa.String(length=100), nullable=True),
+        sa.Column("flag", sa.String(length=20), nullable=True),
+        sa.Column("report_date", sa.Date(), nullable=True),
+        sa.Column("report_created_at", sa.DateTime(), nullable=False),
+        sa.Column("previous_result_id", sa.BigInteger().with_variant(sa.Integer(), "sqlite"), nullable=True),
+        sa.Column("previous_doc_id", sa.String(length=36), nullable=True),
+        sa.Column("previous_value_numeric", sa.Float(), nullable=True),
+        sa.Column("previous_report_date", sa.Date(), nullable=True),
+        sa.Column("previous_report_created_at", sa.DateTime(), nullable=True),
+    )
+
+    # Backfill with the same ordering the app uses, keeping the two newest results per key.
+    key_name = sa.case((test_results.c.biomarker_id.is_(None), test_results.c.test_name))
+    rn = sa.func.row_number().over(
+        partition_by=(lab_reports.c.user_id, test_results.c.biomarker_id, key_name),
+        order_by=(
+            lab_reports.c.report_date.is_(None),
+            lab_reports.c.report_date.desc(),
+            lab_reports.c.created_at.desc(),
+            test_results.c.id.desc(),
+        ),
+    )
+    ranked = (
+        sa.select(
+            test_results,
+            lab_reports.c.user_id,
+            lab_reports.c.report_date,
+            lab_reports.c.created_at.label("report_created_at"),
+            rn.label("rn"),
+        )
+        .join(lab_reports, lab_reports.c.doc_id == test_results.c.doc_id)
+        .subquery()
+    )
+
+    connection = op.get_bind()
+    rows = connection.execute(sa.select(ranked).where(ranked.c.rn <= 2).order_by(ranked.c.rn))
+    latest: dict[tuple[str, str], dict] = {}
+    for row in rows:
+        key = f"id:{row.biomarker_id}" if row.biomarker_id is not None else f"name:{row.test_name}"
+        if row.rn == 1:
+            latest[(row.user_id, key)] = {
+                "user_id": row.user_id,
+                "biomarker_key": key,
+                "biomarker_id": row.biomarker_id,
+                "test_name": row.test_name,
+                "result_id": row.id,
+                "doc_id": row.doc_id,
+                "value": row.value,
+                "value_numeric": row.value_numeric,
+                "value_qualifier": row.value_qualifier,
+                "unit": row.unit,
+                "reference_range": row.reference_range,
+                "flag": row.flag,
+                "report_date": row.report_date,
+                "report_created_at": row.report_created_at,
+                "previous_result_id": None,
+                "previous_doc_id": None,
+                "previous_value_numeric": None,
+                "previous_report_date": None,
+                "previous_report_created_at": None,
+            }
+        else:
+            latest[(row.user_id, key)].update(
+                previous_result_id=row.id,
+                previous_doc_id=row.doc_id,
+                previous_value_numeric=row.value_numeric,
+                previous_report_date=row.report_date,
+                previous_report_created_at=row.report_created_at,
+            )
+
+    values = list(latest.values())
+    for start in range(0, len(values), BACKFILL_BATCH_SIZE):
+        op.bulk_insert(latest_table, values[start : start + BACKFILL_BATCH_SIZE])
+
+
+def downgrade() -> None:
+    op.drop_table("user_biomarker_latest")
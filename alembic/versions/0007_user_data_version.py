@@ -0,0 +1,29 @@
+"""per-user data version for conditional responses
+
+Revision ID: 0007_user_data_version
+Revises: 0006_user_biomarker_latest
+Create Date: 2026-10-16
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0007_user_data_version"
+down_revision: Union[str, None] = "0006_user_biomarker_latest"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("users") as batch_op:
+        batch_op.add_column(sa.Column("data_version", sa.Integer(), server_default="0", nullable=False))
+        batch_op.add_column(sa.Column("data_modified_at", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("users") as batch_op:
+        batch_op.drop_column("data_modified_at")
+        batch_op.drop_column("data_version")
@@ -0,0 +1,37 @@
+"""composite indexes for per-user report and result lookups
+
+Revision ID: 0009_composite_query_indexes
+Revises: 0008_user_session_generation
+Create Date: 2026-10-17
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "0009_composite_query_indexes"
+down_revision: Union[str, None] = "0008_user_session_generation"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_lab_reports_user_report_date", "lab_reports", ["user_id", "report_date", "created_at"], unique=False
+    )
+    op.create_index("ix_test_results_doc_biomarker", "test_results", ["doc_id", "biomarker_id"], unique=False)
+    op.create_index("ix_test_results_biomarker_doc", "test_results", ["biomarker_id", "doc_id"], unique=False)
+    # Each is a prefix of a composite above, which also backs its foreign key on MySQL.
+    op.drop_index("ix_lab_reports_user_id", table_name="lab_reports")
+    op.drop_index("ix_test_results_doc_id", table_name="test_results")
+    op.drop_index("ix_test_results_biomarker_id", table_name="test_results")
+
+
+def downgrade() -> None:
+    op.create_index("ix_test_results_biomarker_id", "test_results", ["biomarker_id"], unique=False)
+    op.create_index("ix_test_results_doc_id", "test_results", ["doc_id"], unique=False)
+    op.create_index("ix_lab_reports_user_id", "lab_reports", ["user_id"], unique=False)
+    op.drop_index("ix_test_results_biomarker_doc", table_name="test_results")
+    op.drop_index("ix_test_results_doc_biomarker", table_name="test_results")
+    op.drop_index("ix_lab_reports_user_report_date", table_name="lab_reports")
@@ -0,0 +1,77 @@
+"""copy user_id and report_date onto test_results
+
+Revision ID: 0010_test_result_user_columns
+Revises: 0009_composite_query_indexes
+Create Date: 2026-10-17
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0010_test_result_user_columns"
+down_revision: Union[str, None] = "0009_composite_query_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 5000
+
+lab_reports = sa.table(
+    "lab_reports",
+    sa.column("doc_id", sa.String(length=36)),
+    sa.column("user_id", sa.String(length=36)),
+    sa.column("report_date", sa.Date()),
+)
+
+test_results = sa.table(
+    "test_results",
+    sa.column("doc_id", sa.String(length=36)),
+    sa.column("user_id", sa.String(length=36)),
+    sa.column("report_date", sa.Date()),
+)
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("test_results") as batch_op:
+        batch_op.add_column(sa.Column("user_id", sa.String(length=36), nullable=True))
+        batch_op.add_column(sa.Column("report_date", sa.Date(), nullable=True))
+
+    # One UPDATE per report through the doc_id index, reports read in batches.
+    connection = op.get_bind()
+    update = (
+        sa.update(test_results)
+        .where(test_results.c.doc_id == sa.bindparam("report_doc_id"))
+        .values(user_id=sa.bindparam("owner_id"), report_date=sa.bindparam("date"))
+    )
+    last_doc_id = ""
+    while True:
+        reports = connection.execute(
+            sa.select(lab_reports.c.doc_id, lab_reports.c.user_id, lab_reports.c.report_date)
+            .where(lab_reports.c.doc_id > last_doc_id)
+            .order_by(lab_reports.c.doc_id)
+            .limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not reports:
+            break
+        connection.execute(
+            update,
+            [{"report_doc_id": row.doc_id, "owner_id": row.user_id, "date": row.report_date} for row in reports],
+        )
+        last_doc_id = reports[-1].doc_id
+
+    with op.batch_alter_table("test_results") as batch_op:
+        batch_op.alter_column("user_id", existing_type=sa.String(length=36), nullable=False)
+        batch_op.create_index(
+            "ix_test_results_user_biomarker_date", ["user_id", "biomarker_id", "report_date"], unique=False
+        )
+        batch_op.create_foreign_key("fk_test_results_user_id", "users", ["user_id"], ["id"], ondelete="CASCADE")
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("test_results") as batch_op:
+        batch_op.drop_constraint("fk_test_results_user_id", type_="foreignkey")
+        batch_op.drop_index("ix_test_results_user_biomarker_date")
+        batch_op.drop_column("report_date")
+        batch_op.drop_column("user_id")
@@ -0,0 +1,30 @@
+"""biomarker catalog version shared by every worker
+
+Revision ID: 0011_biomarker_catalog_state
+Revises: 0010_test_result_user_columns
+Create Date: 2026-10-17
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0011_biomarker_catalog_state"
+down_revision: Union[str, None] = "0010_test_result_user_columns"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    state = op.create_table(
+        "biomarker_catalog_state",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("version", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.bulk_insert(state, [{"id": 1, "version": 0}])
+
+
+def downgrade() -> None:
+    op.drop_table("biomarker_catalog_state")
@@ -0,0 +1,27 @@
+"""remember each ingest job's spool file
+
+Revision ID: 0012_ingest_job_spool_path
+Revises: 0011_biomarker_catalog_state
+Create Date: 2026-10-17
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0012_ingest_job_spool_path"
+down_revision: Union[str, None] = "0011_biomarker_catalog_state"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("ingest_jobs") as batch_op:
+        batch_op.add_column(sa.Column("spool_path", sa.String(length=1024), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("ingest_jobs") as batch_op:
+        batch_op.drop_column("spool_path")
@@ -0,0 +1,34 @@
+"""ingest job owner and heartbeat
+
+Revision ID: 0013_ingest_job_heartbeat
+Revises: 0012_ingest_job_spool_path
+Create Date: 2026-10-17
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0013_ingest_job_heartbeat"
+down_revision: Union[str, None] = "0012_ingest_job_spool_path"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("ingest_jobs") as batch_op:
+        batch_op.add_column(sa.Column("owner", sa.String(length=128), nullable=True))
+        batch_op.add_column(sa.Column("heartbeat_at", sa.DateTime(), nullable=True))
+    op.execute("UPDATE ingest_jobs SET heartbeat_at = updated_at")
+    with op.batch_alter_table("ingest_jobs") as batch_op:
+        batch_op.alter_column("heartbeat_at", existing_type=sa.DateTime(), nullable=False)
+        batch_op.create_index("ix_ingest_jobs_status_heartbeat", ["status", "heartbeat_at"])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("ingest_jobs") as batch_op:
+        batch_op.drop_index("ix_ingest_jobs_status_heartbeat")
+        batch_op.drop_column("heartbeat_at")
+        batch_op.drop_column("owner")
@@ -0,0 +1,28 @@
+"""record which extractor produced each parse artifact
+
+Revision ID: 0015_parse_artifact_version
+Revises: 0014_revoked_tokens
+Create Date: 2026-10-17
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0015_parse_artifact_version"
+down_revision: Union[str, None] = "0014_revoked_tokens"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing artifacts get a version no extractor reports, so they are re-parsed on next use.
+    with op.batch_alter_table("parse_artifacts") as batch_op:
+        batch_op.add_column(sa.Column("extractor_version", sa.String(length=32), nullable=False, server_default="legacy"))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("parse_artifacts") as batch_op:
+        batch_op.drop_column("extractor_version")
@@ -0,0 +1,27 @@
+"""timestamp biomarker catalog changes
+
+Revision ID: 0016_catalog_modified_at
+Revises: 0015_parse_artifact_version
+Create Date: 2026-10-17
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0016_catalog_modified_at"
+down_revision: Union[str, None] = "0015_parse_artifact_version"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("biomarker_catalog_state") as batch_op:
+        batch_op.add_column(sa.Column("modified_at", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("biomarker_catalog_state") as batch_op:
+        batch_op.drop_column("modified_at")
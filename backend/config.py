@@ -1,3 +1,4 @@
+from pydantic import model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -5,16 +6,61 @@ class Settings(BaseSettings):
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
 
     database_url: str = "sqlite:///./medical_lab_reports.db"
+    database_async: bool = False
+    async_database_url: str | None = None
+    database_replica_url: str | None = None
+    replica_read_after_write_seconds: float = 30.0
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_recycle: int = 1800
+    db_pool_timeout: float = 30.0
+    db_pool_pre_ping: bool = True
+    db_query_cache_size: int = 1200
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    sqlite_cache_size_kib: int = 64 * 1024
     app_env: str = "dev"
     app_host: str = "0.0.0.0"
     app_port: int = 8000
     session_ttl_hours: int = 168
+    password_hash_rounds: int = 29000
+    password_hash_workers: int = 2
+    auth_token_cache_size: int = 10000
+    auth_token_cache_ttl_seconds: int = 60
+    auth_token_mode: str = "database"
+    auth_secret_key: str | None = None
+    session_sweep_interval_seconds: int = 900
+    session_sweep_batch_size: int = 1000
 
     openai_api_key: str | None = None
     llama_cloud_api_key: str | None = None
     api_base_url: str = "http://localhost:8000"
     classifier_fuzzy_threshold: int = 85
     classifier_enable_llm_fallback: bool = True
+    classifier_fuzzy_workers: int = 1
+    classifier_cache_size: int = 4096
+    classifier_negative_ttl_hours: int = 24
+    ingest_queue_backend: str = "thread"
+    ingest_workers: int = 4
+    ingest_job_heartbeat_seconds: int = 30
+    ingest_job_stale_seconds: int = 300
+    upload_dedupe: bool = False
+    upload_max_bytes: int = 50 * 1024 * 1024
+    upload_chunk_bytes: int = 1024 * 1024
+    upload_spool_dir: str | None = None
+    bulk_upload_max_files: int = 100
+    response_cache_backend: str = "memory"
+    response_cache_size: int = 2048
+    response_cache_ttl_seconds: int = 300
+    response_cache_url: str | None = None
+
+    @model_validator(mode="after")
+    def _check_auth_token_mode(self) -> "Settings":
+        # Fail at startup rather than with a 500 on every authenticated request.
+        if self.auth_token_mode not in ("database", "signed"):
+            raise ValueError(f"Unknown AUTH_TOKEN_MODE {self.auth_token_mode!r}; expected 'database' or 'signed'")
+        if self.auth_token_mode == "signed" and not self.auth_secret_key:
+            raise ValueError("AUTH_TOKEN_MODE=signed requires AUTH_SECRET_KEY")
+        return self
 
 
 settings = Settings()
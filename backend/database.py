@@ -1,14 +1,231 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
+import asyncio
+import threading
+import time
+import weakref
+from contextlib import AsyncExitStack, nullcontext
+from collections.abc import AsyncIterator, Callable
+from datetime import datetime, timedelta
+from typing import Any
+
+from fastapi import Depends
+from sqlalchemy import Result, Row, create_engine, event
+from sqlalchemy.engine import URL, Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, declarative_base, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.sql import Executable
+from starlette.concurrency import run_in_threadpool
 
 from backend.config import settings
 
 
-connect_args = {"check_same_thread": False} if settings.database_url.startswith("sqlite") else {}
-engine = create_engine(settings.database_url, pool_pre_ping=True, connect_args=connect_args)
+class PoolStats:
+    """Checkout counters for one pool; read through pool_status()."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.connects = 0
+        self.waits = 0
+        self.checkout_seconds_total = 0.0
+        self.checkout_seconds_max = 0.0
+        self.overflow_peak = 0
+
+    def record(self, elapsed: float, waited: bool, connected: bool, overflow: int) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.connects += connected
+            self.waits += waited
+            self.checkout_seconds_total += elapsed
+            self.checkout_seconds_max = max(self.checkout_seconds_max, elapsed)
+            self.overflow_peak = max(self.overflow_peak, overflow)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "connects": self.connects,
+                "waits": self.waits,
+                "checkout_ms_avg": round(1000 * self.checkout_seconds_total / self.checkouts, 3) if self.checkouts else 0.0,
+                "checkout_ms_max": round(1000 * self.checkout_seconds_max, 3),
+                "overflow_peak": self.overflow_peak,
+            }
+
+
+class _InstrumentedPool:
+    """Times each checkout. A checkout that found no idle connection and opened none had to wait."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        idle = self.checkedin()
+        opened = self._overflow
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            connected = self._overflow > opened
+            self.stats.record(time.perf_counter() - started, not idle and not connected, connected, max(self.overflow(), 0))
+
+
+class InstrumentedQueuePool(_InstrumentedPool, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPool, AsyncAdaptedQueuePool):
+    pass
+
+
+def _is_memory_sqlite(url: URL) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def engine_options(url: str, asynchronous: bool = False) -> dict:
+    """create_engine keyword arguments for ``url`` from the DB_POOL_* settings."""
+    parsed = make_url(url)
+    options: dict[str, Any] = {
+        "pool_pre_ping": settings.db_pool_pre_ping,
+        "query_cache_size": settings.db_query_cache_size,
+    }
+    if parsed.get_backend_name() == "sqlite" and not asynchronous:
+        options["connect_args"] = {"check_same_thread": False}
+    if _is_memory_sqlite(parsed):
+        return options  # single shared connection; pool sizing doesn't apply
+    options.update(
+        poolclass=InstrumentedAsyncQueuePool if asynchronous else InstrumentedQueuePool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_recycle=settings.db_pool_recycle,
+        pool_timeout=settings.db_pool_timeout,
+    )
+    return options
+
+
+def _apply_sqlite_pragmas(dbapi_connection, _connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA database_list")
+        in_memory = not cursor.fetchone()[2]
+        if not in_memory:
+            cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}")
+        cursor.execute(f"PRAGMA cache_size=-{int(settings.sqlite_cache_size_kib)}")
+    finally:
+        cursor.close()
+
+
+def tune_engine(engine: Engine) -> Engine:
+    """Per-dialect connection setup; accepts the sync_engine of an AsyncEngine too."""
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", _apply_sqlite_pragmas)
+    return engine
+
+
+def pool_status(engine: Engine) -> dict:
+    pool = engine.pool
+    status: dict[str, Any] = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            max_overflow=pool._max_overflow,
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=max(pool.overflow(), 0),
+        )
+    stats = getattr(pool, "stats", None)
+    if stats is not None:
+        status.update(stats.snapshot())
+    return status
+
+
+engine = tune_engine(create_engine(settings.database_url, **engine_options(settings.database_url)))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Optional read replica for the analytics endpoints, see get_read_db.
+replica_engine = (
+    tune_engine(create_engine(settings.database_replica_url, **engine_options(settings.database_replica_url)))
+    if settings.database_replica_url
+    else None
+)
+ReplicaSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine) if replica_engine else None
 Base = declarative_base()
 
+# Sync driver -> asyncio driver used when DATABASE_ASYNC is on and no ASYNC_DATABASE_URL is given.
+_ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+}
+
+_async_sessionmaker: async_sessionmaker[AsyncSession] | None = None
+_async_replica_sessionmaker: async_sessionmaker[AsyncSession] | None = None
+
+
+def async_database_url(url: str) -> str:
+    parsed = make_url(url)
+    return parsed.set(drivername=_ASYNC_DRIVERS.get(parsed.drivername, parsed.drivername)).render_as_string(
+        hide_password=False
+    )
+
+
+def _build_async_sessionmaker(url: str) -> async_sessionmaker[AsyncSession]:
+    async_engine = create_async_engine(url, **engine_options(url, asynchronous=True))
+    tune_engine(async_engine.sync_engine)
+    return async_sessionmaker(async_engine, expire_on_commit=False)
+
+
+def get_async_sessionmaker() -> async_sessionmaker[AsyncSession]:
+    global _async_sessionmaker
+    if _async_sessionmaker is None:
+        _async_sessionmaker = _build_async_sessionmaker(
+            settings.async_database_url or async_database_url(settings.database_url)
+        )
+    return _async_sessionmaker
+
+
+def get_async_replica_sessionmaker() -> async_sessionmaker[AsyncSession] | None:
+    global _async_replica_sessionmaker
+    if _async_replica_sessionmaker is None and settings.database_replica_url:
+        _async_replica_sessionmaker = _build_async_sessionmaker(async_database_url(settings.database_replica_url))
+    return _async_replica_sessionmaker
+
+
+class ReadSession:
+    """Awaitable read access over either an AsyncSession or a sync Session.
+
+    Sync sessions run each statement in the threadpool and buffer the rows there, so callers
+    get the same materialized results in both modes. With a replica, statements go there
+    unless they ask for the primary or the session has been pinned to it.
+    """
+
+    def __init__(self, session: Session | AsyncSession, replica: Session | AsyncSession | None = None):
+        self.session = session
+        self.replica = replica
+
+    def pin_to_primary_after(self, modified_at: datetime | None) -> None:
+        """Read your own writes: stay on the primary while the user's last write may not have replicated."""
+        window = timedelta(seconds=settings.replica_read_after_write_seconds)
+        if modified_at is not None and datetime.utcnow() - modified_at < window:
+            self.replica = None
+
+    async def _run(self, statement: Executable, fetch: Callable[[Result], Any], primary: bool) -> Any:
+        session = self.session if primary or self.replica is None else self.replica
+        if isinstance(session, AsyncSession):
+            return fetch(await session.execute(statement))
+        return await run_in_threadpool(lambda: fetch(session.execute(statement)))
+
+    async def all(self, statement: Executable, primary: bool = False) -> list:
+        return await self._run(statement, lambda result: result.all(), primary)
+
+    async def one(self, statement: Executable, primary: bool = False) -> Row:
+        return await self._run(statement, lambda result: result.one(), primary)
+
+    async def scalars(self, statement: Executable, primary: bool = False) -> list:
+        return await self._run(statement, lambda result: result.scalars().all(), primary)
+
 
 def get_db():
     db = SessionLocal()
@@ -16,3 +233,56 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# Per event loop: sync read sessions allowed at once, see get_read_db.
+_sync_read_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+def _pool_capacity(bind) -> int | None:
+    pool = getattr(bind, "pool", None)
+    overflow = getattr(pool, "_max_overflow", None)
+    if overflow is None or overflow < 0:
+        return None  # pool without a hard cap (NullPool, StaticPool, unlimited overflow)
+    return pool.size() + overflow
+
+
+def _read_slots(*sessions: Session) -> asyncio.Semaphore | None:
+    capacities = [c for c in (_pool_capacity(session.get_bind()) for session in sessions) if c is not None]
+    if not capacities:
+        return None
+    loop = asyncio.get_running_loop()
+    slots = _sync_read_slots.get(loop)
+    if slots is None:
+        slots = _sync_read_slots[loop] = asyncio.Semaphore(min(capacities))
+    return slots
+
+
+async def get_read_db(db: Session = Depends(get_db)) -> AsyncIterator[ReadSession]:
+    """Session for read-only endpoints: native asyncio with DATABASE_ASYNC, else the request's sync session.
+
+    With DATABASE_REPLICA_URL the session also carries a replica-bound session; conditional_get
+    decides per request whether reads may use it.
+
+    In sync mode each statement hops to the threadpool while the session keeps its connection
+    between hops. Admitting at most pool-capacity sessions at once (waiting on the event loop,
+    not in a thread) stops threads from piling up on pool checkout while connection holders
+    wait for a thread to continue.
+    """
+    if settings.database_async:
+        async with AsyncExitStack() as stack:
+            session = await stack.enter_async_context(get_async_sessionmaker()())
+            replica_factory = get_async_replica_sessionmaker()
+            replica = await stack.enter_async_context(replica_factory()) if replica_factory else None
+            yield ReadSession(session, replica)
+        return
+
+    replica = ReplicaSessionLocal() if ReplicaSessionLocal is not None else None
+    sessions = [db] if replica is None else [db, replica]
+    slots = _read_slots(*sessions)
+    async with slots if slots is not None else nullcontext():
+        try:
+            yield ReadSession(db, replica)
+        finally:
+            for session in sessions:
+                await run_in_threadpool(session.close)
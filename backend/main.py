@@ -6,12 +6,18 @@ from alembic.runtime.migration import MigrationContext
 from alembic.script import ScriptDirectory
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 
-from backend.database import engine
+from backend import database
+from backend.database import engine, pool_status
 from backend.models import biomarker, lab_report, user  # noqa: F401
-from backend.routers import auth, biomarkers, reports, trends
+from backend.routers import auth, biomarkers, dashboard, reports, trends
+from backend.routers.deps import NotModified
 from backend.seed.biomarker_seed import seed_biomarkers
+from backend.services.auth import shutdown_hash_executor
+from backend.services.job_heartbeat import start_job_heartbeat, stop_job_heartbeat
+from backend.services.jobs import shutdown_job_queue
+from backend.services.session_sweeper import start_session_sweeper, stop_session_sweeper
 
 app = FastAPI(title="Medical Lab Reports API", version="0.1.0")
 logger = logging.getLogger(__name__)
@@ -41,6 +47,16 @@ def _assert_database_at_head() -> None:
 def startup_event():
     _assert_database_at_head()
     seed_biomarkers()
+    start_job_heartbeat()
+    start_session_sweeper()
+
+
+@app.on_event("shutdown")
+def shutdown_event():
+    stop_session_sweeper()
+    shutdown_job_queue()
+    stop_job_heartbeat()
+    shutdown_hash_executor()
 
 
 @app.get("/")
@@ -53,6 +69,18 @@ def health():
     return {"status": "ok"}
 
 
+@app.get("/health/db-pool")
+def db_pool_health():
+    pools = {"sync": pool_status(engine)}
+    if database.replica_engine is not None:
+        pools["replica"] = pool_status(database.replica_engine)
+    if database._async_sessionmaker is not None:
+        pools["async"] = pool_status(database._async_sessionmaker.kw["bind"].sync_engine)
+    if database._async_replica_sessionmaker is not None:
+        pools["async_replica"] = pool_status(database._async_replica_sessionmaker.kw["bind"].sync_engine)
+    return pools
+
+
 @app.exception_handler(HTTPException)
 async def http_exception_handler(_: Request, exc: HTTPException):
     details = exc.detail if isinstance(exc.detail, dict) else {"reason": str(exc.detail)}
@@ -68,6 +96,11 @@ async def http_exception_handler(_: Request, exc: HTTPException):
     )
 
 
+@app.exception_handler(NotModified)
+async def not_modified_handler(_: Request, exc: NotModified):
+    return Response(status_code=304, headers=exc.headers)
+
+
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(_: Request, exc: RequestValidationError):
     return JSONResponse(
@@ -101,3 +134,4 @@ app.include_router(auth.router)
 app.include_router(reports.router)
 app.include_router(biomarkers.router)
 app.include_router(trends.router)
+app.include_router(dashboard.router)
@@ -1,11 +1,23 @@
-from backend.models.biomarker import BiomarkerReference
-from backend.models.lab_report import LabReportRecord, TestResultRecord
-from backend.models.user import User, UserSession
+from backend.models.biomarker import BiomarkerCatalogState, BiomarkerReference, ClassificationCacheEntry
+from backend.models.lab_report import (
+    IngestJob,
+    LabReportRecord,
+    ParseArtifact,
+    TestResultRecord,
+    UserBiomarkerLatest,
+)
+from backend.models.user import RevokedToken, User, UserSession
 
 __all__ = [
     "User",
     "UserSession",
+    "RevokedToken",
     "BiomarkerReference",
+    "BiomarkerCatalogState",
+    "ClassificationCacheEntry",
     "LabReportRecord",
     "TestResultRecord",
+    "IngestJob",
+    "ParseArtifact",
+    "UserBiomarkerLatest",
 ]
@@ -1,4 +1,6 @@
-from sqlalchemy import Integer, String, Text
+from datetime import datetime
+
+from sqlalchemy import DDL, DateTime, Float, ForeignKey, Integer, String, Text, event
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from backend.database import Base
@@ -17,3 +19,34 @@ class BiomarkerReference(Base):
     typical_range_female: Mapped[str | None] = mapped_column(String(100), nullable=True)
 
     test_results = relationship("TestResultRecord", back_populates="biomarker")
+
+
+class ClassificationCacheEntry(Base):
+    __tablename__ = "classification_cache"
+
+    name_key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    biomarker_id: Mapped[int | None] = mapped_column(
+        ForeignKey("biomarker_reference.id", ondelete="CASCADE"), nullable=True
+    )
+    score: Mapped[float] = mapped_column(Float, nullable=False)
+    source: Mapped[str] = mapped_column(String(10), nullable=False)
+    catalog_version: Mapped[str] = mapped_column(String(40), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+
+class BiomarkerCatalogState(Base):
+    """Single row whose version is bumped with every catalog or alias change, shared by all API processes."""
+
+    __tablename__ = "biomarker_catalog_state"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    modified_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+
+event.listen(
+    BiomarkerCatalogState.__table__,
+    "after_create",
+    DDL("INSERT INTO biomarker_catalog_state (id, version) VALUES (1, 0)"),
+)
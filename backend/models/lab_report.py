@@ -1,17 +1,22 @@
 from datetime import date, datetime
 from uuid import uuid4
 
-from sqlalchemy import BIGINT, Date, DateTime, ForeignKey, Integer, String, Text
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import BIGINT, Date, DateTime, Float, ForeignKey, Index, Integer, String, Text, event, select
+from sqlalchemy.orm import Mapped, mapped_column, relationship, validates
 
 from backend.database import Base
+from backend.services.trend_analyzer import parse_value
 
 
 class LabReportRecord(Base):
     __tablename__ = "lab_reports"
+    __table_args__ = (
+        # A user's reports in timeline order: report lists, history and the latest-biomarker rebuild.
+        Index("ix_lab_reports_user_report_date", "user_id", "report_date", "created_at"),
+    )
 
     doc_id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid4()))
-    user_id: Mapped[str] = mapped_column(String(36), ForeignKey("users.id", ondelete="CASCADE"), index=True)
+    user_id: Mapped[str] = mapped_column(String(36), ForeignKey("users.id", ondelete="CASCADE"))
     patient_name: Mapped[str] = mapped_column(String(255), nullable=False)
     patient_id: Mapped[str | None] = mapped_column(String(50), nullable=True)
     date_of_birth: Mapped[date | None] = mapped_column(Date, nullable=True)
@@ -23,6 +28,7 @@ class LabReportRecord(Base):
     physician_name: Mapped[str | None] = mapped_column(String(255), nullable=True)
     original_filename: Mapped[str | None] = mapped_column(String(255), nullable=True)
     raw_parsed_text: Mapped[str | None] = mapped_column(Text, nullable=True)
+    file_sha256: Mapped[str | None] = mapped_column(String(64), index=True, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
 
     user = relationship("User", back_populates="lab_reports")
@@ -31,12 +37,24 @@ class LabReportRecord(Base):
 
 class TestResultRecord(Base):
     __tablename__ = "test_results"
+    __table_args__ = (
+        # Results of one report for one biomarker (joins from lab_reports), and one biomarker across reports.
+        Index("ix_test_results_doc_biomarker", "doc_id", "biomarker_id"),
+        Index("ix_test_results_biomarker_doc", "biomarker_id", "doc_id"),
+        # Per-user biomarker reads without joining lab_reports.
+        Index("ix_test_results_user_biomarker_date", "user_id", "biomarker_id", "report_date"),
+    )
 
     id: Mapped[int] = mapped_column(BIGINT().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
-    doc_id: Mapped[str] = mapped_column(String(36), ForeignKey("lab_reports.doc_id", ondelete="CASCADE"), index=True)
-    biomarker_id: Mapped[int | None] = mapped_column(ForeignKey("biomarker_reference.id"), index=True, nullable=True)
+    doc_id: Mapped[str] = mapped_column(String(36), ForeignKey("lab_reports.doc_id", ondelete="CASCADE"))
+    biomarker_id: Mapped[int | None] = mapped_column(ForeignKey("biomarker_reference.id"), nullable=True)
+    # Copied from the report so per-user queries stay on this table; services/consistency.py checks them.
+    user_id: Mapped[str] = mapped_column(String(36), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    report_date: Mapped[date | None] = mapped_column(Date, nullable=True)
     test_name: Mapped[str] = mapped_column(String(255), index=True, nullable=False)
     value: Mapped[str | None] = mapped_column(String(50), nullable=True)
+    value_numeric: Mapped[float | None] = mapped_column(Float, nullable=True)
+    value_qualifier: Mapped[str | None] = mapped_column(String(8), nullable=True)
     unit: Mapped[str | None] = mapped_column(String(50), nullable=True)
     reference_range: Mapped[str | None] = mapped_column(String(100), nullable=True)
     category: Mapped[str | None] = mapped_column(String(100), nullable=True)
@@ -44,3 +62,76 @@ class TestResultRecord(Base):
 
     report = relationship("LabReportRecord", back_populates="test_results")
     biomarker = relationship("BiomarkerReference", back_populates="test_results")
+
+    @validates("value")
+    def _parse_value(self, _key: str, value: str | None) -> str | None:
+        # Keep the typed columns in step with ORM writes; bulk inserts set them explicitly.
+        self.value_numeric, self.value_qualifier = parse_value(value)
+        return value
+
+
+@event.listens_for(TestResultRecord, "before_insert")
+def _copy_report_columns(_mapper, connection, target: TestResultRecord) -> None:
+    # Keep the report's columns in step with ORM writes; bulk inserts set them explicitly.
+    if target.user_id is None:
+        target.user_id, target.report_date = connection.execute(
+            select(LabReportRecord.user_id, LabReportRecord.report_date).where(LabReportRecord.doc_id == target.doc_id)
+        ).one()
+
+
+class ParseArtifact(Base):
+    __tablename__ = "parse_artifacts"
+
+    file_sha256: Mapped[str] = mapped_column(String(64), primary_key=True)
+    # parser.EXTRACTOR_VERSION at parse time; artifacts from another version are not reused.
+    extractor_version: Mapped[str] = mapped_column(String(32), nullable=False, server_default="legacy")
+    raw_parsed_text: Mapped[str] = mapped_column(Text, nullable=False)
+    report_json: Mapped[str] = mapped_column(Text, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class IngestJob(Base):
+    __tablename__ = "ingest_jobs"
+    __table_args__ = (Index("ix_ingest_jobs_status_heartbeat", "status", "heartbeat_at"),)
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid4()))
+    user_id: Mapped[str] = mapped_column(String(36), ForeignKey("users.id", ondelete="CASCADE"), index=True)
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="queued")
+    stage: Mapped[str] = mapped_column(String(30), nullable=False, default="queued")
+    progress: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    original_filename: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    spool_path: Mapped[str | None] = mapped_column(String(1024), nullable=True)
+    # The API process whose in-memory queue holds the job; it refreshes heartbeat_at while the job is live.
+    owner: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    heartbeat_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    doc_id: Mapped[str | None] = mapped_column(String(36), nullable=True)
+    result: Mapped[str | None] = mapped_column(Text, nullable=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class UserBiomarkerLatest(Base):
+    """Latest and previous result per (user, biomarker key), maintained on ingest."""
+
+    __tablename__ = "user_biomarker_latest"
+
+    user_id: Mapped[str] = mapped_column(String(36), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    biomarker_key: Mapped[str] = mapped_column(String(300), primary_key=True)
+    biomarker_id: Mapped[int | None] = mapped_column(ForeignKey("biomarker_reference.id"), nullable=True)
+    test_name: Mapped[str] = mapped_column(String(255), nullable=False)
+    result_id: Mapped[int] = mapped_column(BIGINT().with_variant(Integer, "sqlite"), nullable=False)
+    doc_id: Mapped[str] = mapped_column(String(36), nullable=False)
+    value: Mapped[str | None] = mapped_column(String(50), nullable=True)
+    value_numeric: Mapped[float | None] = mapped_column(Float, nullable=True)
+    value_qualifier: Mapped[str | None] = mapped_column(String(8), nullable=True)
+    unit: Mapped[str | None] = mapped_column(String(50), nullable=True)
+    reference_range: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    flag: Mapped[str | None] = mapped_column(String(20), nullable=True)
+    report_date: Mapped[date | None] = mapped_column(Date, nullable=True)
+    report_created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    previous_result_id: Mapped[int | None] = mapped_column(BIGINT().with_variant(Integer, "sqlite"), nullable=True)
+    previous_doc_id: Mapped[str | None] = mapped_column(String(36), nullable=True)
+    previous_value_numeric: Mapped[float | None] = mapped_column(Float, nullable=True)
+    previous_report_date: Mapped[date | None] = mapped_column(Date, nullable=True)
+    previous_report_created_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
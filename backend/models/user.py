@@ -1,7 +1,7 @@
 from datetime import datetime
 from uuid import uuid4
 
-from sqlalchemy import DateTime, ForeignKey, String
+from sqlalchemy import DateTime, ForeignKey, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from backend.database import Base
@@ -15,6 +15,11 @@ class User(Base):
     password_hash: Mapped[str] = mapped_column(String(255), nullable=False)
     full_name: Mapped[str | None] = mapped_column(String(255), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    # Bumped whenever the user's reports change; drives ETags on read endpoints.
+    data_version: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    data_modified_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    # Signed session tokens embed this; bumping it invalidates all of the user's tokens.
+    session_generation: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
 
     sessions = relationship("UserSession", back_populates="user", cascade="all, delete-orphan")
     lab_reports = relationship("LabReportRecord", back_populates="user", cascade="all, delete-orphan")
@@ -29,3 +34,12 @@ class UserSession(Base):
     expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
 
     user = relationship("User", back_populates="sessions")
+
+
+class RevokedToken(Base):
+    """Signed tokens logged out before they expire; rows are purged once the token would have expired anyway."""
+
+    __tablename__ = "revoked_tokens"
+
+    jti: Mapped[str] = mapped_column(String(64), primary_key=True)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
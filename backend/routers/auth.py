@@ -1,34 +1,79 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from backend.database import get_db
 from backend.models.user import User
+from backend.routers.deps import get_current_user
 from backend.schemas.user import AuthResponse, LoginRequest, RegisterRequest, UserResponse
-from backend.services.auth import create_session, hash_password, verify_password
+from backend.services.auth import (
+    hash_password_async,
+    issue_token,
+    revoke_all_sessions,
+    revoke_session,
+    verify_and_update_password_async,
+)
 
 router = APIRouter(prefix="/api/auth", tags=["auth"])
 
 
-@router.post("/register", response_model=AuthResponse)
-def register(payload: RegisterRequest, db: Session = Depends(get_db)):
-    existing = db.query(User).filter(User.email == payload.email).first()
-    if existing:
-        raise HTTPException(status_code=400, detail="Email already registered")
+# register and login stay async so hashing waits on the hash executor without holding a request
+# thread; their database work is handed to the threadpool like every sync endpoint's.
+
+
+def _find_user(db: Session, email: str) -> User | None:
+    return db.query(User).filter(User.email == email).first()
 
-    user = User(email=payload.email, password_hash=hash_password(payload.password), full_name=payload.full_name)
+
+def _auth_response(db: Session, user: User) -> AuthResponse:
+    token = issue_token(db, user.id)
+    return AuthResponse(token=token, user=UserResponse(id=user.id, email=user.email, full_name=user.full_name))
+
+
+def _create_user(db: Session, payload: RegisterRequest, password_hash: str) -> AuthResponse:
+    user = User(email=payload.email, password_hash=password_hash, full_name=payload.full_name)
     db.add(user)
     db.commit()
     db.refresh(user)
+    return _auth_response(db, user)
+
 
-    session = create_session(db, user.id)
-    return AuthResponse(token=session.id, user=UserResponse(id=user.id, email=user.email, full_name=user.full_name))
+def _complete_login(db: Session, user: User, new_hash: str | None) -> AuthResponse:
+    if new_hash:
+        user.password_hash = new_hash
+        db.commit()
+    return _auth_response(db, user)
+
+
+@router.post("/register", response_model=AuthResponse)
+async def register(payload: RegisterRequest, db: Session = Depends(get_db)):
+    if await run_in_threadpool(_find_user, db, payload.email):
+        raise HTTPException(status_code=400, detail="Email already registered")
+
+    password_hash = await hash_password_async(payload.password)
+    return await run_in_threadpool(_create_user, db, payload, password_hash)
 
 
 @router.post("/login", response_model=AuthResponse)
-def login(payload: LoginRequest, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == payload.email).first()
-    if not user or not verify_password(payload.password, user.password_hash):
+async def login(payload: LoginRequest, db: Session = Depends(get_db)):
+    user = await run_in_threadpool(_find_user, db, payload.email)
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    verified, new_hash = await verify_and_update_password_async(payload.password, user.password_hash)
+    if not verified:
         raise HTTPException(status_code=401, detail="Invalid credentials")
+    return await run_in_threadpool(_complete_login, db, user, new_hash)
+
 
-    session = create_session(db, user.id)
-    return AuthResponse(token=session.id, user=UserResponse(id=user.id, email=user.email, full_name=user.full_name))
+@router.post("/logout")
+def logout(
+    everywhere: bool = Query(default=False),
+    authorization: str = Header(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    if everywhere:
+        revoke_all_sessions(db, current_user.id)
+    else:
+        revoke_session(db, authorization.replace("Bearer ", "", 1))
+    return {"status": "logged_out"}
@@ -1,124 +1,72 @@
-from collections import defaultdict
-
-from sqlalchemy.orm import Session
 from fastapi import APIRouter, Depends
 
-from backend.database import get_db
-from backend.models.biomarker import BiomarkerReference
-from backend.models.lab_report import LabReportRecord, TestResultRecord
+from backend.database import ReadSession, get_read_db
 from backend.models.user import User
-from backend.routers.deps import get_current_user
+from backend.routers.deps import conditional_get, get_current_user
 from backend.schemas.biomarker import BiomarkerSummaryItem, BiomarkerTrendPoint
-from backend.services.trend_analyzer import to_float
+from backend.services.dashboard import (
+    category_counts_query,
+    category_items,
+    history_query,
+    latest_rows_query,
+    summary_items,
+    unmapped_counts_query,
+    unmapped_items,
+)
+from backend.services.response_cache import cached_response
 
 router = APIRouter(prefix="/api/biomarkers", tags=["biomarkers"])
 
 
 @router.get("/summary", response_model=list[BiomarkerSummaryItem])
-def summary(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    reports = db.query(LabReportRecord.doc_id, LabReportRecord.report_date).filter(LabReportRecord.user_id == current_user.id).all()
-    report_dates = {r.doc_id: r.report_date for r in reports}
-
-    latest_by_biomarker = {}
-    tests = (
-        db.query(TestResultRecord, BiomarkerReference)
-        .outerjoin(BiomarkerReference, TestResultRecord.biomarker_id == BiomarkerReference.id)
-        .join(LabReportRecord, LabReportRecord.doc_id == TestResultRecord.doc_id)
-        .filter(LabReportRecord.user_id == current_user.id)
-        .all()
-    )
+async def summary(
+    db: ReadSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+    data_version: int = Depends(conditional_get),
+):
+    async def compute():
+        return summary_items(await db.all(latest_rows_query(current_user.id)))
 
-    for test, biomarker in tests:
-        key = test.biomarker_id or f"other::{test.test_name}"
-        report_date = report_dates.get(test.doc_id)
-        prev = latest_by_biomarker.get(key)
-        if prev is None or (report_date and (prev["report_date"] is None or report_date > prev["report_date"])):
-            latest_by_biomarker[key] = {
-                "test": test,
-                "biomarker": biomarker,
-                "report_date": report_date,
-            }
+    return await cached_response(current_user.id, "biomarkers.summary", data_version, compute)
 
-    items = []
-    for v in latest_by_biomarker.values():
-        t = v["test"]
-        b = v["biomarker"]
-        items.append(
-            BiomarkerSummaryItem(
-                biomarker_id=t.biomarker_id,
-                biomarker_name=b.standard_name if b else t.test_name,
-                category=b.category if b else "Other",
-                latest_value=t.value,
-                unit=t.unit,
-                reference_range=t.reference_range,
-                flag=t.flag,
-                report_date=v["report_date"].isoformat() if v["report_date"] else None,
-            )
-        )
-    return sorted(items, key=lambda x: (x.category, x.biomarker_name))
 
-
-@router.get("/{biomarker_id}/history", response_model=list[BiomarkerTrendPoint])
-def history(biomarker_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    rows = (
-        db.query(TestResultRecord, LabReportRecord)
-        .join(LabReportRecord, TestResultRecord.doc_id == LabReportRecord.doc_id)
-        .filter(
-            TestResultRecord.biomarker_id == biomarker_id,
-            LabReportRecord.user_id == current_user.id,
-        )
-        .order_by(LabReportRecord.report_date.is_(None).desc(), LabReportRecord.report_date.asc(), LabReportRecord.created_at.asc())
-        .all()
-    )
+@router.get("/{biomarker_id}/history", response_model=list[BiomarkerTrendPoint], dependencies=[Depends(conditional_get)])
+async def history(biomarker_id: int, db: ReadSession = Depends(get_read_db), current_user: User = Depends(get_current_user)):
+    rows = await db.scalars(history_query(current_user.id, biomarker_id))
 
     return [
         BiomarkerTrendPoint(
-            report_date=report.report_date.isoformat() if report.report_date else None,
-            value=to_float(test.value),
+            report_date=test.report_date.isoformat() if test.report_date else None,
+            value=test.value_numeric,
+            value_qualifier=test.value_qualifier,
             raw_value=test.value,
             unit=test.unit,
             flag=test.flag,
             doc_id=test.doc_id,
         )
-        for test, report in rows
+        for test in rows
     ]
 
 
 @router.get("/categories")
-def categories(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    summary_rows = summary(db=db, current_user=current_user)
-    grouped: dict[str, dict[str, int]] = defaultdict(lambda: {"total": 0, "flagged": 0, "normal": 0})
-    for item in summary_rows:
-        grouped[item.category]["total"] += 1
-        if item.flag:
-            grouped[item.category]["flagged"] += 1
-        else:
-            grouped[item.category]["normal"] += 1
+async def categories(
+    db: ReadSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+    data_version: int = Depends(conditional_get),
+):
+    async def compute():
+        return category_items(await db.all(category_counts_query(current_user.id)))
 
-    return [
-        {
-            "category": category,
-            "total": counts["total"],
-            "flagged": counts["flagged"],
-            "normal": counts["normal"],
-        }
-        for category, counts in sorted(grouped.items(), key=lambda kv: kv[0])
-    ]
+    return await cached_response(current_user.id, "biomarkers.categories", data_version, compute)
 
 
 @router.get("/unmapped")
-def unmapped(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    rows = (
-        db.query(TestResultRecord.test_name)
-        .join(LabReportRecord, LabReportRecord.doc_id == TestResultRecord.doc_id)
-        .filter(LabReportRecord.user_id == current_user.id, TestResultRecord.biomarker_id.is_(None))
-        .all()
-    )
-    counts: dict[str, int] = defaultdict(int)
-    for (test_name,) in rows:
-        counts[test_name] += 1
-
-    return [
-        {"test_name": test_name, "count": count}
-        for test_name, count in sorted(counts.items(), key=lambda kv: (-kv[1], kv[0]))
-    ]
+async def unmapped(
+    db: ReadSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+    data_version: int = Depends(conditional_get),
+):
+    async def compute():
+        return unmapped_items(await db.all(unmapped_counts_query(current_user.id)))
+
+    return await cached_response(current_user.id, "biomarkers.unmapped", data_version, compute)
@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Depends
+
+from backend.database import ReadSession, get_read_db
+from backend.models.user import User
+from backend.routers.deps import conditional_get, get_current_user
+from backend.services.dashboard import build_snapshot
+from backend.services.response_cache import cached_response
+
+router = APIRouter(prefix="/api/dashboard", tags=["dashboard"])
+
+
+@router.get("/snapshot")
+async def snapshot(
+    db: ReadSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+    data_version: int = Depends(conditional_get),
+):
+    return await cached_response(
+        current_user.id, "dashboard.snapshot", data_version, lambda: build_snapshot(db, current_user.id)
+    )
@@ -1,7 +1,13 @@
-from fastapi import Depends, Header, HTTPException
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Depends, Header, HTTPException, Request, Response
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from backend.database import get_db
+from backend.database import ReadSession, get_db, get_read_db
+from backend.models.biomarker import BiomarkerCatalogState
 from backend.models.user import User
 from backend.services.auth import get_user_from_token
 
@@ -17,3 +23,73 @@ def get_current_user(
     if not user:
         raise HTTPException(status_code=401, detail="Invalid or expired session")
     return user
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = {value.strip().removeprefix("W/") for value in header.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+class NotModified(Exception):
+    """Raised by conditional_get when the client's validators are current; answered with a bare 304."""
+
+    def __init__(self, headers: dict[str, str]):
+        self.headers = headers
+
+
+def _modified_since(request: Request, modified_at: datetime) -> bool:
+    header = request.headers.get("if-modified-since")
+    if not header:
+        return True
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return True
+    # HTTP dates have one-second resolution.
+    return modified_at.replace(microsecond=0, tzinfo=timezone.utc) > since
+
+
+async def conditional_get(
+    request: Request,
+    response: Response,
+    db: ReadSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+) -> int:
+    """Validate If-None-Match / If-Modified-Since against the user's data version before any work is done.
+
+    The validators also cover the biomarker catalog version, since catalog and alias changes alter
+    names and categories in the responses without touching the user's data.
+
+    Reads the versions from the primary with its own query so neither a cached user object nor a
+    lagging replica serves a stale validator, then keeps the request on the primary if the user
+    wrote recently. Returns the current data version for endpoints that want to key caches on it.
+    """
+    catalog = select(BiomarkerCatalogState).where(BiomarkerCatalogState.id == 1)
+    version, data_modified_at, catalog_version, catalog_modified_at = await db.one(
+        select(
+            User.data_version,
+            User.data_modified_at,
+            catalog.with_only_columns(BiomarkerCatalogState.version).scalar_subquery(),
+            catalog.with_only_columns(BiomarkerCatalogState.modified_at).scalar_subquery(),
+        ).where(User.id == current_user.id),
+        primary=True,
+    )
+    db.pin_to_primary_after(data_modified_at)
+    resource = f"{current_user.id}:{version}:{catalog_version}:{request.url.path}?{request.url.query}"
+    etag = f'W/"{hashlib.sha256(resource.encode()).hexdigest()[:32]}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    modified_at = max((at for at in (data_modified_at, catalog_modified_at) if at is not None), default=None)
+    if modified_at is not None:
+        headers["Last-Modified"] = format_datetime(modified_at.replace(tzinfo=timezone.utc), usegmt=True)
+
+    if "if-none-match" in request.headers:
+        if _etag_matches(request, etag.removeprefix("W/")):
+            raise NotModified(headers)
+    elif modified_at is not None and not _modified_since(request, modified_at):
+        raise NotModified(headers)
+
+    response.headers.update(headers)
+    return version
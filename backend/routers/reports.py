@@ -1,100 +1,152 @@
-from datetime import datetime
+import json
+import zipfile
 
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
-from backend.database import get_db
-from backend.models.lab_report import LabReportRecord, TestResultRecord
+from backend.config import settings
+from backend.database import ReadSession, get_db, get_read_db
+from backend.models.lab_report import IngestJob, LabReportRecord, TestResultRecord
 from backend.models.user import User
-from backend.routers.deps import get_current_user
-from backend.schemas.lab_report import PatientInfo, ReportDetailResponse, ReportListItem, TestResult
-from backend.services.classifier import classify_test_name
-from backend.services.parser import extract_lab_data, parse_pdf_bytes
+from backend.routers.deps import conditional_get, get_current_user
+from backend.schemas.lab_report import BulkUploadResponse, IngestJobResponse, PatientInfo, ReportDetailResponse, ReportListItem, ReportTestResult
+from backend.services.analytics import bump_data_version, lock_user, rebuild_user_latest
+from backend.services.ingest import run_ingest_job
+from backend.services.jobs import INSTANCE_ID, get_job_queue
+from backend.services.uploads import SpooledUpload, UploadTooLargeError, discard_spooled, extract_zip_pdfs, spool_upload
 
 router = APIRouter(prefix="/api/reports", tags=["reports"])
 
 
-def _safe_date(value: str | None):
-    if not value:
-        return None
-    for fmt in ("%Y-%m-%d", "%m/%d/%Y", "%m/%d/%y"):
-        try:
-            return datetime.strptime(value, fmt).date()
-        except ValueError:
-            continue
-    return None
-
-
-@router.post("/upload")
+@router.post("/upload", status_code=202, response_model=IngestJobResponse)
 async def upload_report(
     file: UploadFile = File(...),
+    dedupe: bool | None = Query(default=None),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     if not file.filename or not file.filename.lower().endswith(".pdf"):
         raise HTTPException(status_code=400, detail="Please upload a PDF file")
 
-    file_bytes = await file.read()
-    parsed_text = parse_pdf_bytes(file_bytes=file_bytes, file_name=file.filename)
-    parsed_report = extract_lab_data(parsed_text)
-
-    report = LabReportRecord(
-        user_id=current_user.id,
-        patient_name=parsed_report.patient_info.name or "Unknown",
-        patient_id=parsed_report.patient_info.patient_id,
-        date_of_birth=_safe_date(parsed_report.patient_info.date_of_birth),
-        gender=parsed_report.patient_info.gender,
-        lab_name=parsed_report.lab_name,
-        report_date=_safe_date(parsed_report.report_date),
-        collection_date=_safe_date(parsed_report.collection_date),
-        sample_type=parsed_report.sample_type,
-        physician_name=parsed_report.physician_name,
-        original_filename=file.filename,
-        raw_parsed_text=parsed_text,
+    try:
+        spooled = await spool_upload(file)
+    except UploadTooLargeError as exc:
+        raise HTTPException(status_code=413, detail=str(exc)) from exc
+
+    try:
+        [response] = await run_in_threadpool(_queue_ingest_jobs, db, current_user.id, [spooled], dedupe)
+    except Exception:
+        discard_spooled(spooled.path)
+        raise
+    return response
+
+
+async def _spool_bulk_files(files: list[UploadFile]) -> list[SpooledUpload]:
+    spooled: list[SpooledUpload] = []
+    try:
+        for upload in files:
+            name = upload.filename or ""
+            if not name.lower().endswith((".pdf", ".zip")):
+                raise HTTPException(status_code=400, detail=f"{name or 'Unnamed file'} is not a PDF or ZIP archive")
+            # Checked before spooling so an over-limit request never writes another file to disk.
+            remaining = settings.bulk_upload_max_files - len(spooled)
+            if remaining <= 0:
+                raise UploadTooLargeError(f"Bulk uploads are limited to {settings.bulk_upload_max_files} PDFs")
+            item = await spool_upload(upload)
+            if name.lower().endswith(".pdf"):
+                spooled.append(item)
+                continue
+            try:
+                spooled.extend(await run_in_threadpool(extract_zip_pdfs, item.path, remaining))
+            except zipfile.BadZipFile as exc:
+                raise HTTPException(status_code=400, detail=f"{name} is not a valid ZIP archive") from exc
+            finally:
+                discard_spooled(item.path)
+    except UploadTooLargeError as exc:
+        for item in spooled:
+            discard_spooled(item.path)
+        raise HTTPException(status_code=413, detail=str(exc)) from exc
+    except BaseException:
+        for item in spooled:
+            discard_spooled(item.path)
+        raise
+    return spooled
+
+
+def _queue_ingest_jobs(
+    db: Session, user_id: str, spooled: list[SpooledUpload], dedupe: bool | None
+) -> list[IngestJobResponse]:
+    """Record one ingest job per spooled PDF and hand them to the queue (runs in the threadpool)."""
+    jobs = [
+        IngestJob(user_id=user_id, original_filename=item.file_name, spool_path=item.path, owner=INSTANCE_ID)
+        for item in spooled
+    ]
+    db.add_all(jobs)
+    db.commit()
+    responses = [_job_response(job) for job in jobs]
+    queue = get_job_queue()
+    for job, item in zip(jobs, spooled):
+        queue.submit(run_ingest_job, job.id, item.path, item.file_name, item.sha256, dedupe)
+    return responses
+
+
+@router.post("/bulk-upload", status_code=202, response_model=BulkUploadResponse)
+async def bulk_upload_reports(
+    files: list[UploadFile] = File(...),
+    dedupe: bool | None = Query(default=None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    spooled = await _spool_bulk_files(files)
+    if not spooled:
+        raise HTTPException(status_code=400, detail="No PDF files found in upload")
+
+    # One ingest job per PDF on the shared queue, so INGEST_WORKERS bounds parsing for single and bulk uploads alike.
+    try:
+        return BulkUploadResponse(jobs=await run_in_threadpool(_queue_ingest_jobs, db, current_user.id, spooled, dedupe))
+    except Exception:
+        for item in spooled:
+            discard_spooled(item.path)
+        raise
+
+
+def _job_response(job: IngestJob) -> IngestJobResponse:
+    return IngestJobResponse(
+        job_id=job.id,
+        status=job.status,
+        stage=job.stage,
+        progress=job.progress,
+        filename=job.original_filename,
+        doc_id=job.doc_id,
+        result=json.loads(job.result) if job.result else None,
+        error=job.error,
+        created_at=job.created_at.isoformat(),
+        updated_at=job.updated_at.isoformat(),
     )
-    db.add(report)
-    db.flush()
 
-    mapped_count = 0
-    unmapped_tests: list[str] = []
-    for item in parsed_report.test_results:
-        if not item.test_name:
-            continue  # skip entries the LLM returned without a test name
-        biomarker_id = classify_test_name(db, item.test_name)
-        if biomarker_id is not None:
-            mapped_count += 1
-        else:
-            unmapped_tests.append(item.test_name)
-        db.add(
-            TestResultRecord(
-                doc_id=report.doc_id,
-                biomarker_id=biomarker_id,
-                test_name=item.test_name,
-                value=item.value,
-                unit=item.unit,
-                reference_range=item.reference_range,
-                category=item.category,
-                flag=item.flag,
-            )
-        )
 
-    db.commit()
-    return {
-        "doc_id": report.doc_id,
-        "tests": len(parsed_report.test_results),
-        "mapped_tests": mapped_count,
-        "unmapped_tests_count": len(unmapped_tests),
-        "unmapped_tests_preview": unmapped_tests[:10],
-    }
-
-
-@router.get("", response_model=list[ReportListItem])
-def list_reports(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    rows = (
-        db.query(LabReportRecord)
-        .filter(LabReportRecord.user_id == current_user.id)
+@router.get("/jobs/{job_id}", response_model=IngestJobResponse)
+def get_job(job_id: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    # Job rows are written by queue workers, so never trust a copy already in this session.
+    job = (
+        db.query(IngestJob)
+        .populate_existing()
+        .filter(IngestJob.id == job_id, IngestJob.user_id == current_user.id)
+        .first()
+    )
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _job_response(job)
+
+
+@router.get("", response_model=list[ReportListItem], dependencies=[Depends(conditional_get)])
+async def list_reports(db: ReadSession = Depends(get_read_db), current_user: User = Depends(get_current_user)):
+    rows = await db.scalars(
+        select(LabReportRecord)
+        .where(LabReportRecord.user_id == current_user.id)
         .order_by(LabReportRecord.report_date.is_(None), LabReportRecord.report_date.desc(), LabReportRecord.created_at.desc())
-        .all()
     )
     return [
         ReportListItem(
@@ -108,7 +160,7 @@ def list_reports(db: Session = Depends(get_db), current_user: User = Depends(get
     ]
 
 
-@router.get("/{doc_id}", response_model=ReportDetailResponse)
+@router.get("/{doc_id}", response_model=ReportDetailResponse, dependencies=[Depends(conditional_get)])
 def get_report(doc_id: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
     report = (
         db.query(LabReportRecord)
@@ -133,9 +185,11 @@ def get_report(doc_id: str, db: Session = Depends(get_db), current_user: User =
         sample_type=report.sample_type,
         physician_name=report.physician_name,
         test_results=[
-            TestResult(
+            ReportTestResult(
                 test_name=t.test_name,
                 value=t.value,
+                value_numeric=t.value_numeric,
+                value_qualifier=t.value_qualifier,
                 unit=t.unit,
                 reference_range=t.reference_range,
                 category=t.category,
@@ -144,3 +198,23 @@ def get_report(doc_id: str, db: Session = Depends(get_db), current_user: User =
             for t in tests
         ],
     )
+
+
+@router.delete("/{doc_id}")
+def delete_report(doc_id: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    # Lock before the first read so the rebuild's snapshot cannot predate a concurrent ingest.
+    lock_user(db, current_user.id)
+    report = (
+        db.query(LabReportRecord)
+        .filter(LabReportRecord.doc_id == doc_id, LabReportRecord.user_id == current_user.id)
+        .first()
+    )
+    if not report:
+        raise HTTPException(status_code=404, detail="Report not found")
+
+    db.delete(report)
+    db.flush()
+    rebuild_user_latest(db, current_user.id)
+    bump_data_version(db, current_user.id)
+    db.commit()
+    return {"doc_id": doc_id, "deleted": True}
@@ -3,7 +3,10 @@ CREATE TABLE IF NOT EXISTS users (
     email VARCHAR(255) NOT NULL UNIQUE,
     password_hash VARCHAR(255) NOT NULL,
     full_name VARCHAR(255),
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    data_version INT NOT NULL DEFAULT 0,
+    data_modified_at TIMESTAMP NULL,
+    session_generation INT NOT NULL DEFAULT 0
 );
 
 CREATE TABLE IF NOT EXISTS user_sessions (
@@ -16,6 +19,12 @@ CREATE TABLE IF NOT EXISTS user_sessions (
     INDEX idx_user_sessions_expires_at (expires_at)
 );
 
+CREATE TABLE IF NOT EXISTS revoked_tokens (
+    jti VARCHAR(64) PRIMARY KEY,
+    expires_at TIMESTAMP NOT NULL,
+    INDEX ix_revoked_tokens_expires_at (expires_at)
+);
+
 CREATE TABLE IF NOT EXISTS biomarker_reference (
     id INT AUTO_INCREMENT PRIMARY KEY,
     standard_name VARCHAR(255) NOT NULL UNIQUE,
@@ -42,25 +51,105 @@ CREATE TABLE IF NOT EXISTS lab_reports (
     physician_name VARCHAR(255),
     original_filename VARCHAR(255),
     raw_parsed_text TEXT,
+    file_sha256 VARCHAR(64),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-    INDEX idx_lab_reports_user_id (user_id),
-    INDEX idx_lab_reports_report_date (report_date)
+    INDEX idx_lab_reports_user_report_date (user_id, report_date, created_at),
+    INDEX idx_lab_reports_report_date (report_date),
+    INDEX idx_lab_reports_file_sha256 (file_sha256)
 );
 
 CREATE TABLE IF NOT EXISTS test_results (
     id BIGINT AUTO_INCREMENT PRIMARY KEY,
     doc_id VARCHAR(36) NOT NULL,
     biomarker_id INT NULL,
+    user_id VARCHAR(36) NOT NULL,
+    report_date DATE,
     test_name VARCHAR(255) NOT NULL,
     value VARCHAR(50),
+    value_numeric DOUBLE,
+    value_qualifier VARCHAR(8),
     unit VARCHAR(50),
     reference_range VARCHAR(100),
     category VARCHAR(100),
     flag VARCHAR(20),
     FOREIGN KEY (doc_id) REFERENCES lab_reports(doc_id) ON DELETE CASCADE,
     FOREIGN KEY (biomarker_id) REFERENCES biomarker_reference(id) ON DELETE SET NULL,
-    INDEX idx_test_results_doc_id (doc_id),
-    INDEX idx_test_results_test_name (test_name),
-    INDEX idx_test_results_biomarker_id (biomarker_id)
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+    INDEX idx_test_results_doc_biomarker (doc_id, biomarker_id),
+    INDEX idx_test_results_user_biomarker_date (user_id, biomarker_id, report_date),
+    INDEX idx_test_results_biomarker_doc (biomarker_id, doc_id),
+    INDEX idx_test_results_test_name (test_name)
+);
+
+CREATE TABLE IF NOT EXISTS classification_cache (
+    name_key VARCHAR(255) PRIMARY KEY,
+    biomarker_id INT NULL,
+    score FLOAT NOT NULL,
+    source VARCHAR(10) NOT NULL,
+    catalog_version VARCHAR(40) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    expires_at TIMESTAMP NULL,
+    FOREIGN KEY (biomarker_id) REFERENCES biomarker_reference(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS biomarker_catalog_state (
+    id INT PRIMARY KEY,
+    version INT NOT NULL DEFAULT 0,
+    modified_at TIMESTAMP NULL
+);
+
+INSERT IGNORE INTO biomarker_catalog_state (id, version) VALUES (1, 0);
+
+CREATE TABLE IF NOT EXISTS ingest_jobs (
+    id VARCHAR(36) PRIMARY KEY,
+    user_id VARCHAR(36) NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    stage VARCHAR(30) NOT NULL,
+    progress INT NOT NULL DEFAULT 0,
+    original_filename VARCHAR(255),
+    spool_path VARCHAR(1024),
+    owner VARCHAR(128),
+    heartbeat_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    doc_id VARCHAR(36),
+    result TEXT,
+    error TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+    INDEX idx_ingest_jobs_user_id (user_id),
+    INDEX ix_ingest_jobs_status_heartbeat (status, heartbeat_at)
+);
+
+CREATE TABLE IF NOT EXISTS parse_artifacts (
+    file_sha256 VARCHAR(64) PRIMARY KEY,
+    extractor_version VARCHAR(32) NOT NULL DEFAULT 'legacy',
+    raw_parsed_text TEXT NOT NULL,
+    report_json TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS user_biomarker_latest (
+    user_id VARCHAR(36) NOT NULL,
+    biomarker_key VARCHAR(300) NOT NULL,
+    biomarker_id INT NULL,
+    test_name VARCHAR(255) NOT NULL,
+    result_id BIGINT NOT NULL,
+    doc_id VARCHAR(36) NOT NULL,
+    value VARCHAR(50),
+    value_numeric DOUBLE,
+    value_qualifier VARCHAR(8),
+    unit VARCHAR(50),
+    reference_range VARCHAR(100),
+    flag VARCHAR(20),
+    report_date DATE NULL,
+    report_created_at TIMESTAMP NOT NULL,
+    previous_result_id BIGINT NULL,
+    previous_doc_id VARCHAR(36) NULL,
+    previous_value_numeric DOUBLE,
+    previous_report_date DATE NULL,
+    previous_report_created_at TIMESTAMP NULL,
+    PRIMARY KEY (user_id, biomarker_key),
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+    FOREIGN KEY (biomarker_id) REFERENCES biomarker_reference(id) ON DELETE SET NULL
 );
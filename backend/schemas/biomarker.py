@@ -6,6 +6,8 @@ class BiomarkerSummaryItem(BaseModel):
     biomarker_name: str
     category: str
     latest_value: str | None
+    latest_value_numeric: float | None = None
+    latest_value_qualifier: str | None = None
     unit: str | None
     reference_range: str | None
     flag: str | None
@@ -15,6 +17,7 @@ class BiomarkerSummaryItem(BaseModel):
 class BiomarkerTrendPoint(BaseModel):
     report_date: str | None
     value: float | None
+    value_qualifier: str | None = None
     raw_value: str | None
     unit: str | None
     flag: str | None
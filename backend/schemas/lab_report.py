@@ -38,6 +38,11 @@ class ReportListItem(BaseModel):
     created_at: str
 
 
+class ReportTestResult(TestResult):
+    value_numeric: float | None = None
+    value_qualifier: str | None = None
+
+
 class ReportDetailResponse(BaseModel):
     doc_id: str
     patient_info: PatientInfo
@@ -46,4 +51,21 @@ class ReportDetailResponse(BaseModel):
     collection_date: str | None
     sample_type: str | None
     physician_name: str | None
-    test_results: list[TestResult]
+    test_results: list[ReportTestResult]
+
+
+class IngestJobResponse(BaseModel):
+    job_id: str
+    status: str
+    stage: str
+    progress: int
+    filename: str | None
+    doc_id: str | None
+    result: dict | None
+    error: str | None
+    created_at: str
+    updated_at: str
+
+
+class BulkUploadResponse(BaseModel):
+    jobs: list[IngestJobResponse]
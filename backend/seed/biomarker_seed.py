@@ -2,6 +2,7 @@ import json
 
 from backend.database import SessionLocal
 from backend.models.biomarker import BiomarkerReference
+from backend.services.classifier import bump_catalog_version, invalidate_alias_index
 
 
 BIOMARKERS = [
@@ -148,6 +149,9 @@ def seed_biomarkers():
                     common_aliases=json.dumps(item["aliases"]),
                 )
             )
+        if db.new or any(db.is_modified(row) for row in existing.values()):
+            bump_catalog_version(db)
         db.commit()
+        invalidate_alias_index()
     finally:
         db.close()
@@ -0,0 +1,209 @@
+from datetime import date, datetime
+
+from sqlalchemy import case, delete, func, insert, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Subquery
+
+from backend.models.lab_report import LabReportRecord, TestResultRecord, UserBiomarkerLatest
+from backend.models.user import User
+
+# Result columns copied onto the latest row; the previous slot keeps only what trends need.
+_LATEST_FIELDS = ("value", "value_numeric", "value_qualifier", "unit", "reference_range", "flag")
+
+
+def biomarker_key_columns():
+    # Mapped results group by biomarker; unmapped ones by their raw test name.
+    return (
+        TestResultRecord.biomarker_id,
+        case((TestResultRecord.biomarker_id.is_(None), TestResultRecord.test_name)),
+    )
+
+
+def ranked_results_subquery(user_id: str) -> Subquery:
+    """Number each user's results per biomarker key, newest report first (rn = 1 is latest)."""
+    rn = func.row_number().over(
+        partition_by=biomarker_key_columns(),
+        order_by=(
+            LabReportRecord.report_date.is_(None),
+            LabReportRecord.report_date.desc(),
+            LabReportRecord.created_at.desc(),
+            TestResultRecord.id.desc(),
+        ),
+    )
+    return (
+        select(
+            TestResultRecord.id.label("result_id"),
+            LabReportRecord.report_date.label("report_date"),
+            LabReportRecord.created_at.label("report_created_at"),
+            rn.label("rn"),
+        )
+        .join(LabReportRecord, LabReportRecord.doc_id == TestResultRecord.doc_id)
+        .where(LabReportRecord.user_id == user_id)
+        .subquery("ranked_results")
+    )
+
+
+def bump_data_version(db: Session, user_id: str) -> None:
+    """Mark the user's report data as changed, invalidating validators handed to clients."""
+    db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(data_version=User.data_version + 1, data_modified_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+
+
+def biomarker_key(biomarker_id: int | None, test_name: str) -> str:
+    """String form of the biomarker key used by user_biomarker_latest."""
+    return f"id:{biomarker_id}" if biomarker_id is not None else f"name:{test_name}"
+
+
+def _recency(result_id: int, report_date: date | None, report_created_at: datetime) -> tuple:
+    # Same ordering as ranked_results_subquery: undated reports sort before dated ones.
+    return (report_date is not None, report_date or date.min, report_created_at, result_id)
+
+
+def _latest_row(user_id: str, key: str, latest: dict, previous: dict | None) -> dict:
+    row = {
+        "user_id": user_id,
+        "biomarker_key": key,
+        "biomarker_id": latest["biomarker_id"],
+        "test_name": latest["test_name"],
+        "result_id": latest["result_id"],
+        "doc_id": latest["doc_id"],
+        "report_date": latest["report_date"],
+        "report_created_at": latest["report_created_at"],
+        "previous_result_id": None,
+        "previous_doc_id": None,
+        "previous_value_numeric": None,
+        "previous_report_date": None,
+        "previous_report_created_at": None,
+    }
+    row.update({name: latest[name] for name in _LATEST_FIELDS})
+    if previous is not None:
+        row.update(
+            previous_result_id=previous["result_id"],
+            previous_doc_id=previous["doc_id"],
+            previous_value_numeric=previous["value_numeric"],
+            previous_report_date=previous["report_date"],
+            previous_report_created_at=previous["report_created_at"],
+        )
+    return row
+
+
+def _points_from_row(row: UserBiomarkerLatest) -> list[dict]:
+    points = [
+        {
+            "biomarker_id": row.biomarker_id,
+            "test_name": row.test_name,
+            "result_id": row.result_id,
+            "doc_id": row.doc_id,
+            "report_date": row.report_date,
+            "report_created_at": row.report_created_at,
+            **{name: getattr(row, name) for name in _LATEST_FIELDS},
+        }
+    ]
+    if row.previous_result_id is not None:
+        points.append(
+            {
+                "result_id": row.previous_result_id,
+                "doc_id": row.previous_doc_id,
+                "value_numeric": row.previous_value_numeric,
+                "report_date": row.previous_report_date,
+                "report_created_at": row.previous_report_created_at,
+            }
+        )
+    return points
+
+
+def lock_user(db: Session, user_id: str) -> None:
+    """Take the user row lock that serializes every write to the user's latest-biomarker rows."""
+    db.execute(select(User.id).where(User.id == user_id).with_for_update())
+
+
+def record_new_results(db: Session, report: LabReportRecord, rows: list[dict], result_ids: list[int]) -> None:
+    """Fold a freshly inserted report's results into the user's latest-biomarker rows.
+
+    Runs inside the ingest transaction. The user row is locked first so concurrent uploads
+    for the same user serialize here instead of racing on the same latest rows.
+    """
+    if not rows:
+        return
+    lock_user(db, report.user_id)
+
+    candidates: dict[str, list[dict]] = {}
+    for row, result_id in zip(rows, result_ids):
+        point = {
+            **{name: row[name] for name in ("biomarker_id", "test_name", *_LATEST_FIELDS)},
+            "result_id": result_id,
+            "doc_id": report.doc_id,
+            "report_date": report.report_date,
+            "report_created_at": report.created_at,
+        }
+        candidates.setdefault(biomarker_key(row["biomarker_id"], row["test_name"]), []).append(point)
+
+    existing = {
+        row.biomarker_key: row
+        for row in db.scalars(
+            select(UserBiomarkerLatest).where(
+                UserBiomarkerLatest.user_id == report.user_id,
+                UserBiomarkerLatest.biomarker_key.in_(list(candidates)),
+            )
+        )
+    }
+
+    new_rows = []
+    for key, points in candidates.items():
+        current = existing.get(key)
+        if current is not None:
+            points = points + _points_from_row(current)
+        points.sort(
+            key=lambda p: _recency(p["result_id"], p["report_date"], p["report_created_at"]), reverse=True
+        )
+        latest_row = _latest_row(report.user_id, key, points[0], points[1] if len(points) > 1 else None)
+        if current is None:
+            new_rows.append(latest_row)
+        else:
+            for name, value in latest_row.items():
+                setattr(current, name, value)
+    if new_rows:
+        db.execute(insert(UserBiomarkerLatest), new_rows)
+    db.flush()
+
+
+def rebuild_user_latest(db: Session, user_id: str) -> None:
+    """Recompute a user's latest-biomarker rows from test_results (after deletes or reclassification).
+
+    Holds the same user row lock as record_new_results, so an ingest committing mid-rebuild
+    cannot have its latest rows wiped by the delete below.
+    """
+    lock_user(db, user_id)
+    db.execute(delete(UserBiomarkerLatest).where(UserBiomarkerLatest.user_id == user_id))
+
+    ranked = ranked_results_subquery(user_id)
+    results = db.execute(
+        select(TestResultRecord, ranked.c.report_date, ranked.c.report_created_at, ranked.c.rn)
+        .join(ranked, ranked.c.result_id == TestResultRecord.id)
+        .where(ranked.c.rn <= 2)
+        .order_by(ranked.c.rn)
+    ).all()
+
+    latest: dict[str, dict] = {}
+    previous: dict[str, dict] = {}
+    for result, report_date, report_created_at, rn in results:
+        point = {
+            "biomarker_id": result.biomarker_id,
+            "test_name": result.test_name,
+            "result_id": result.id,
+            "doc_id": result.doc_id,
+            "report_date": report_date,
+            "report_created_at": report_created_at,
+            **{name: getattr(result, name) for name in _LATEST_FIELDS},
+        }
+        key = biomarker_key(result.biomarker_id, result.test_name)
+        (latest if rn == 1 else previous)[key] = point
+
+    rows = [_latest_row(user_id, key, point, previous.get(key)) for key, point in latest.items()]
+    if rows:
+        db.execute(insert(UserBiomarkerLatest), rows)
+    db.flush()
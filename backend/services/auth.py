@@ -1,14 +1,33 @@
+import asyncio
 import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from typing import NamedTuple
 
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session, make_transient_to_detached
 
 from backend.config import settings
-from backend.models.user import User, UserSession
+from backend.models.user import RevokedToken, User, UserSession
+from backend.services.lru import LRUCache
 
 # pbkdf2_sha256 avoids native bcrypt backend incompatibilities across environments.
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+# Pinning min/max to the configured rounds makes any hash at another cost "need update",
+# so changing PASSWORD_HASH_ROUNDS rehashes users transparently on their next login.
+pwd_context = CryptContext(
+    schemes=["pbkdf2_sha256"],
+    deprecated="auto",
+    pbkdf2_sha256__default_rounds=settings.password_hash_rounds,
+    pbkdf2_sha256__min_rounds=settings.password_hash_rounds,
+    pbkdf2_sha256__max_rounds=settings.password_hash_rounds,
+)
+
+# Hashing is CPU-bound (hashlib releases the GIL); keep it off the threadpool shared by sync endpoints.
+_hash_executor: ThreadPoolExecutor | None = None
+_hash_executor_lock = threading.Lock()
 
 
 def hash_password(password: str) -> str:
@@ -19,6 +38,39 @@ def verify_password(password: str, password_hash: str) -> bool:
     return pwd_context.verify(password, password_hash)
 
 
+def verify_and_update_password(password: str, password_hash: str) -> tuple[bool, str | None]:
+    """Verify, returning a replacement hash when the stored one uses outdated settings."""
+    return pwd_context.verify_and_update(password, password_hash)
+
+
+def _get_hash_executor() -> ThreadPoolExecutor:
+    global _hash_executor
+    with _hash_executor_lock:
+        if _hash_executor is None:
+            _hash_executor = ThreadPoolExecutor(
+                max_workers=settings.password_hash_workers, thread_name_prefix="password-hash"
+            )
+        return _hash_executor
+
+
+def shutdown_hash_executor() -> None:
+    global _hash_executor
+    with _hash_executor_lock:
+        executor, _hash_executor = _hash_executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+
+async def hash_password_async(password: str) -> str:
+    return await asyncio.get_running_loop().run_in_executor(_get_hash_executor(), hash_password, password)
+
+
+async def verify_and_update_password_async(password: str, password_hash: str) -> tuple[bool, str | None]:
+    return await asyncio.get_running_loop().run_in_executor(
+        _get_hash_executor(), verify_and_update_password, password, password_hash
+    )
+
+
 def create_session(db: Session, user_id: str) -> UserSession:
     token = secrets.token_urlsafe(32)
     now = datetime.utcnow()
@@ -34,12 +86,195 @@ def create_session(db: Session, user_id: str) -> UserSession:
     return session
 
 
-def get_user_from_token(db: Session, token: str) -> User | None:
-    session = db.query(UserSession).filter(UserSession.id == token).first()
-    if not session:
+class _CachedSession(NamedTuple):
+    user_id: str
+    email: str
+    full_name: str | None
+    created_at: datetime
+    expires_at: datetime
+
+
+# token -> user snapshot. Entries never outlive the session, and the short TTL bounds how long
+# a logout on another worker can go unnoticed here.
+_session_cache = LRUCache(maxsize=settings.auth_token_cache_size, ttl_seconds=settings.auth_token_cache_ttl_seconds)
+
+
+def _attach_user(db: Session, cached: _CachedSession) -> User:
+    # Rebuild the user without a query. Columns left out of the snapshot (password hash,
+    # data version) stay unloaded and are fetched only if something reads them.
+    user = User(id=cached.user_id, email=cached.email, full_name=cached.full_name, created_at=cached.created_at)
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
+
+
+def evict_session(token: str) -> None:
+    _session_cache.delete(token)
+
+
+def clear_session_cache() -> None:
+    _session_cache.clear()
+    _generation_cache.clear()
+    _revocation_cache.clear()
+
+
+def _user_from_session_row(db: Session, token: str) -> User | None:
+    now = datetime.utcnow()
+    cached = _session_cache.get(token)
+    if cached is not None and cached.expires_at > now:
+        return _attach_user(db, cached)
+
+    row = (
+        db.query(User, UserSession.expires_at)
+        .join(UserSession, UserSession.user_id == User.id)
+        .filter(UserSession.id == token)
+        .first()
+    )
+    if not row:
+        evict_session(token)
         return None
-    if session.expires_at < datetime.utcnow():
-        db.delete(session)
-        db.commit()
+    user, expires_at = row
+    if expires_at < now:
+        # Read-only rejection; the session sweeper deletes expired rows.
+        evict_session(token)
         return None
-    return db.query(User).filter(User.id == session.user_id).first()
+
+    ttl = min(settings.auth_token_cache_ttl_seconds, (expires_at - now).total_seconds())
+    _session_cache.set(token, _CachedSession(user.id, user.email, user.full_name, user.created_at, expires_at), ttl)
+    return user
+
+
+# --- Signed tokens (AUTH_TOKEN_MODE=signed) -----------------------------------------------
+# Tokens carry the user id, the user's session generation and a token id, so verifying one
+# needs no sessions table. Logout records the token id in revoked_tokens; logging out
+# everywhere bumps users.session_generation. Replicas cache both lookups, so either change
+# reaches every replica once its cached answer expires.
+
+# jti -> revoked?  A revoked answer is kept for the token's lifetime; "not revoked" only for the
+# cache TTL. An evicted entry is looked up again, so eviction never turns a revoked token valid.
+_revocation_cache = LRUCache(maxsize=settings.auth_token_cache_size, ttl_seconds=settings.auth_token_cache_ttl_seconds)
+_generation_cache = LRUCache(maxsize=settings.auth_token_cache_size, ttl_seconds=settings.auth_token_cache_ttl_seconds)
+
+
+def _serializer() -> URLSafeTimedSerializer:
+    if not settings.auth_secret_key:
+        raise RuntimeError("AUTH_TOKEN_MODE=signed requires AUTH_SECRET_KEY")
+    return URLSafeTimedSerializer(settings.auth_secret_key, salt="session-token")
+
+
+def _session_generation(db: Session, user_id: str) -> int | None:
+    generation = _generation_cache.get(user_id)
+    if generation is None:
+        generation = db.execute(select(User.session_generation).where(User.id == user_id)).scalar_one_or_none()
+        if generation is not None:
+            _generation_cache.set(user_id, generation)
+    return generation
+
+
+def _is_revoked(db: Session, jti: str) -> bool:
+    revoked = _revocation_cache.get(jti)
+    if revoked is None:
+        revoked = db.execute(select(RevokedToken.jti).where(RevokedToken.jti == jti)).first() is not None
+        _revocation_cache.set(jti, revoked, ttl_seconds=settings.session_ttl_hours * 3600 if revoked else None)
+    return revoked
+
+
+def _load_signed_token(token: str) -> tuple[dict, datetime] | None:
+    """Return the payload and issue time of a valid, unexpired token."""
+    try:
+        payload, issued_at = _serializer().loads(
+            token, max_age=settings.session_ttl_hours * 3600, return_timestamp=True
+        )
+    except (BadSignature, SignatureExpired):
+        return None
+    return payload, issued_at.replace(tzinfo=None)
+
+
+def _user_from_signed_token(db: Session, token: str) -> User | None:
+    loaded = _load_signed_token(token)
+    if loaded is None:
+        return None
+    payload, _ = loaded
+    if _is_revoked(db, payload["jti"]):
+        return None
+    if _session_generation(db, payload["uid"]) != payload["gen"]:
+        return None
+    # Only the id is known; any other column is loaded if an endpoint reads it.
+    user = User(id=payload["uid"])
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
+
+
+def issue_token(db: Session, user_id: str) -> str:
+    if settings.auth_token_mode == "signed":
+        generation = db.execute(select(User.session_generation).where(User.id == user_id)).scalar_one()
+        return _serializer().dumps({"uid": user_id, "gen": generation, "jti": secrets.token_urlsafe(12)})
+    return create_session(db, user_id).id
+
+
+def get_user_from_token(db: Session, token: str) -> User | None:
+    if settings.auth_token_mode == "signed":
+        return _user_from_signed_token(db, token)
+    return _user_from_session_row(db, token)
+
+
+def revoke_session(db: Session, token: str) -> None:
+    if settings.auth_token_mode == "signed":
+        loaded = _load_signed_token(token)
+        if loaded is not None:
+            payload, issued_at = loaded
+            db.merge(RevokedToken(jti=payload["jti"], expires_at=issued_at + timedelta(hours=settings.session_ttl_hours)))
+            db.commit()
+            _revocation_cache.set(payload["jti"], True, ttl_seconds=settings.session_ttl_hours * 3600)
+        return
+    evict_session(token)
+    db.query(UserSession).filter(UserSession.id == token).delete(synchronize_session=False)
+    db.commit()
+
+
+def revoke_all_sessions(db: Session, user_id: str) -> None:
+    """Invalidate every token the user holds, in either mode."""
+    db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(session_generation=User.session_generation + 1)
+        .execution_options(synchronize_session=False)
+    )
+    tokens = db.execute(select(UserSession.id).where(UserSession.user_id == user_id)).scalars().all()
+    db.query(UserSession).filter(UserSession.user_id == user_id).delete(synchronize_session=False)
+    db.commit()
+    _generation_cache.delete(user_id)
+    for token in tokens:
+        evict_session(token)
+
+
+def purge_expired_revocations(db: Session, now: datetime | None = None) -> int:
+    """Drop revocations of tokens that have expired on their own."""
+    purged = db.execute(delete(RevokedToken).where(RevokedToken.expires_at < (now or datetime.utcnow()))).rowcount
+    db.commit()
+    return purged
+
+
+def purge_expired_sessions(db: Session, batch_size: int, now: datetime | None = None) -> int:
+    """Delete expired session rows in batches walked along ix_user_sessions_expires_at."""
+    now = now or datetime.utcnow()
+    purged = 0
+    while True:
+        ids = (
+            db.execute(
+                select(UserSession.id)
+                .where(UserSession.expires_at < now)
+                .order_by(UserSession.expires_at)
+                .limit(batch_size)
+            )
+            .scalars()
+            .all()
+        )
+        if not ids:
+            return purged
+        db.execute(delete(UserSession).where(UserSession.id.in_(ids)))
+        db.commit()
+        for token in ids:
+            evict_session(token)
+        purged += len(ids)
+        if len(ids) < batch_size:
+            return purged
@@ -1,12 +1,21 @@
 import json
 import re
-from typing import Iterable
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Iterable, NamedTuple
 
-from rapidfuzz import fuzz
+import numpy as np
+from rapidfuzz import fuzz, process
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from backend.config import settings
-from backend.models.biomarker import BiomarkerReference
+from backend.models.biomarker import BiomarkerCatalogState, BiomarkerReference, ClassificationCacheEntry
+from backend.services.lru import LRUCache
+from backend.services.response_cache import invalidate_all_responses
 
 
 def _normalize(text: str) -> str:
@@ -25,6 +34,116 @@ def _load_aliases(raw_aliases: str | None) -> list[str]:
     return []
 
 
+@dataclass
+class _AliasIndex:
+    # Flat, parallel sequences: choices[i] is a normalized alias of biomarker_ids[i].
+    choices: list[str] = field(default_factory=list)
+    biomarker_ids: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    exact: dict[str, int] = field(default_factory=dict)
+    # Serialized once per build so LLM prompts don't re-encode the catalog per call.
+    catalog_json: str = "[]"
+    catalog_ids: frozenset[int] = frozenset()
+    # biomarker_catalog_state.version it was built at; cached decisions from other versions are stale.
+    version: str = ""
+
+
+class _Decision(NamedTuple):
+    biomarker_id: int | None
+    score: float
+    source: str  # exact | fuzzy | llm | none
+    catalog_version: str
+    expires_at: datetime | None = None
+
+
+_alias_index: _AliasIndex | None = None
+_alias_index_lock = threading.Lock()
+# Bumped by every invalidation so a build that read the catalog before it is not kept.
+_alias_index_generation = 0
+_decision_cache = LRUCache(maxsize=settings.classifier_cache_size)
+
+
+def _catalog_version(db: Session) -> str:
+    return str(db.scalar(select(BiomarkerCatalogState.version).where(BiomarkerCatalogState.id == 1)) or 0)
+
+
+def bump_catalog_version(db: Session) -> None:
+    """Mark the catalog changed for every process; call in the transaction that changes it."""
+    db.execute(
+        update(BiomarkerCatalogState)
+        .where(BiomarkerCatalogState.id == 1)
+        .values(version=BiomarkerCatalogState.version + 1, modified_at=datetime.utcnow())
+    )
+
+
+def _build_alias_index(db: Session) -> _AliasIndex:
+    index = _AliasIndex(version=_catalog_version(db))
+    ids: list[int] = []
+    biomarkers = db.query(BiomarkerReference).order_by(BiomarkerReference.id).all()
+    for biomarker in biomarkers:
+        aliases = [biomarker.standard_name]
+        aliases.extend(_load_aliases(biomarker.common_aliases))
+        for alias in aliases:
+            alias_norm = _normalize(alias)
+            if not alias_norm:
+                continue
+            index.choices.append(alias_norm)
+            ids.append(biomarker.id)
+            # First biomarker to claim an alias wins, matching the old scan order.
+            index.exact.setdefault(alias_norm, biomarker.id)
+    index.biomarker_ids = np.asarray(ids, dtype=np.int64)
+    index.catalog_json = json.dumps(
+        [{"id": b.id, "standard_name": b.standard_name, "category": b.category} for b in biomarkers]
+    )
+    index.catalog_ids = frozenset(b.id for b in biomarkers)
+    return index
+
+
+def _get_alias_index(db: Session) -> _AliasIndex:
+    global _alias_index
+    # Another process may have changed the catalog; its version is the one thing every process shares.
+    version = _catalog_version(db)
+    index = _alias_index
+    if index is not None and index.version == version:
+        return index
+    with _alias_index_lock:
+        generation = _alias_index_generation
+    index = _build_alias_index(db)
+    with _alias_index_lock:
+        if generation == _alias_index_generation:
+            _alias_index = index
+    return index
+
+
+def invalidate_alias_index() -> None:
+    global _alias_index, _alias_index_generation
+    with _alias_index_lock:
+        _alias_index = None
+        _alias_index_generation += 1
+    # Catalog and alias changes can rename or re-categorize biomarkers in cached analytics.
+    invalidate_all_responses()
+
+
+_ALIASES_CHANGED = "classifier_aliases_changed"
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    # Invalidating before the commit would let a concurrent rebuild cache the old catalog.
+    if session.info.pop(_ALIASES_CHANGED, False):
+        invalidate_alias_index()
+
+
+@event.listens_for(Session, "after_rollback")
+def _invalidate_after_rollback(session: Session) -> None:
+    # An index built inside the rolled-back transaction may hold its uncommitted aliases.
+    if session.info.pop(_ALIASES_CHANGED, False):
+        invalidate_alias_index()
+
+
+def clear_decision_cache() -> None:
+    _decision_cache.clear()
+
+
 def _save_alias_if_new(db: Session, biomarker: BiomarkerReference, alias: str) -> None:
     aliases = _load_aliases(biomarker.common_aliases)
     alias_norm = _normalize(alias)
@@ -35,27 +154,137 @@ def _save_alias_if_new(db: Session, biomarker: BiomarkerReference, alias: str) -
     aliases.append(alias)
     biomarker.common_aliases = json.dumps(aliases)
     db.add(biomarker)
+    bump_catalog_version(db)
+    db.info[_ALIASES_CHANGED] = True
 
 
-def _fuzzy_match_biomarker(db: Session, test_name: str, threshold: int) -> tuple[int | None, int]:
+def _fuzzy_match_biomarker(db: Session, test_name: str, threshold: int) -> _Decision:
     name_norm = _normalize(test_name)
-    best_score = -1
-    best_id = None
-
-    biomarkers = db.query(BiomarkerReference).all()
-    for biomarker in biomarkers:
-        aliases = [biomarker.standard_name]
-        aliases.extend(_load_aliases(biomarker.common_aliases))
+    index = _get_alias_index(db)
 
-        for alias in aliases:
-            score = fuzz.ratio(name_norm, _normalize(alias))
-            if score > best_score:
-                best_score = score
-                best_id = biomarker.id
+    exact_id = index.exact.get(name_norm)
+    if exact_id is not None:
+        return _Decision(exact_id, 100.0, "exact", index.version)
+    if not index.choices:
+        return _Decision(None, -1.0, "none", index.version)
 
+    _, best_score, position = process.extractOne(name_norm, index.choices, scorer=fuzz.ratio, processor=None)
     if best_score >= threshold:
-        return best_id, best_score
-    return None, best_score
+        return _Decision(int(index.biomarker_ids[position]), float(best_score), "fuzzy", index.version)
+    return _Decision(None, float(best_score), "none", index.version)
+
+
+def _fuzzy_match_many(db: Session, names_norm: list[str], threshold: int) -> dict[str, _Decision]:
+    index = _get_alias_index(db)
+    decisions: dict[str, _Decision] = {}
+    pending: list[str] = []
+    for name_norm in names_norm:
+        exact_id = index.exact.get(name_norm)
+        if exact_id is not None:
+            decisions[name_norm] = _Decision(exact_id, 100.0, "exact", index.version)
+        else:
+            pending.append(name_norm)
+
+    if pending and index.choices:
+        scores = process.cdist(
+            pending,
+            index.choices,
+            scorer=fuzz.ratio,
+            processor=None,
+            dtype=np.float32,
+            workers=settings.classifier_fuzzy_workers,
+        )
+        # argmax keeps the first best alias on ties, like the single-name path.
+        best_positions = scores.argmax(axis=1)
+        best_scores = scores[np.arange(len(pending)), best_positions]
+        for name_norm, position, score in zip(pending, best_positions, best_scores):
+            if score >= threshold:
+                decisions[name_norm] = _Decision(int(index.biomarker_ids[position]), float(score), "fuzzy", index.version)
+            else:
+                decisions[name_norm] = _Decision(None, float(score), "none", index.version)
+    else:
+        decisions.update({name_norm: _Decision(None, -1.0, "none", index.version) for name_norm in pending})
+    return decisions
+
+
+def _is_usable(decision: _Decision, index: _AliasIndex, threshold: int, now: datetime) -> bool:
+    if decision.catalog_version != index.version:
+        return False
+    if decision.expires_at is not None and decision.expires_at <= now:
+        return False
+    if decision.biomarker_id is None:
+        return decision.score < threshold
+    return decision.source != "fuzzy" or decision.score >= threshold
+
+
+def _load_cached_decisions(db: Session, keys: list[str], index: _AliasIndex, threshold: int) -> dict[str, _Decision]:
+    found: dict[str, _Decision] = {}
+    missing: list[str] = []
+    for key in keys:
+        decision = _decision_cache.get(key)
+        if decision is None:
+            missing.append(key)
+        else:
+            found[key] = decision
+
+    if missing:
+        rows = db.query(ClassificationCacheEntry).filter(ClassificationCacheEntry.name_key.in_(missing)).all()
+        for row in rows:
+            decision = _Decision(row.biomarker_id, row.score, row.source, row.catalog_version, row.expires_at)
+            _decision_cache.set(row.name_key, decision)
+            found[row.name_key] = decision
+
+    now = datetime.utcnow()
+    return {key: decision for key, decision in found.items() if _is_usable(decision, index, threshold, now)}
+
+
+def _upsert_cache_rows(db: Session, rows: list[dict]) -> None:
+    """Insert or overwrite cache rows; concurrent ingests may be writing the same names."""
+    table = ClassificationCacheEntry.__table__
+    updated = [name for name in rows[0] if name != "name_key"]
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        stmt = mysql.insert(table)
+        db.execute(stmt.on_duplicate_key_update({name: stmt.inserted[name] for name in updated}), rows)
+    elif dialect == "sqlite":
+        stmt = sqlite.insert(table)
+        db.execute(
+            stmt.on_conflict_do_update(index_elements=["name_key"], set_={name: stmt.excluded[name] for name in updated}),
+            rows,
+        )
+    else:
+        for row in rows:
+            try:
+                with db.begin_nested():
+                    db.execute(insert(table), row)
+            except IntegrityError:
+                pass  # another writer got there first; its decision is as good as ours
+
+
+def _store_decisions(db: Session, decisions: dict[str, _Decision]) -> None:
+    if not decisions:
+        return
+    now = datetime.utcnow()
+    negative_expiry = now + timedelta(hours=settings.classifier_negative_ttl_hours)
+    rows = []
+    # Sorted keys keep concurrent upserts locking rows in the same order.
+    for key in sorted(decisions):
+        decision = decisions[key]
+        if decision.biomarker_id is None:
+            decision = decision._replace(expires_at=negative_expiry)
+        rows.append(
+            {
+                "name_key": key,
+                "biomarker_id": decision.biomarker_id,
+                "score": decision.score,
+                "source": decision.source,
+                "catalog_version": decision.catalog_version,
+                "created_at": now,
+                "expires_at": decision.expires_at,
+            }
+        )
+        _decision_cache.set(key, decision)
+    _upsert_cache_rows(db, rows)
 
 
 def _extract_json_obj(raw_text: str) -> dict | None:
@@ -69,58 +298,120 @@ def _extract_json_obj(raw_text: str) -> dict | None:
     return payload if isinstance(payload, dict) else None
 
 
-def _llm_match_biomarker(db: Session, test_name: str) -> int | None:
+_LLM_CONFIDENCE_THRESHOLD = 0.8
+
+_llm_client = None
+_llm_client_lock = threading.Lock()
+
+
+def _get_llm_client():
+    global _llm_client
     if not settings.classifier_enable_llm_fallback or not settings.openai_api_key:
         return None
-    try:
-        from llama_index.llms.openai import OpenAI
-    except ImportError:
-        return None
+    with _llm_client_lock:
+        if _llm_client is None:
+            try:
+                from llama_index.llms.openai import OpenAI
+            except ImportError:
+                return None
+            _llm_client = OpenAI(
+                model="gpt-4o-mini",
+                api_key=settings.openai_api_key,
+                temperature=0.0,
+                additional_kwargs={"response_format": {"type": "json_object"}},
+            )
+        return _llm_client
+
 
-    biomarkers = db.query(BiomarkerReference).all()
-    catalog = [{"id": b.id, "standard_name": b.standard_name, "category": b.category} for b in biomarkers]
-    llm = OpenAI(model="gpt-4o-mini", api_key=settings.openai_api_key, temperature=0.0)
+def _llm_classify_batch(llm, catalog_json: str, test_names: list[str]) -> dict[str, tuple[int | None, float]]:
     prompt = f"""
 You map raw lab test names to a canonical biomarker list.
 Return STRICT JSON only with schema:
-{{"match_id": <int|null>, "confidence": <0.0-1.0>, "reason": "<short reason>"}}
+{{"matches": [{{"test_name": "<raw name>", "match_id": <int|null>, "confidence": <0.0-1.0>}}]}}
 
 Rules:
+- Return exactly one entry per raw test name, copying the name verbatim.
 - If uncertain, return match_id = null.
 - confidence should be high only for clear synonyms.
 
-Raw test name: {test_name}
-Biomarker catalog: {json.dumps(catalog)}
+Raw test names: {json.dumps(test_names)}
+Biomarker catalog: {catalog_json}
 """
     response = llm.complete(prompt)
     payload = _extract_json_obj(getattr(response, "text", str(response)))
-    if not payload:
-        return None
-    match_id = payload.get("match_id")
-    confidence = payload.get("confidence")
-    if not isinstance(match_id, int):
-        return None
-    if not isinstance(confidence, (float, int)) or float(confidence) < 0.8:
-        return None
+    entries = payload.get("matches") if payload else None
+    if not isinstance(entries, list):
+        return {}
 
-    biomarker = db.query(BiomarkerReference).filter(BiomarkerReference.id == match_id).first()
-    if not biomarker:
-        return None
-    _save_alias_if_new(db, biomarker, test_name)
-    return match_id
+    decisions: dict[str, tuple[int | None, float]] = {}
+    for entry in entries:
+        if not isinstance(entry, dict) or not isinstance(entry.get("test_name"), str):
+            continue
+        match_id = entry.get("match_id")
+        confidence = entry.get("confidence")
+        decisions[entry["test_name"]] = (
+            match_id if isinstance(match_id, int) else None,
+            float(confidence) if isinstance(confidence, (float, int)) else 0.0,
+        )
+    return decisions
+
+
+def _llm_match_many(db: Session, test_names: list[str]) -> dict[str, int | None]:
+    matches: dict[str, int | None] = {name: None for name in test_names}
+    if not test_names:
+        return matches
+    llm = _get_llm_client()
+    if llm is None:
+        return matches
+
+    index = _get_alias_index(db)
+    decisions = _llm_classify_batch(llm, index.catalog_json, list(matches))
+    for test_name, (match_id, confidence) in decisions.items():
+        if test_name not in matches or match_id not in index.catalog_ids:
+            continue
+        if confidence < _LLM_CONFIDENCE_THRESHOLD:
+            continue
+        biomarker = db.get(BiomarkerReference, match_id)
+        if not biomarker:
+            continue
+        _save_alias_if_new(db, biomarker, test_name)
+        matches[test_name] = match_id
+    return matches
 
 
 def classify_test_name(db: Session, test_name: str, threshold: int | None = None) -> int | None:
     score_threshold = threshold if threshold is not None else settings.classifier_fuzzy_threshold
-    match_id, _ = _fuzzy_match_biomarker(db, test_name, score_threshold)
-    if match_id is not None:
-        return match_id
+    key = _normalize(test_name)
+    index = _get_alias_index(db)
+    cached = _load_cached_decisions(db, [key], index, score_threshold)
+    if key in cached:
+        return cached[key].biomarker_id
+
+    decision = _fuzzy_match_biomarker(db, test_name, score_threshold)
+    if decision.biomarker_id is None:
+        llm_match = _llm_match_many(db, [test_name])[test_name]
+        if llm_match is not None:
+            decision = _Decision(llm_match, decision.score, "llm", index.version)
+    _store_decisions(db, {key: decision})
+    return decision.biomarker_id
 
-    llm_match = _llm_match_biomarker(db, test_name)
-    if llm_match is not None:
-        return llm_match
-    return None
 
+def classify_many(db: Session, test_names: Iterable[str], threshold: int | None = None) -> dict[str, int | None]:
+    score_threshold = threshold if threshold is not None else settings.classifier_fuzzy_threshold
+    norm_by_name = {name: _normalize(name) for name in test_names}
+    keys = list(dict.fromkeys(norm_by_name.values()))
+    index = _get_alias_index(db)
+    decisions = _load_cached_decisions(db, keys, index, score_threshold)
 
-def classify_many(db: Session, test_names: Iterable[str]) -> dict[str, int | None]:
-    return {name: classify_test_name(db, name) for name in test_names}
+    uncached = [key for key in keys if key not in decisions]
+    if uncached:
+        fresh = _fuzzy_match_many(db, uncached, score_threshold)
+        leftovers = [name for name, key in norm_by_name.items() if key in fresh and fresh[key].biomarker_id is None]
+        if leftovers:
+            for name, match_id in _llm_match_many(db, leftovers).items():
+                key = norm_by_name[name]
+                if match_id is not None and fresh[key].biomarker_id is None:
+                    fresh[key] = _Decision(match_id, fresh[key].score, "llm", index.version)
+        _store_decisions(db, fresh)
+        decisions.update(fresh)
+    return {name: decisions[key].biomarker_id for name, key in norm_by_name.items()}
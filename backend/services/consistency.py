@@ -0,0 +1,78 @@
+"""Check that the report columns copied onto test_results still match their report.
+
+    python -m backend.services.consistency [--repair]
+"""
+
+import argparse
+
+from sqlalchemy import ColumnElement, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from backend.database import SessionLocal
+from backend.models.lab_report import LabReportRecord, TestResultRecord
+from backend.services.analytics import bump_data_version
+
+
+def _drifted() -> ColumnElement[bool]:
+    return or_(
+        TestResultRecord.user_id != LabReportRecord.user_id,
+        TestResultRecord.report_date.is_distinct_from(LabReportRecord.report_date),
+    )
+
+
+def count_result_drift(db: Session) -> int:
+    return db.scalar(
+        select(func.count())
+        .select_from(TestResultRecord)
+        .join(LabReportRecord, LabReportRecord.doc_id == TestResultRecord.doc_id)
+        .where(_drifted())
+    )
+
+
+def repair_result_drift(db: Session) -> int:
+    """Copy user_id and report_date from each drifted result's report; returns the rows fixed."""
+    affected = db.execute(
+        select(TestResultRecord.user_id, LabReportRecord.user_id)
+        .join(LabReportRecord, LabReportRecord.doc_id == TestResultRecord.doc_id)
+        .where(_drifted())
+        .distinct()
+    ).all()
+    if not affected:
+        return 0
+
+    report = select(LabReportRecord.doc_id).where(LabReportRecord.doc_id == TestResultRecord.doc_id)
+    fixed = db.execute(
+        update(TestResultRecord)
+        .where(report.where(_drifted()).exists())
+        .values(
+            user_id=report.with_only_columns(LabReportRecord.user_id).scalar_subquery(),
+            report_date=report.with_only_columns(LabReportRecord.report_date).scalar_subquery(),
+        )
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    # History responses for both the old and the new owner may have been cached from drifted rows.
+    for user_id in {user_id for pair in affected for user_id in pair}:
+        bump_data_version(db, user_id)
+    return fixed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repair", action="store_true", help="fix drifted rows instead of only counting them")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        drift = count_result_drift(db)
+        print(f"test_results rows out of step with their report: {drift}")
+        if drift and args.repair:
+            print(f"repaired: {repair_result_drift(db)}")
+            db.commit()
+            drift = 0
+    finally:
+        db.close()
+    raise SystemExit(1 if drift else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+from sqlalchemy import Select, case, func, select
+
+from backend.database import ReadSession
+from backend.models.biomarker import BiomarkerReference
+from backend.models.lab_report import TestResultRecord, UserBiomarkerLatest
+from backend.schemas.biomarker import BiomarkerSummaryItem
+from backend.services.trend_analyzer import compute_delta
+
+LatestRow = tuple[UserBiomarkerLatest, BiomarkerReference | None]
+
+
+def latest_rows_query(user_id: str) -> Select:
+    """Latest result per biomarker for a user, with its catalog entry when mapped."""
+    return (
+        select(UserBiomarkerLatest, BiomarkerReference)
+        .outerjoin(BiomarkerReference, UserBiomarkerLatest.biomarker_id == BiomarkerReference.id)
+        .where(UserBiomarkerLatest.user_id == user_id)
+    )
+
+
+def summary_items(rows: list[LatestRow]) -> list[BiomarkerSummaryItem]:
+    items = [
+        BiomarkerSummaryItem(
+            biomarker_id=t.biomarker_id,
+            biomarker_name=b.standard_name if b else t.test_name,
+            category=b.category if b else "Other",
+            latest_value=t.value,
+            latest_value_numeric=t.value_numeric,
+            latest_value_qualifier=t.value_qualifier,
+            unit=t.unit,
+            reference_range=t.reference_range,
+            flag=t.flag,
+            report_date=t.report_date.isoformat() if t.report_date else None,
+        )
+        for t, b in rows
+    ]
+    return sorted(items, key=lambda x: (x.category, x.biomarker_name))
+
+
+def category_counts_query(user_id: str) -> Select:
+    """Latest results per category for a user, with how many are flagged, aggregated in SQL."""
+    category = func.coalesce(BiomarkerReference.category, "Other")
+    flagged = func.sum(case((func.coalesce(UserBiomarkerLatest.flag, "") != "", 1), else_=0))
+    return (
+        select(category.label("category"), func.count().label("total"), flagged.label("flagged"))
+        .select_from(UserBiomarkerLatest)
+        .outerjoin(BiomarkerReference, UserBiomarkerLatest.biomarker_id == BiomarkerReference.id)
+        .where(UserBiomarkerLatest.user_id == user_id)
+        .group_by(category)
+        .order_by(category)
+    )
+
+
+def category_items(rows) -> list[dict]:
+    return [
+        {
+            "category": row.category,
+            "total": row.total,
+            "flagged": int(row.flagged or 0),
+            "normal": row.total - int(row.flagged or 0),
+        }
+        for row in rows
+    ]
+
+
+def trend_items(rows: list[LatestRow]) -> list[dict]:
+    output = []
+    for latest, biomarker in rows:
+        if latest.previous_result_id is None:
+            continue
+        prev = latest.previous_value_numeric
+        curr = latest.value_numeric
+        delta = compute_delta(prev, curr)
+        if delta is None:
+            continue
+        direction = "stable"
+        if delta > 5:
+            direction = "up"
+        elif delta < -5:
+            direction = "down"
+        output.append({
+            "biomarker_id": latest.biomarker_id,
+            "biomarker": biomarker.standard_name if biomarker else latest.test_name,
+            "category": biomarker.category if biomarker else "Other",
+            "previous": prev,
+            "current": curr,
+            "delta_percent": round(delta, 2),
+            "direction": direction,
+            "latest_flag": latest.flag,
+            "previous_report_date": latest.previous_report_date.isoformat() if latest.previous_report_date else None,
+            "latest_report_date": latest.report_date.isoformat() if latest.report_date else None,
+        })
+
+    output.sort(key=lambda x: abs(x["delta_percent"]), reverse=True)
+    return output
+
+
+def history_query(user_id: str, biomarker_id: int) -> Select:
+    """One biomarker's results for a user in timeline order, undated reports first."""
+    return (
+        select(TestResultRecord)
+        .where(TestResultRecord.user_id == user_id, TestResultRecord.biomarker_id == biomarker_id)
+        .order_by(TestResultRecord.report_date.is_(None).desc(), TestResultRecord.report_date.asc(), TestResultRecord.id.asc())
+    )
+
+
+def unmapped_counts_query(user_id: str) -> Select:
+    return (
+        select(TestResultRecord.test_name, func.count().label("count"))
+        .where(TestResultRecord.user_id == user_id, TestResultRecord.biomarker_id.is_(None))
+        .group_by(TestResultRecord.test_name)
+    )
+
+
+def unmapped_items(rows) -> list[dict]:
+    return [
+        {"test_name": test_name, "count": n}
+        for test_name, n in sorted(rows, key=lambda row: (-row[1], row[0]))
+    ]
+
+
+async def build_snapshot(db: ReadSession, user_id: str) -> dict:
+    """Everything the dashboard pages show, built with the same queries as the individual endpoints."""
+    rows = await db.all(latest_rows_query(user_id))
+    return {
+        "summary": [item.model_dump() for item in summary_items(rows)],
+        "categories": category_items(await db.all(category_counts_query(user_id))),
+        "trends": trend_items(rows),
+        "unmapped": unmapped_items(await db.all(unmapped_counts_query(user_id))),
+    }
@@ -0,0 +1,306 @@
+import json
+import logging
+from datetime import datetime
+from typing import Callable
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from backend.config import settings
+from backend.database import SessionLocal
+from backend.models.lab_report import IngestJob, LabReportRecord, ParseArtifact, TestResultRecord
+from backend.schemas.lab_report import LabReport
+from backend.services.analytics import bump_data_version, record_new_results
+from backend.services.classifier import classify_many
+from backend.services.parser import EXTRACTOR_VERSION, extract_lab_data, parse_pdf_file
+from backend.services.trend_analyzer import parse_value
+from backend.services.uploads import discard_spooled, sha256_file
+
+logger = logging.getLogger(__name__)
+
+# Progress reported to clients when each pipeline stage starts.
+STAGE_PROGRESS = {
+    "queued": 0,
+    "parsing": 10,
+    "extracting": 40,
+    "classifying": 70,
+    "persisting": 90,
+    "completed": 100,
+}
+
+
+def _safe_date(value: str | None):
+    if not value:
+        return None
+    for fmt in ("%Y-%m-%d", "%m/%d/%Y", "%m/%d/%y"):
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _existing_report_result(db: Session, report: LabReportRecord) -> dict:
+    rows = (
+        db.query(TestResultRecord.id, TestResultRecord.test_name, TestResultRecord.biomarker_id)
+        .filter(TestResultRecord.doc_id == report.doc_id)
+        .order_by(TestResultRecord.id)
+        .all()
+    )
+    unmapped_tests = [row.test_name for row in rows if row.biomarker_id is None]
+    return {
+        "doc_id": report.doc_id,
+        "tests": len(rows),
+        "mapped_tests": len(rows) - len(unmapped_tests),
+        "unmapped_tests_count": len(unmapped_tests),
+        "unmapped_tests_preview": unmapped_tests[:10],
+        "test_result_ids": [row.id for row in rows],
+        "duplicate": True,
+    }
+
+
+def _load_or_parse(
+    db: Session,
+    file_sha256: str,
+    file_path: str,
+    file_name: str,
+    notify: Callable[[str], None],
+) -> tuple[str, LabReport]:
+    artifact = db.get(ParseArtifact, file_sha256)
+    if artifact is not None and artifact.extractor_version == EXTRACTOR_VERSION:
+        return artifact.raw_parsed_text, LabReport.model_validate_json(artifact.report_json)
+
+    notify("parsing")
+    parsed_text = parse_pdf_file(file_path=file_path, file_name=file_name)
+    notify("extracting")
+    parsed_report = extract_lab_data(parsed_text)
+
+    # An extraction with no tests is more likely a transient OCR/LLM failure than an empty
+    # report; keep it out of the cache so the next upload of the file tries again.
+    if not parsed_report.test_results:
+        return parsed_text, parsed_report
+    db.merge(
+        ParseArtifact(
+            file_sha256=file_sha256,
+            extractor_version=EXTRACTOR_VERSION,
+            raw_parsed_text=parsed_text,
+            report_json=parsed_report.model_dump_json(),
+        )
+    )
+    try:
+        db.commit()
+    except IntegrityError:
+        # A concurrent upload of the same bytes stored the artifact first.
+        db.rollback()
+    return parsed_text, parsed_report
+
+
+def ingest_report(
+    db: Session,
+    user_id: str,
+    file_path: str,
+    file_name: str,
+    on_stage: Callable[[str], None] | None = None,
+    dedupe: bool | None = None,
+    file_sha256: str | None = None,
+) -> dict:
+    """Parse, extract, classify and persist one PDF, committing the new report."""
+    notify = on_stage or (lambda _stage: None)
+    file_sha256 = file_sha256 or sha256_file(file_path)
+
+    # With dedupe on, a re-upload links the user's existing report instead of creating another.
+    if settings.upload_dedupe if dedupe is None else dedupe:
+        existing = (
+            db.query(LabReportRecord)
+            .filter(LabReportRecord.user_id == user_id, LabReportRecord.file_sha256 == file_sha256)
+            .order_by(LabReportRecord.created_at.asc())
+            .first()
+        )
+        if existing is not None:
+            return _existing_report_result(db, existing)
+
+    parsed_text, parsed_report = _load_or_parse(db, file_sha256, file_path, file_name, notify)
+
+    notify("classifying")
+    biomarker_ids = classify_many(db, [item.test_name for item in parsed_report.test_results if item.test_name])
+
+    notify("persisting")
+    report = LabReportRecord(
+        user_id=user_id,
+        patient_name=parsed_report.patient_info.name or "Unknown",
+        patient_id=parsed_report.patient_info.patient_id,
+        date_of_birth=_safe_date(parsed_report.patient_info.date_of_birth),
+        gender=parsed_report.patient_info.gender,
+        lab_name=parsed_report.lab_name,
+        report_date=_safe_date(parsed_report.report_date),
+        collection_date=_safe_date(parsed_report.collection_date),
+        sample_type=parsed_report.sample_type,
+        physician_name=parsed_report.physician_name,
+        original_filename=file_name,
+        raw_parsed_text=parsed_text,
+        file_sha256=file_sha256,
+    )
+    db.add(report)
+    db.flush()
+
+    mapped_count = 0
+    unmapped_tests: list[str] = []
+    rows: list[dict] = []
+    for item in parsed_report.test_results:
+        if not item.test_name:
+            continue  # skip entries the LLM returned without a test name
+        biomarker_id = biomarker_ids[item.test_name]
+        if biomarker_id is not None:
+            mapped_count += 1
+        else:
+            unmapped_tests.append(item.test_name)
+        value_numeric, value_qualifier = parse_value(item.value)
+        rows.append(
+            {
+                "doc_id": report.doc_id,
+                "user_id": user_id,
+                "report_date": report.report_date,
+                "biomarker_id": biomarker_id,
+                "test_name": item.test_name,
+                "value": item.value,
+                "value_numeric": value_numeric,
+                "value_qualifier": value_qualifier,
+                "unit": item.unit,
+                "reference_range": item.reference_range,
+                "category": item.category,
+                "flag": item.flag,
+            }
+        )
+    test_result_ids = _insert_test_results(db, report.doc_id, rows)
+    record_new_results(db, report, rows, test_result_ids)
+    bump_data_version(db, user_id)
+
+    db.commit()
+    return {
+        "doc_id": report.doc_id,
+        "tests": len(parsed_report.test_results),
+        "mapped_tests": mapped_count,
+        "unmapped_tests_count": len(unmapped_tests),
+        "unmapped_tests_preview": unmapped_tests[:10],
+        "test_result_ids": test_result_ids,
+    }
+
+
+def _insert_test_results(db: Session, doc_id: str, rows: list[dict]) -> list[int]:
+    """Write all result rows with one executemany INSERT and return their ids in row order."""
+    if not rows:
+        return []
+    table = TestResultRecord.__table__
+    if db.get_bind().dialect.insert_executemany_returning_sort_by_parameter_order:
+        stmt = insert(table).returning(table.c.id, sort_by_parameter_order=True)
+        return list(db.execute(stmt, rows).scalars())
+
+    # No executemany RETURNING (e.g. MySQL): ids are read back in insertion order instead.
+    db.execute(insert(table), rows)
+    return list(db.execute(select(table.c.id).where(table.c.doc_id == doc_id).order_by(table.c.id)).scalars())
+
+
+def _update_job(job_id: str, **fields) -> None:
+    """Write job status in its own short transaction, never in the ingest transaction."""
+    db = SessionLocal()
+    try:
+        db.execute(update(IngestJob).where(IngestJob.id == job_id).values(updated_at=datetime.utcnow(), **fields))
+        db.commit()
+    finally:
+        db.close()
+
+
+_LIVE_STATUSES = ("queued", "running")
+
+
+def heartbeat_owned_jobs(db: Session, owner: str) -> int:
+    """Mark this process's queued and running jobs as still alive."""
+    touched = db.execute(
+        update(IngestJob)
+        .where(IngestJob.owner == owner, IngestJob.status.in_(_LIVE_STATUSES))
+        .values(heartbeat_at=datetime.utcnow())
+    ).rowcount
+    db.commit()
+    return touched
+
+
+def fail_orphaned_jobs(db: Session, stale_before: datetime) -> int:
+    """Fail live jobs whose owner stopped heartbeating before stale_before, and delete their spool files.
+
+    Jobs of processes that are still running keep a fresh heartbeat, so a restarting worker
+    only picks up the ones lost with a dead process.
+    """
+    orphans = db.execute(
+        select(IngestJob.id, IngestJob.spool_path).where(
+            IngestJob.status.in_(_LIVE_STATUSES), IngestJob.heartbeat_at < stale_before
+        )
+    ).all()
+    if not orphans:
+        return 0
+    failed = db.execute(
+        update(IngestJob)
+        .where(
+            IngestJob.id.in_([job_id for job_id, _ in orphans]),
+            IngestJob.status.in_(_LIVE_STATUSES),
+            IngestJob.heartbeat_at < stale_before,
+        )
+        .values(status="failed", error="Interrupted by a server restart; please upload again", updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    for _, spool_path in orphans:
+        if spool_path:
+            discard_spooled(spool_path)
+    return failed
+
+
+def run_ingest_job(
+    job_id: str,
+    file_path: str,
+    file_name: str,
+    file_sha256: str | None = None,
+    dedupe: bool | None = None,
+) -> None:
+    """Queue entry point: runs the ingest pipeline and records progress on the job row.
+
+    The pipeline commits once, at the end; job status goes through separate sessions so a
+    progress update never commits half an ingest.
+    """
+    db = SessionLocal()
+    try:
+        user_id = db.scalar(select(IngestJob.user_id).where(IngestJob.id == job_id))
+        db.rollback()
+        if user_id is None:
+            logger.warning("Ingest job %s vanished before it started", job_id)
+            return
+
+        def on_stage(stage: str) -> None:
+            # Progress is advisory: a write that cannot get through (e.g. SQLite's single writer
+            # lock, held by the ingest transaction) is skipped rather than failing the ingest.
+            try:
+                _update_job(job_id, status="running", stage=stage, progress=STAGE_PROGRESS[stage])
+            except SQLAlchemyError:
+                logger.warning("Could not record stage %s of ingest job %s", stage, job_id, exc_info=True)
+
+        try:
+            result = ingest_report(
+                db, user_id, file_path, file_name, on_stage=on_stage, dedupe=dedupe, file_sha256=file_sha256
+            )
+        except Exception as exc:
+            logger.exception("Ingest job %s failed", job_id)
+            db.rollback()
+            _update_job(job_id, status="failed", error=str(exc) or type(exc).__name__)
+            return
+
+        _update_job(
+            job_id,
+            status="completed",
+            stage="completed",
+            progress=STAGE_PROGRESS["completed"],
+            doc_id=result["doc_id"],
+            result=json.dumps(result),
+        )
+    finally:
+        db.close()
+        discard_spooled(file_path)
@@ -0,0 +1,73 @@
+import logging
+import threading
+from datetime import datetime, timedelta
+
+from backend.config import settings
+from backend.database import SessionLocal
+from backend.services.ingest import fail_orphaned_jobs, heartbeat_owned_jobs
+from backend.services.jobs import INSTANCE_ID
+
+logger = logging.getLogger(__name__)
+
+
+class JobHeartbeat:
+    """Daemon thread that keeps this process's ingest jobs alive and fails jobs whose owner died."""
+
+    def __init__(self, interval_seconds: float, stale_seconds: float, owner: str = INSTANCE_ID, session_factory=SessionLocal):
+        self.interval_seconds = interval_seconds
+        self.stale_seconds = stale_seconds
+        self.owner = owner
+        self.session_factory = session_factory
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def beat_once(self) -> int:
+        """Refresh owned jobs, then fail stale ones; returns how many were failed."""
+        db = self.session_factory()
+        try:
+            heartbeat_owned_jobs(db, self.owner)
+            return fail_orphaned_jobs(db, datetime.utcnow() - timedelta(seconds=self.stale_seconds))
+        finally:
+            db.close()
+
+    def _beat(self) -> None:
+        try:
+            failed = self.beat_once()
+            if failed:
+                logger.warning("Marked %d interrupted ingest job(s) as failed", failed)
+        except Exception:
+            logger.exception("Ingest job heartbeat failed")
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            self._beat()
+
+    def start(self) -> None:
+        if self._thread is None:
+            # Jobs orphaned while no process was running are failed right away, not one interval later.
+            self._beat()
+            self._thread = threading.Thread(target=self._run, name="ingest-job-heartbeat", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+_heartbeat: JobHeartbeat | None = None
+
+
+def start_job_heartbeat() -> None:
+    global _heartbeat
+    if _heartbeat is None and settings.ingest_job_heartbeat_seconds > 0:
+        _heartbeat = JobHeartbeat(settings.ingest_job_heartbeat_seconds, settings.ingest_job_stale_seconds)
+        _heartbeat.start()
+
+
+def stop_job_heartbeat() -> None:
+    global _heartbeat
+    if _heartbeat is not None:
+        _heartbeat.stop()
+        _heartbeat = None
@@ -0,0 +1,94 @@
+import logging
+import os
+import socket
+import threading
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Protocol
+
+from backend.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Identifies this API process as the owner of the jobs it queues (see IngestJob.owner).
+INSTANCE_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class JobQueue(Protocol):
+    def submit(self, fn: Callable[..., Any], *args: Any) -> None: ...
+
+    def shutdown(self) -> None: ...
+
+
+def _log_failure(future: Future) -> None:
+    exc = future.exception()
+    if exc is not None:
+        logger.error("Background job crashed: %s", exc, exc_info=exc)
+
+
+class InlineJobQueue:
+    """Runs jobs synchronously in the caller; meant for tests and debugging."""
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> None:
+        fn(*args)
+
+    def shutdown(self) -> None:
+        return None
+
+
+class ThreadJobQueue:
+    def __init__(self, max_workers: int):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingest")
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> None:
+        self._executor.submit(fn, *args).add_done_callback(_log_failure)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
+
+
+def _reset_engine_in_child() -> None:
+    # Pooled connections inherited over fork must not be shared with the parent.
+    from backend.database import engine
+
+    engine.dispose(close=False)
+
+
+class ProcessJobQueue:
+    def __init__(self, max_workers: int):
+        self._executor = ProcessPoolExecutor(max_workers=max_workers, initializer=_reset_engine_in_child)
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> None:
+        self._executor.submit(fn, *args).add_done_callback(_log_failure)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
+
+
+_BACKENDS: dict[str, Callable[[], JobQueue]] = {
+    "inline": InlineJobQueue,
+    "thread": lambda: ThreadJobQueue(settings.ingest_workers),
+    "process": lambda: ProcessJobQueue(settings.ingest_workers),
+}
+
+_queue: JobQueue | None = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            backend = settings.ingest_queue_backend
+            if backend not in _BACKENDS:
+                raise RuntimeError(f"Unknown INGEST_QUEUE_BACKEND {backend!r}; expected one of {sorted(_BACKENDS)}")
+            _queue = _BACKENDS[backend]()
+        return _queue
+
+
+def shutdown_job_queue() -> None:
+    global _queue
+    with _queue_lock:
+        queue, _queue = _queue, None
+    if queue is not None:
+        queue.shutdown()
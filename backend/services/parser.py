@@ -1,11 +1,47 @@
+import hashlib
+import json
 import os
-import tempfile
 
 from backend.config import settings
 from backend.schemas.lab_report import LabReport
 
+_PARSE_OPTIONS = {
+    "use_vendor_multimodal_model": True,
+    "vendor_multimodal_model_name": "openai-gpt4o",
+    "high_res_ocr": True,
+    "result_type": "text",
+}
+_EXTRACTION_MODEL = "gpt-4o-mini"
+_EXTRACTION_PROMPT = """
+You are an expert medical lab report parser. Extract all relevant information from the lab report text below.
+
+Instructions:
+- Extract patient demographics accurately
+- Identify all test names, values, units, and reference ranges
+- Group tests by their categories/panels if mentioned
+- Capture any flags (High, Low, Critical, Abnormal)
+- Extract lab name, dates, and sample type
+- Handle variations in report formats
+- If information is not present, set it as null
+- Be precise with numerical values and units
+
+Report text:
+{input_text}
+"""
+# Bump for pipeline changes the fingerprint below cannot see (e.g. post-processing code).
+_EXTRACTOR_REVISION = 1
+
+# Stored with every parse artifact; artifacts from any other parser setup, model, prompt or
+# output schema are re-parsed instead of reused.
+EXTRACTOR_VERSION = hashlib.sha256(
+    json.dumps(
+        [_EXTRACTOR_REVISION, _PARSE_OPTIONS, _EXTRACTION_MODEL, _EXTRACTION_PROMPT, LabReport.model_json_schema()],
+        sort_keys=True,
+    ).encode()
+).hexdigest()[:16]
+
 
-def parse_pdf_bytes(file_bytes: bytes, file_name: str, llama_api_key: str | None = None) -> str:
+def parse_pdf_file(file_path: str, file_name: str, llama_api_key: str | None = None) -> str:
     try:
         from llama_parse import LlamaParse
     except ImportError as exc:
@@ -15,18 +51,8 @@ def parse_pdf_bytes(file_bytes: bytes, file_name: str, llama_api_key: str | None
     if not api_key:
         raise RuntimeError("LLAMA_CLOUD_API_KEY is missing")
 
-    parser = LlamaParse(
-        api_key=api_key,
-        use_vendor_multimodal_model=True,
-        vendor_multimodal_model_name="openai-gpt4o",
-        high_res_ocr=True,
-        result_type="text",
-    )
-    suffix = os.path.splitext(file_name)[1] or ".pdf"
-    with tempfile.NamedTemporaryFile(suffix=suffix) as tmp:
-        tmp.write(file_bytes)
-        tmp.flush()
-        documents = parser.load_data(tmp.name, extra_info={"file_name": os.path.basename(file_name)})
+    parser = LlamaParse(api_key=api_key, **_PARSE_OPTIONS)
+    documents = parser.load_data(file_path, extra_info={"file_name": os.path.basename(file_name)})
     return "\n\n".join(doc.text for doc in documents)
 
 
@@ -41,25 +67,10 @@ def extract_lab_data(parsed_text: str, openai_api_key: str | None = None) -> Lab
     if not api_key:
         raise RuntimeError("OPENAI_API_KEY is missing")
 
-    llm = OpenAI(model="gpt-4o-mini", api_key=api_key)
+    llm = OpenAI(model=_EXTRACTION_MODEL, api_key=api_key)
     program = OpenAIPydanticProgram.from_defaults(
         output_cls=LabReport,
         llm=llm,
-        prompt_template_str="""
-You are an expert medical lab report parser. Extract all relevant information from the lab report text below.
-
-Instructions:
-- Extract patient demographics accurately
-- Identify all test names, values, units, and reference ranges
-- Group tests by their categories/panels if mentioned
-- Capture any flags (High, Low, Critical, Abnormal)
-- Extract lab name, dates, and sample type
-- Handle variations in report formats
-- If information is not present, set it as null
-- Be precise with numerical values and units
-
-Report text:
-{input_text}
-""",
+        prompt_template_str=_EXTRACTION_PROMPT,
     )
     return program(input_text=parsed_text)
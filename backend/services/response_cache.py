@@ -0,0 +1,181 @@
+import json
+import threading
+import uuid
+from typing import Any, Awaitable, Callable, Protocol
+
+from fastapi.encoders import jsonable_encoder
+from starlette.concurrency import run_in_threadpool
+
+from backend.config import settings
+from backend.services.lru import LRUCache
+
+
+class ResponseCache(Protocol):
+    # True when calls do network I/O; async callers then make them from the threadpool.
+    blocking: bool
+
+    def get(self, key: str) -> str | None: ...
+
+    def set(self, key: str, value: str) -> None: ...
+
+    def delete(self, key: str) -> None: ...
+
+    def epoch(self) -> str:
+        """Prefix of every response key; replaced by bump_epoch and never handed out twice."""
+        ...
+
+    def bump_epoch(self) -> None: ...
+
+
+def _new_epoch() -> str:
+    return uuid.uuid4().hex
+
+
+class InProcessResponseCache:
+    """Bounded LRU with TTL, private to this worker process."""
+
+    blocking = False
+
+    def __init__(self, maxsize: int, ttl_seconds: float):
+        self._lru = LRUCache(maxsize=maxsize, ttl_seconds=ttl_seconds)
+        # Kept outside the LRU so neither eviction nor expiry can drop it.
+        self._epoch = _new_epoch()
+
+    def get(self, key: str) -> str | None:
+        return self._lru.get(key)
+
+    def set(self, key: str, value: str) -> None:
+        self._lru.set(key, value)
+
+    def delete(self, key: str) -> None:
+        self._lru.delete(key)
+
+    def epoch(self) -> str:
+        return self._epoch
+
+    def bump_epoch(self) -> None:
+        self._epoch = _new_epoch()
+
+
+class SharedResponseCache:
+    """Adapter over a Redis-style client (get / set(ex=, nx=) / delete) shared by all workers."""
+
+    EPOCH_KEY = "response-cache:epoch"
+    blocking = True
+
+    def __init__(self, client: Any, ttl_seconds: int):
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+
+    def get(self, key: str) -> str | None:
+        value = self.client.get(key)
+        return value.decode() if isinstance(value, bytes) else value
+
+    def set(self, key: str, value: str) -> None:
+        self.client.set(key, value, ex=self.ttl_seconds)
+
+    def delete(self, key: str) -> None:
+        self.client.delete(key)
+
+    def epoch(self) -> str:
+        # Stored without a TTL. If the server still loses it, the first reader installs a fresh
+        # value (NX keeps concurrent readers agreeing), so an old epoch's keys are never reused.
+        epoch = self.get(self.EPOCH_KEY)
+        if epoch is None:
+            self.client.set(self.EPOCH_KEY, _new_epoch(), nx=True)
+            epoch = self.get(self.EPOCH_KEY)
+        return epoch
+
+    def bump_epoch(self) -> None:
+        self.client.set(self.EPOCH_KEY, _new_epoch())
+
+
+class NullResponseCache:
+    blocking = False
+
+    def get(self, key: str) -> str | None:
+        return None
+
+    def set(self, key: str, value: str) -> None:
+        pass
+
+    def delete(self, key: str) -> None:
+        pass
+
+    def epoch(self) -> str:
+        return ""
+
+    def bump_epoch(self) -> None:
+        pass
+
+
+def _redis_cache() -> SharedResponseCache:
+    if not settings.response_cache_url:
+        raise RuntimeError("RESPONSE_CACHE_BACKEND=redis requires RESPONSE_CACHE_URL")
+    try:
+        import redis
+    except ImportError as exc:
+        raise RuntimeError("RESPONSE_CACHE_BACKEND=redis requires the redis package") from exc
+    return SharedResponseCache(redis.Redis.from_url(settings.response_cache_url), settings.response_cache_ttl_seconds)
+
+
+_BACKENDS: dict[str, Callable[[], ResponseCache]] = {
+    "memory": lambda: InProcessResponseCache(settings.response_cache_size, settings.response_cache_ttl_seconds),
+    "redis": _redis_cache,
+    "none": NullResponseCache,
+}
+
+_cache: ResponseCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            backend = settings.response_cache_backend
+            if backend not in _BACKENDS:
+                raise RuntimeError(f"Unknown RESPONSE_CACHE_BACKEND {backend!r}; expected one of {sorted(_BACKENDS)}")
+            _cache = _BACKENDS[backend]()
+        return _cache
+
+
+def set_response_cache(cache: ResponseCache | None) -> None:
+    """Swap the backend (None rebuilds it from settings on next use)."""
+    global _cache
+    with _cache_lock:
+        _cache = cache
+
+
+def _key(cache: ResponseCache, user_id: str, endpoint: str, data_version: int) -> str:
+    return f"response:{cache.epoch()}:{user_id}:{endpoint}:{data_version}"
+
+
+def _lookup(cache: ResponseCache, user_id: str, endpoint: str, data_version: int) -> tuple[str, str | None]:
+    key = _key(cache, user_id, endpoint, data_version)
+    return key, cache.get(key)
+
+
+async def _off_loop(cache: ResponseCache, fn: Callable[..., Any], *args: Any) -> Any:
+    # The epoch and key reads share one threadpool hop; in-process backends skip the hop entirely.
+    if cache.blocking:
+        return await run_in_threadpool(fn, *args)
+    return fn(*args)
+
+
+async def cached_response(
+    user_id: str, endpoint: str, data_version: int, compute: Callable[[], Awaitable[Any]]
+) -> Any:
+    """Return the JSON-ready payload for (user, endpoint, data version), computing it on a miss."""
+    cache = get_response_cache()
+    key, hit = await _off_loop(cache, _lookup, cache, user_id, endpoint, data_version)
+    if hit is not None:
+        return json.loads(hit)
+    payload = jsonable_encoder(await compute())
+    await _off_loop(cache, cache.set, key, json.dumps(payload, separators=(",", ":")))
+    return payload
+
+
+def invalidate_all_responses() -> None:
+    """Drop every cached response; per-user writes need no call since they bump the data version in the key."""
+    get_response_cache().bump_epoch()
@@ -0,0 +1,65 @@
+import logging
+import threading
+
+from backend.config import settings
+from backend.database import SessionLocal
+from backend.services.auth import purge_expired_revocations, purge_expired_sessions
+
+logger = logging.getLogger(__name__)
+
+
+class SessionSweeper:
+    """Daemon thread that periodically purges expired user_sessions and revoked_tokens rows."""
+
+    def __init__(self, interval_seconds: float, batch_size: int, session_factory=SessionLocal):
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self.session_factory = session_factory
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def sweep_once(self) -> int:
+        db = self.session_factory()
+        try:
+            purged = purge_expired_sessions(db, self.batch_size)
+            purge_expired_revocations(db)
+            return purged
+        finally:
+            db.close()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                purged = self.sweep_once()
+                if purged:
+                    logger.info("Purged %d expired sessions", purged)
+            except Exception:
+                logger.exception("Session sweep failed")
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="session-sweeper", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+_sweeper: SessionSweeper | None = None
+
+
+def start_session_sweeper() -> None:
+    global _sweeper
+    if _sweeper is None and settings.session_sweep_interval_seconds > 0:
+        _sweeper = SessionSweeper(settings.session_sweep_interval_seconds, settings.session_sweep_batch_size)
+        _sweeper.start()
+
+
+def stop_session_sweeper() -> None:
+    global _sweeper
+    if _sweeper is not None:
+        _sweeper.stop()
+        _sweeper = None
@@ -1,13 +1,45 @@
-def to_float(value: str | None) -> float | None:
+import re
+
+_QUALIFIERS = {"<=": "<=", "≤": "<=", "<": "<", ">=": ">=", "≥": ">=", ">": ">"}
+_NUMBER = r"[-+]?(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][-+]?\d+)?"
+_RANGE_RE = re.compile(rf"^\s*({_NUMBER})\s*(?:-|–|to)\s*({_NUMBER})")
+_NUMBER_RE = re.compile(_NUMBER)
+_THOUSANDS_RE = re.compile(r"(?<=\d),(?=\d{3}(?!\d))")
+
+
+def parse_value(value: str | None) -> tuple[float | None, str | None]:
+    """Split a raw lab value into (number, qualifier).
+
+    The qualifier is "<", "<=", ">", ">=" for censored values such as "<5", "range" for
+    values like "1.2-3.4" (the number is the midpoint), and None for plain numbers.
+    """
     if value is None:
-        return None
-    cleaned = "".join(ch for ch in value if ch.isdigit() or ch in {".", "-"})
-    if not cleaned:
-        return None
-    try:
-        return float(cleaned)
-    except ValueError:
-        return None
+        return None, None
+    text = _THOUSANDS_RE.sub("", value.strip()).replace(",", ".")
+    if not text:
+        return None, None
+
+    qualifier = None
+    for token, normalized in _QUALIFIERS.items():
+        if text.startswith(token):
+            qualifier = normalized
+            text = text[len(token):].lstrip()
+            break
+
+    if qualifier is None:
+        range_match = _RANGE_RE.match(text)
+        if range_match:
+            low, high = float(range_match.group(1)), float(range_match.group(2))
+            return (low + high) / 2.0, "range"
+
+    number_match = _NUMBER_RE.search(text)
+    if not number_match:
+        return None, None
+    return float(number_match.group(0)), qualifier
+
+
+def to_float(value: str | None) -> float | None:
+    return parse_value(value)[0]
 
 
 def compute_delta(prev: float | None, curr: float | None) -> float | None:
@@ -0,0 +1,99 @@
+import hashlib
+import os
+import tempfile
+import zipfile
+from dataclasses import dataclass
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from backend.config import settings
+
+
+class UploadTooLargeError(ValueError):
+    pass
+
+
+@dataclass
+class SpooledUpload:
+    path: str
+    file_name: str
+    sha256: str
+    size: int
+
+
+def _new_spool_file(file_name: str):
+    suffix = os.path.splitext(file_name)[1] or ".pdf"
+    return tempfile.NamedTemporaryFile(suffix=suffix, dir=settings.upload_spool_dir, delete=False)
+
+
+def discard_spooled(path: str) -> None:
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+async def spool_upload(upload: UploadFile, file_name: str | None = None) -> SpooledUpload:
+    """Copy an upload to a spool file chunk by chunk, hashing it and enforcing UPLOAD_MAX_BYTES."""
+    name = file_name or upload.filename or "upload.pdf"
+    digest = hashlib.sha256()
+    size = 0
+    spool = _new_spool_file(name)
+    try:
+        with spool:
+            while chunk := await upload.read(settings.upload_chunk_bytes):
+                size += len(chunk)
+                if size > settings.upload_max_bytes:
+                    raise UploadTooLargeError(f"File exceeds the {settings.upload_max_bytes} byte upload limit")
+                digest.update(chunk)
+                await run_in_threadpool(spool.write, chunk)
+    except BaseException:
+        discard_spooled(spool.name)
+        raise
+    return SpooledUpload(path=spool.name, file_name=name, sha256=digest.hexdigest(), size=size)
+
+
+def sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        while chunk := handle.read(settings.upload_chunk_bytes):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def extract_zip_pdfs(zip_path: str, max_files: int) -> list[SpooledUpload]:
+    """Spool every PDF member of a ZIP archive to its own file, hashing each on the way."""
+    extracted: list[SpooledUpload] = []
+    spool_paths: list[str] = []
+    try:
+        with zipfile.ZipFile(zip_path) as archive:
+            members = [
+                info
+                for info in archive.infolist()
+                if not info.is_dir()
+                and info.filename.lower().endswith(".pdf")
+                and not os.path.basename(info.filename).startswith(".")
+                and "__MACOSX/" not in info.filename
+            ]
+            if len(members) > max_files:
+                raise UploadTooLargeError(f"Archive holds {len(members)} PDFs; the limit is {max_files}")
+            for info in members:
+                name = os.path.basename(info.filename)
+                digest = hashlib.sha256()
+                size = 0
+                spool = _new_spool_file(name)
+                spool_paths.append(spool.name)
+                with spool, archive.open(info) as member:
+                    while chunk := member.read(settings.upload_chunk_bytes):
+                        size += len(chunk)
+                        if size > settings.upload_max_bytes:
+                            raise UploadTooLargeError(f"{name} exceeds the {settings.upload_max_bytes} byte upload limit")
+                        digest.update(chunk)
+                        spool.write(chunk)
+                extracted.append(SpooledUpload(path=spool.name, file_name=name, sha256=digest.hexdigest(), size=size))
+    except BaseException:
+        for path in spool_paths:
+            discard_spooled(path)
+        raise
+    return extracted
@@ -0,0 +1,140 @@
+"""Compare /api/biomarkers/summary against the earlier load-everything and window-query implementations.
+
+Usage: python benchmarks/bench_biomarker_summary.py [--reports 400] [--tests-per-report 40]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from backend.database import Base  # noqa: E402
+from backend.models.biomarker import BiomarkerReference  # noqa: E402
+from backend.models.lab_report import LabReportRecord, TestResultRecord  # noqa: E402
+from backend.models.user import User  # noqa: E402
+from backend.services.analytics import ranked_results_subquery, rebuild_user_latest  # noqa: E402
+from backend.services.dashboard import latest_rows_query, summary_items  # noqa: E402
+
+
+def legacy_summary(db, user_id: str) -> int:
+    reports = db.query(LabReportRecord.doc_id, LabReportRecord.report_date).filter(LabReportRecord.user_id == user_id).all()
+    report_dates = {r.doc_id: r.report_date for r in reports}
+    latest = {}
+    tests = (
+        db.query(TestResultRecord, BiomarkerReference)
+        .outerjoin(BiomarkerReference, TestResultRecord.biomarker_id == BiomarkerReference.id)
+        .join(LabReportRecord, LabReportRecord.doc_id == TestResultRecord.doc_id)
+        .filter(LabReportRecord.user_id == user_id)
+        .all()
+    )
+    for test, biomarker in tests:
+        key = test.biomarker_id or f"other::{test.test_name}"
+        report_date = report_dates.get(test.doc_id)
+        prev = latest.get(key)
+        if prev is None or (report_date and (prev[2] is None or report_date > prev[2])):
+            latest[key] = (test, biomarker, report_date)
+    return len(latest)
+
+
+def window_summary(db, user_id: str) -> int:
+    ranked = ranked_results_subquery(user_id)
+    return len(
+        db.query(TestResultRecord, BiomarkerReference, ranked.c.report_date)
+        .join(ranked, ranked.c.result_id == TestResultRecord.id)
+        .outerjoin(BiomarkerReference, TestResultRecord.biomarker_id == BiomarkerReference.id)
+        .filter(ranked.c.rn == 1)
+        .all()
+    )
+
+
+def populate(session_factory, reports: int, tests_per_report: int) -> User:
+    rng = random.Random(7)
+    db = session_factory()
+    biomarkers = [BiomarkerReference(standard_name=f"Marker {i}", category=f"Panel {i % 12}", common_aliases="[]") for i in range(150)]
+    user = User(email="bench@example.com", password_hash="x")
+    db.add_all([*biomarkers, user])
+    db.flush()
+    start = date(2010, 1, 1)
+    for n in range(reports):
+        report = LabReportRecord(user_id=user.id, patient_name="Bench", report_date=start + timedelta(days=7 * n))
+        db.add(report)
+        db.flush()
+        db.bulk_insert_mappings(
+            TestResultRecord,
+            [
+                {
+                    "doc_id": report.doc_id,
+                    "user_id": user.id,
+                    "report_date": report.report_date,
+                    "biomarker_id": b.id if rng.random() > 0.05 else None,
+                    "test_name": b.standard_name,
+                    "value": f"{rng.uniform(1, 200):.1f}",
+                    "value_numeric": rng.uniform(1, 200),
+                }
+                for b in rng.sample(biomarkers, tests_per_report)
+            ],
+        )
+    rebuild_user_latest(db, user.id)
+    db.commit()
+    db.refresh(user)
+    db.expunge(user)
+    db.close()
+    return user
+
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--reports", type=int, default=400)
+    parser.add_argument("--tests-per-report", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(engine)
+        session_factory = sessionmaker(bind=engine, autoflush=False)
+        user = populate(session_factory, args.reports, args.tests_per_report)
+
+        def run_legacy():
+            with session_factory() as db:
+                legacy_summary(db, user.id)
+
+        def run_window():
+            with session_factory() as db:
+                window_summary(db, user.id)
+
+        def run_latest_table():
+            with session_factory() as db:
+                summary_items(db.execute(latest_rows_query(user.id)).all())
+
+        legacy = timed(run_legacy, args.repeat)
+        window = timed(run_window, args.repeat)
+        table = timed(run_latest_table, args.repeat)
+        print(f"results per user: {args.reports * args.tests_per_report}")
+        print(f"legacy python scan   : {legacy * 1000:8.1f} ms")
+        print(f"window-function SQL  : {window * 1000:8.1f} ms  ({legacy / window:.1f}x)")
+        print(f"user_biomarker_latest: {table * 1000:8.1f} ms  ({legacy / table:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Measure password verification throughput: logins per second per core, and through the hash executor.
+
+Usage: python benchmarks/bench_login.py [--rounds 29000] [--logins 200] [--workers 2]
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from passlib.context import CryptContext  # noqa: E402
+
+from backend.config import settings  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=settings.password_hash_rounds)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=settings.password_hash_workers)
+    args = parser.parse_args()
+
+    context = CryptContext(schemes=["pbkdf2_sha256"], pbkdf2_sha256__default_rounds=args.rounds)
+    stored = context.hash("correct horse battery staple")
+
+    def login() -> None:
+        assert context.verify("correct horse battery staple", stored)
+
+    started = time.perf_counter()
+    for _ in range(args.logins):
+        login()
+    single = args.logins / (time.perf_counter() - started)
+
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        started = time.perf_counter()
+        for future in [executor.submit(login) for _ in range(args.logins)]:
+            future.result()
+        pooled = args.logins / (time.perf_counter() - started)
+
+    print(f"pbkdf2_sha256 rounds     : {args.rounds}")
+    print(f"per core (1 thread)      : {single:8.1f} logins/s  ({1000 / single:.1f} ms each)")
+    print(f"{f'executor ({args.workers} workers)':<25}: {pooled:8.1f} logins/s  (cpus: {os.cpu_count()})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Requests per second on the read endpoints with the sync session pool vs the asyncio engine.
+
+Drives the ASGI app in-process with concurrent clients against a throwaway SQLite database.
+With a networked MySQL the async path also stops holding a thread per in-flight query, so
+the gap grows with database latency; --threads caps the AnyIO worker pool to show that effect.
+
+Usage: python benchmarks/bench_read_load.py [--requests 2000] [--concurrency 64] [--threads 40]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import anyio.to_thread  # noqa: E402
+import httpx  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from backend import database  # noqa: E402
+from backend.config import settings  # noqa: E402
+from backend.database import Base, async_database_url, engine_options, tune_engine  # noqa: E402
+from backend.main import app  # noqa: E402
+from backend.models.biomarker import BiomarkerReference  # noqa: E402
+from backend.models.lab_report import LabReportRecord, TestResultRecord  # noqa: E402
+from backend.models.user import User  # noqa: E402
+from backend.services.analytics import rebuild_user_latest  # noqa: E402
+from backend.services.auth import create_session  # noqa: E402
+from backend.services.response_cache import NullResponseCache, set_response_cache  # noqa: E402
+
+PATHS = ["/api/reports", "/api/biomarkers/summary", "/api/biomarkers/categories", "/api/trends/overview"]
+
+
+def populate(session_factory, reports: int, tests_per_report: int) -> str:
+    rng = random.Random(7)
+    db = session_factory()
+    biomarkers = [BiomarkerReference(standard_name=f"Marker {i}", category=f"Panel {i % 12}", common_aliases="[]") for i in range(80)]
+    user = User(email="load@example.com", password_hash="x")
+    db.add_all([*biomarkers, user])
+    db.flush()
+    for n in range(reports):
+        report = LabReportRecord(user_id=user.id, patient_name="Load", report_date=date(2015, 1, 1) + timedelta(days=30 * n))
+        db.add(report)
+        db.flush()
+        db.bulk_insert_mappings(
+            TestResultRecord,
+            [
+                {
+                    "doc_id": report.doc_id,
+                    "user_id": user.id,
+                    "report_date": report.report_date,
+                    "biomarker_id": b.id,
+                    "test_name": b.standard_name,
+                    "value": "1",
+                    "value_numeric": rng.uniform(1, 200),
+                }
+                for b in rng.sample(biomarkers, tests_per_report)
+            ],
+        )
+    rebuild_user_latest(db, user.id)
+    db.commit()
+    token = create_session(db, user.id).id
+    db.close()
+    return token
+
+
+async def drive(token: str, total: int, concurrency: int) -> float:
+    headers = {"Authorization": f"Bearer {token}"}
+    transport = httpx.ASGITransport(app=app)
+    remaining = iter(range(total))
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def worker() -> None:
+            for n in remaining:
+                response = await client.get(PATHS[n % len(PATHS)], headers=headers)
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return total / (time.perf_counter() - started)
+
+
+async def run_mode(mode: str, token: str, args) -> float:
+    settings.database_async = mode == "async"
+    anyio.to_thread.current_default_thread_limiter().total_tokens = args.threads
+    # Async pools are bound to the loop that opened them, so each mode gets a fresh one.
+    async_url = async_database_url(settings.database_url)
+    async_engine = create_async_engine(async_url, **engine_options(async_url, asynchronous=True))
+    tune_engine(async_engine.sync_engine)
+    database._async_sessionmaker = async_sessionmaker(async_engine, expire_on_commit=False)
+    try:
+        await drive(token, min(200, args.requests), args.concurrency)  # warm up
+        return await drive(token, args.requests, args.concurrency)
+    finally:
+        await async_engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--threads", type=int, default=40)
+    parser.add_argument("--reports", type=int, default=60)
+    parser.add_argument("--tests-per-report", type=int, default=40)
+    args = parser.parse_args()
+
+    # Measure the database paths, not the response cache.
+    set_response_cache(NullResponseCache())
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'load.db')}"
+        engine = tune_engine(create_engine(url, **engine_options(url)))
+        Base.metadata.create_all(engine)
+        database.SessionLocal = sessionmaker(bind=engine, autoflush=False)
+        settings.database_url = url
+        token = populate(database.SessionLocal, args.reports, args.tests_per_report)
+
+        results = {mode: asyncio.run(run_mode(mode, token, args)) for mode in ("sync", "async")}
+
+        print(f"endpoints: {', '.join(PATHS)}")
+        print(f"requests={args.requests} concurrency={args.concurrency} threads={args.threads}")
+        print(f"sync session pool : {results['sync']:8.1f} req/s")
+        print(f"asyncio engine    : {results['async']:8.1f} req/s  ({results['async'] / results['sync']:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
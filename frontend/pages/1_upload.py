@@ -1,4 +1,6 @@
+import os
 import sys
+import time
 from pathlib import Path
 
 APP_DIR = Path(__file__).resolve().parent.parent
@@ -27,6 +29,8 @@ render_sidebar_profile()
 COLORS = get_colors()
 
 client = ApiClient(token=st.session_state.token)
+# Stop waiting on a job that never settles (e.g. the API restarted mid-parse).
+UPLOAD_POLL_TIMEOUT_SECONDS = float(os.getenv("UPLOAD_POLL_TIMEOUT_SECONDS", "600"))
 
 # ── Header ────────────────────────────────────────────────────────────────
 st.markdown(
@@ -68,14 +72,28 @@ submit = st.button("Parse and Save", disabled=file is None, use_container_width=
 st.markdown("</div>", unsafe_allow_html=True)
 
 if submit and file:
-    progress = st.progress(0, text="Uploading and parsing report...")
-    progress.progress(15, text="Sending PDF to parser...")
+    progress = st.progress(0, text="Uploading report...")
     res = client.upload_report((file.name, file, "application/pdf"))
-    progress.progress(90, text="Processing results...")
-
-    if res.ok:
+    job = res.json() if res.ok else None
+
+    # Upload returns a job id immediately; poll until the worker finishes parsing.
+    stage_labels = {
+        "queued": "Waiting for a parser worker...",
+        "parsing": "Parsing PDF...",
+        "extracting": "Extracting lab values...",
+        "classifying": "Classifying biomarkers...",
+        "persisting": "Saving results...",
+    }
+    deadline = time.monotonic() + UPLOAD_POLL_TIMEOUT_SECONDS
+    while job and job["status"] in {"queued", "running"} and time.monotonic() < deadline:
+        progress.progress(job["progress"], text=stage_labels.get(job["stage"], "Processing..."))
+        time.sleep(1)
+        res = client.upload_job(job["job_id"])
+        job = res.json() if res.ok else None
+
+    if job and job["status"] == "completed":
         progress.progress(100, text="Done!")
-        data = res.json()
+        data = job["result"] or {}
         total = data.get("tests", 0)
         mapped = data.get("mapped_tests", 0)
         unmapped_count = data.get("unmapped_tests_count", 0)
@@ -121,6 +139,15 @@ if submit and file:
 
         # Bust the reports cache so the new report appears
         cached_reports.clear()
+    elif job and job["status"] in {"queued", "running"}:
+        progress.empty()
+        st.warning(
+            f"**{file.name}** is still processing after {UPLOAD_POLL_TIMEOUT_SECONDS:.0f}s. "
+            "It will appear in the upload history once it finishes."
+        )
+    elif job:
+        progress.empty()
+        st.error(f"Upload failed: {job.get('error') or 'unknown error'}")
     else:
         progress.empty()
         try:
@@ -129,6 +156,72 @@ if submit and file:
             detail = res.text
         st.error(f"Upload failed: {detail}")
 
+# ── Bulk upload ───────────────────────────────────────────────────────────
+section_title("Bulk Upload")
+bulk_files = st.file_uploader(
+    "Upload several PDFs or a ZIP archive of historical reports",
+    type=["pdf", "zip"],
+    accept_multiple_files=True,
+    key="bulk_files",
+)
+bulk_submit = st.button("Parse and Save All", disabled=not bulk_files, use_container_width=True)
+
+if bulk_submit and bulk_files:
+    mime_types = {"pdf": "application/pdf", "zip": "application/zip"}
+    with st.spinner(f"Uploading {len(bulk_files)} file(s)..."):
+        res = client.bulk_upload(
+            [(f.name, f, mime_types.get(f.name.rsplit(".", 1)[-1].lower(), "application/octet-stream")) for f in bulk_files]
+        )
+    if res.ok:
+        # Every PDF is queued as its own ingest job; poll them all until they settle or the deadline passes.
+        jobs = {job["job_id"]: job for job in res.json().get("jobs", [])}
+        bulk_progress = st.progress(0, text=f"Parsing {len(jobs)} report(s)...")
+        deadline = time.monotonic() + UPLOAD_POLL_TIMEOUT_SECONDS
+        while time.monotonic() < deadline:
+            pending = [job_id for job_id, job in jobs.items() if job["status"] in {"queued", "running"}]
+            bulk_progress.progress(
+                (len(jobs) - len(pending)) * 100 // max(len(jobs), 1),
+                text=f"Parsed {len(jobs) - len(pending)} of {len(jobs)} report(s)...",
+            )
+            if not pending:
+                break
+            time.sleep(1)
+            for job_id in pending:
+                job_res = client.upload_job(job_id)
+                if job_res.ok:
+                    jobs[job_id] = job_res.json()
+        bulk_progress.empty()
+
+        results = list(jobs.values())
+        succeeded = sum(1 for job in results if job["status"] == "completed")
+        failed = sum(1 for job in results if job["status"] == "failed")
+        c1, c2, c3 = st.columns(3)
+        c1.markdown(kpi_tile("Saved", succeeded, COLORS["success"]), unsafe_allow_html=True)
+        c2.markdown(kpi_tile("Failed", failed, COLORS["danger"] if failed else COLORS["success"]), unsafe_allow_html=True)
+        c3.markdown(kpi_tile("Still Processing", len(results) - succeeded - failed, COLORS["warning"]), unsafe_allow_html=True)
+        st.dataframe(
+            [
+                {
+                    "File": job.get("filename"),
+                    "Status": job.get("status"),
+                    "Doc ID": (job.get("doc_id") or "")[:8],
+                    "Mapped": (job.get("result") or {}).get("mapped_tests"),
+                    "Unmapped": (job.get("result") or {}).get("unmapped_tests_count"),
+                    "Error": job.get("error") or "",
+                }
+                for job in results
+            ],
+            use_container_width=True,
+            hide_index=True,
+        )
+        cached_reports.clear()
+    else:
+        try:
+            detail = res.json().get("error", {}).get("details", {}).get("reason", res.text)
+        except Exception:
+            detail = res.text
+        st.error(f"Bulk upload failed: {detail}")
+
 # ── Upload history ────────────────────────────────────────────────────────
 section_title("Upload History")
 ok, reps = cached_reports(st.session_state.token)
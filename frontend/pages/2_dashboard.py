@@ -14,10 +14,8 @@ import streamlit as st
 
 from utils.api_client import (
     ApiClient,
-    cached_biomarker_categories,
     cached_biomarker_history,
-    cached_biomarker_summary,
-    cached_biomarker_unmapped,
+    cached_dashboard_snapshot,
 )
 from utils.theme import (
     PLOTLY_COLORS,
@@ -25,12 +23,12 @@ from utils.theme import (
     auth_guard,
     flag_badge,
     get_colors,
+    item_float,
     kpi_tile,
     parse_reference_range,
     pill_tag,
     plotly_layout_defaults,
     render_sidebar_profile,
-    safe_float,
     section_title,
 )
 
@@ -57,18 +55,16 @@ st.markdown(
 )
 
 # ── Fetch data (cached) ─────────────────────────────────────────────────
-s_ok, rows = cached_biomarker_summary(token)
+s_ok, snapshot = cached_dashboard_snapshot(token)
 if not s_ok:
     st.error("Failed to load biomarker data.")
     st.stop()
+rows = snapshot["summary"]
 if not rows:
     st.info("No biomarker data yet. Upload a report first.")
     st.stop()
 
-c_ok, cats_list = cached_biomarker_categories(token)
-if not c_ok:
-    st.error("Failed to load category data.")
-    st.stop()
+cats_list = snapshot["categories"]
 
 df = pd.DataFrame(rows)
 cats_df = pd.DataFrame(cats_list)
@@ -205,7 +201,7 @@ for _, row in filtered.iterrows():
     # Range bar
     range_bar_html = ""
     low, high = parse_reference_range(ref)
-    fval = safe_float(val)
+    fval = item_float(row, "latest_value")
     if low is not None and high is not None and fval is not None and high > low:
         span = high - low
         pct = max(0, min(100, (fval - low) / span * 100))
@@ -342,14 +338,11 @@ else:
 
 # ── Unmapped tests ────────────────────────────────────────────────────────
 with st.expander("⚠️ Unmapped / Unclassified Tests", expanded=False):
-    u_ok, unmapped_rows = cached_biomarker_unmapped(token)
-    if u_ok:
-        if unmapped_rows:
-            pills_html = " ".join(
-                pill_tag(f"{r['test_name']} ({r['count']})", warning=True) for r in unmapped_rows
-            )
-            st.markdown(pills_html, unsafe_allow_html=True)
-        else:
-            st.success("All tests are mapped to canonical biomarkers!")
+    unmapped_rows = snapshot["unmapped"]
+    if unmapped_rows:
+        pills_html = " ".join(
+            pill_tag(f"{r['test_name']} ({r['count']})", warning=True) for r in unmapped_rows
+        )
+        st.markdown(pills_html, unsafe_allow_html=True)
     else:
-        st.caption("Could not load unmapped tests.")
+        st.success("All tests are mapped to canonical biomarkers!")
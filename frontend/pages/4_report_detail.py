@@ -18,11 +18,11 @@ from utils.theme import (
     auth_guard,
     flag_badge,
     get_colors,
+    item_float,
     kpi_tile,
     parse_reference_range,
     plotly_layout_defaults,
     render_sidebar_profile,
-    safe_float,
     section_title,
 )
 
@@ -178,7 +178,7 @@ for cat in sorted(grouped.keys()):
             # Range indicator
             range_html = ""
             low, high = parse_reference_range(ref)
-            fval = safe_float(val)
+            fval = item_float(t)
             if low is not None and high is not None and fval is not None and high > low:
                 span = high - low
                 pct = max(0, min(100, (fval - low) / span * 100))
@@ -10,11 +10,7 @@ from collections import defaultdict
 import plotly.graph_objects as go
 import streamlit as st
 
-from utils.api_client import (
-    cached_biomarker_categories,
-    cached_biomarker_summary,
-    cached_trends_overview,
-)
+from utils.api_client import cached_dashboard_snapshot
 from utils.theme import (
     apply_theme,
     auth_guard,
@@ -49,9 +45,10 @@ st.markdown(
 )
 
 # ── Fetch data (cached) ─────────────────────────────────────────────────
-s_ok, summary_rows = cached_biomarker_summary(token)
-t_ok, trend_rows_raw = cached_trends_overview(token)
-c_ok, cats_raw = cached_biomarker_categories(token)
+s_ok, snapshot = cached_dashboard_snapshot(token)
+summary_rows = snapshot.get("summary", [])
+trend_rows_raw = snapshot.get("trends", [])
+cats_raw = snapshot.get("categories", [])
 
 if not s_ok:
     st.error("Failed to load biomarker data.")
@@ -123,7 +120,7 @@ with gauge_right:
     c3.markdown(kpi_tile("Flagged", flagged, COLORS["danger"] if flagged else COLORS["success"]), unsafe_allow_html=True)
 
     # Category health mini-bars
-    if c_ok and cats_raw:
+    if cats_raw:
         section_title("Category Breakdown")
         for cat in sorted(cats_raw, key=lambda c: c["flagged"], reverse=True):
             cat_name = cat["category"]
@@ -152,7 +149,7 @@ st.markdown("<div style='height:24px'></div>", unsafe_allow_html=True)
 section_title("Actionable Insights")
 
 insights = []
-trend_rows = trend_rows_raw if t_ok else []
+trend_rows = trend_rows_raw
 
 if trend_rows:
     for tr in trend_rows:
@@ -19,10 +19,10 @@ from utils.theme import (
     auth_guard,
     flag_badge,
     get_colors,
+    item_float,
     kpi_tile,
     plotly_layout_defaults,
     render_sidebar_profile,
-    safe_float,
     section_title,
 )
 
@@ -132,8 +132,8 @@ if common_keys:
 
     names, vals_a_list, vals_b_list, deltas = [], [], [], []
     for k in common_keys:
-        va = safe_float(map_a[k].get("value"))
-        vb = safe_float(map_b[k].get("value"))
+        va = item_float(map_a[k])
+        vb = item_float(map_b[k])
         if va is not None and vb is not None:
             names.append(map_a[k].get("test_name", k))
             vals_a_list.append(va)
@@ -179,8 +179,8 @@ for k in all_keys:
     flag_b = flag_badge(tb_item.get("flag")) if tb_item else "—"
 
     # Delta
-    va_f = safe_float(va_str) if ta_item else None
-    vb_f = safe_float(vb_str) if tb_item else None
+    va_f = item_float(ta_item) if ta_item else None
+    vb_f = item_float(tb_item) if tb_item else None
     if va_f is not None and vb_f is not None:
         delta_val = vb_f - va_f
         if delta_val > 0:
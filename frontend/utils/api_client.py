@@ -1,9 +1,14 @@
 import os
+import threading
+from collections import OrderedDict
 
 import requests
 import streamlit as st
 
 BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000")
+# Short, because revalidating with the held ETag is a cheap 304 when nothing changed.
+CACHE_TTL_SECONDS = 10
+_VALIDATOR_STORE_SIZE = 512
 
 
 class ApiClient:
@@ -23,9 +28,19 @@ class ApiClient:
     def login(self, email: str, password: str):
         return requests.post(f"{BASE_URL}/api/auth/login", json={"email": email, "password": password}, timeout=120)
 
+    def logout(self):
+        return requests.post(f"{BASE_URL}/api/auth/logout", headers=self.headers, timeout=30)
+
     def upload_report(self, file_obj):
         return requests.post(f"{BASE_URL}/api/reports/upload", files={"file": file_obj}, headers=self.headers, timeout=600)
 
+    def bulk_upload(self, file_objs: list):
+        files = [("files", file_obj) for file_obj in file_objs]
+        return requests.post(f"{BASE_URL}/api/reports/bulk-upload", files=files, headers=self.headers, timeout=600)
+
+    def upload_job(self, job_id: str):
+        return requests.get(f"{BASE_URL}/api/reports/jobs/{job_id}", headers=self.headers, timeout=120)
+
     def reports(self):
         return requests.get(f"{BASE_URL}/api/reports", headers=self.headers, timeout=120)
 
@@ -47,49 +62,97 @@ class ApiClient:
     def trends_overview(self):
         return requests.get(f"{BASE_URL}/api/trends/overview", headers=self.headers, timeout=120)
 
+    def dashboard_snapshot(self):
+        return requests.get(f"{BASE_URL}/api/dashboard/snapshot", headers=self.headers, timeout=120)
+
 
 # ---------------------------------------------------------------------------
-# Cached data fetchers — return parsed JSON, cached for 60 seconds.
+# Cached data fetchers — return parsed JSON, cached for CACHE_TTL_SECONDS.
 # These are standalone functions so @st.cache_data can hash the arguments.
+# When the short cache expires they revalidate with the ETag / Last-Modified
+# held from the previous response and reuse its payload on 304.
 # ---------------------------------------------------------------------------
 
-@st.cache_data(ttl=60, show_spinner=False)
+_validated: OrderedDict[tuple[str, str], tuple[dict[str, str], object]] = OrderedDict()
+_validated_lock = threading.Lock()
+
+
+def _get_json(token: str, path: str) -> tuple[bool, object]:
+    key = (token, path)
+    headers = {"Authorization": f"Bearer {token}"}
+    with _validated_lock:
+        held = _validated.get(key)
+    if held:
+        headers.update(held[0])
+
+    res = requests.get(f"{BASE_URL}{path}", headers=headers, timeout=120)
+    if res.status_code == 304 and held:
+        with _validated_lock:
+            if key in _validated:
+                _validated.move_to_end(key)
+        return True, held[1]
+    if not res.ok:
+        return False, None
+
+    payload = res.json()
+    validators = {}
+    if res.headers.get("ETag"):
+        validators["If-None-Match"] = res.headers["ETag"]
+    if res.headers.get("Last-Modified"):
+        validators["If-Modified-Since"] = res.headers["Last-Modified"]
+    if validators:
+        with _validated_lock:
+            _validated[key] = (validators, payload)
+            _validated.move_to_end(key)
+            while len(_validated) > _VALIDATOR_STORE_SIZE:
+                _validated.popitem(last=False)
+    return True, payload
+
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, show_spinner=False)
 def cached_reports(token: str) -> tuple[bool, list | dict]:
-    res = requests.get(f"{BASE_URL}/api/reports", headers={"Authorization": f"Bearer {token}"}, timeout=120)
-    return res.ok, res.json() if res.ok else []
+    ok, payload = _get_json(token, "/api/reports")
+    return ok, payload if ok else []
 
 
-@st.cache_data(ttl=60, show_spinner=False)
+@st.cache_data(ttl=CACHE_TTL_SECONDS, show_spinner=False)
 def cached_report_detail(token: str, doc_id: str) -> tuple[bool, dict]:
-    res = requests.get(f"{BASE_URL}/api/reports/{doc_id}", headers={"Authorization": f"Bearer {token}"}, timeout=120)
-    return res.ok, res.json() if res.ok else {}
+    ok, payload = _get_json(token, f"/api/reports/{doc_id}")
+    return ok, payload if ok else {}
 
 
-@st.cache_data(ttl=60, show_spinner=False)
+@st.cache_data(ttl=CACHE_TTL_SECONDS, show_spinner=False)
 def cached_biomarker_summary(token: str) -> tuple[bool, list]:
-    res = requests.get(f"{BASE_URL}/api/biomarkers/summary", headers={"Authorization": f"Bearer {token}"}, timeout=120)
-    return res.ok, res.json() if res.ok else []
+    ok, payload = _get_json(token, "/api/biomarkers/summary")
+    return ok, payload if ok else []
 
 
-@st.cache_data(ttl=60, show_spinner=False)
+@st.cache_data(ttl=CACHE_TTL_SECONDS, show_spinner=False)
 def cached_biomarker_categories(token: str) -> tuple[bool, list]:
-    res = requests.get(f"{BASE_URL}/api/biomarkers/categories", headers={"Authorization": f"Bearer {token}"}, timeout=120)
-    return res.ok, res.json() if res.ok else []
+    ok, payload = _get_json(token, "/api/biomarkers/categories")
+    return ok, payload if ok else []
 
 
-@st.cache_data(ttl=60, show_spinner=False)
+@st.cache_data(ttl=CACHE_TTL_SECONDS, show_spinner=False)
 def cached_biomarker_history(token: str, biomarker_id: int) -> tuple[bool, list]:
-    res = requests.get(f"{BASE_URL}/api/biomarkers/{biomarker_id}/history", headers={"Authorization": f"Bearer {token}"}, timeout=120)
-    return res.ok, res.json() if res.ok else []
+    ok, payload = _get_json(token, f"/api/biomarkers/{biomarker_id}/history")
+    return ok, payload if ok else []
 
 
-@st.cache_data(ttl=60, show_spinner=False)
+@st.cache_data(ttl=CACHE_TTL_SECONDS, show_spinner=False)
 def cached_biomarker_unmapped(token: str) -> tuple[bool, list]:
-    res = requests.get(f"{BASE_URL}/api/biomarkers/unmapped", headers={"Authorization": f"Bearer {token}"}, timeout=120)
-    return res.ok, res.json() if res.ok else []
+    ok, payload = _get_json(token, "/api/biomarkers/unmapped")
+    return ok, payload if ok else []
 
 
-@st.cache_data(ttl=60, show_spinner=False)
+@st.cache_data(ttl=CACHE_TTL_SECONDS, show_spinner=False)
 def cached_trends_overview(token: str) -> tuple[bool, list]:
-    res = requests.get(f"{BASE_URL}/api/trends/overview", headers={"Authorization": f"Bearer {token}"}, timeout=120)
-    return res.ok, res.json() if res.ok else []
+    ok, payload = _get_json(token, "/api/trends/overview")
+    return ok, payload if ok else []
+
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, show_spinner=False)
+def cached_dashboard_snapshot(token: str) -> tuple[bool, dict]:
+    """Summary, categories, trends and unmapped counts in one request."""
+    ok, payload = _get_json(token, "/api/dashboard/snapshot")
+    return ok, payload if ok else {}
@@ -6,8 +6,11 @@ for the Medical Lab Insights Streamlit frontend.
 from __future__ import annotations
 
 import re
+import requests
 import streamlit as st
 
+from utils.api_client import ApiClient
+
 # ---------------------------------------------------------------------------
 # Color palettes (light + dark)
 # ---------------------------------------------------------------------------
@@ -422,6 +425,10 @@ def render_sidebar_profile() -> None:
             st.rerun()
 
         if st.button("Logout", use_container_width=True, type="secondary"):
+            try:
+                ApiClient(token=st.session_state.get("token")).logout()
+            except requests.RequestException:
+                pass  # the local session is cleared regardless
             st.session_state.token = None
             st.session_state.user = None
             st.rerun()
@@ -506,3 +513,11 @@ def safe_float(val: str | None) -> float | None:
         return float(cleaned) if cleaned else None
     except ValueError:
         return None
+
+
+def item_float(item, key: str = "value") -> float | None:
+    """Prefer the API's parsed ``<key>_numeric`` field, falling back to parsing ``<key>``."""
+    numeric = item.get(f"{key}_numeric")
+    if numeric is not None and numeric == numeric:  # skip NaN from pandas rows
+        return float(numeric)
+    return safe_float(item.get(key))
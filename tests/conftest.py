@@ -1,17 +1,23 @@
+import asyncio
 from collections.abc import Generator
+from contextlib import contextmanager
 
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
-from backend.database import Base, get_db
+from backend.database import Base, ReadSession, get_db, get_read_db
 from backend.main import app
+from backend.services import ingest, jobs
+from backend.services.auth import clear_session_cache
+from backend.services.classifier import clear_decision_cache, invalidate_alias_index
+from backend.services.response_cache import set_response_cache
 
 
 @pytest.fixture()
-def db_session() -> Generator:
+def session_factory() -> Generator:
     engine = create_engine(
         "sqlite://",
         connect_args={"check_same_thread": False},
@@ -19,24 +25,82 @@ def db_session() -> Generator:
     )
     TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
     Base.metadata.create_all(bind=engine)
+    # Classifier and response caches are process-wide; never let one test's data leak into the next.
+    set_response_cache(None)
+    clear_session_cache()
+    invalidate_alias_index()
+    clear_decision_cache()
 
-    session = TestingSessionLocal()
+    try:
+        yield TestingSessionLocal
+    finally:
+        Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture()
+def db_session(session_factory) -> Generator:
+    session = session_factory()
     try:
         yield session
     finally:
         session.close()
-        Base.metadata.drop_all(bind=engine)
+
+
+class CapturedSQL(list):
+    """SQL statements in execution order; on_event_loop[i] says whether statement i ran inside an event loop."""
+
+    def __init__(self):
+        super().__init__()
+        self.on_event_loop: list[bool] = []
+
+
+def _in_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
 
 
 @pytest.fixture()
-def client(db_session) -> Generator[TestClient, None, None]:
+def captured_sql(db_session):
+    """Context manager collecting every SQL statement sent to the test database while it is open."""
+
+    @contextmanager
+    def capture() -> Generator[CapturedSQL, None, None]:
+        statements = CapturedSQL()
+        engine = db_session.get_bind()
+
+        def listener(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+            statements.on_event_loop.append(_in_event_loop())
+
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+
+    return capture
+
+
+@pytest.fixture()
+def client(db_session, session_factory, monkeypatch) -> Generator[TestClient, None, None]:
     def override_get_db():
         try:
             yield db_session
         finally:
             pass
 
+    async def override_get_read_db():
+        yield ReadSession(db_session)
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_read_db
+    # Background ingestion opens its own sessions; run it inline against the test database.
+    monkeypatch.setattr(ingest, "SessionLocal", session_factory)
+    monkeypatch.setattr(jobs.settings, "ingest_queue_backend", "inline")
+    jobs.shutdown_job_queue()
 
     # Tests use an in-memory DB via dependency override; skip app startup side effects.
     original_startup = list(app.router.on_startup)
@@ -45,3 +109,4 @@ def client(db_session) -> Generator[TestClient, None, None]:
         yield test_client
     app.router.on_startup[:] = original_startup
     app.dependency_overrides.clear()
+    jobs.shutdown_job_queue()
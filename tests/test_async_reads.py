@@ -0,0 +1,84 @@
+import asyncio
+from datetime import date
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend import database
+from backend.config import settings
+from backend.database import Base, async_database_url, get_db
+from backend.main import app
+from backend.models.biomarker import BiomarkerReference
+from backend.models.lab_report import LabReportRecord, TestResultRecord
+from backend.models.user import User
+from backend.services.analytics import rebuild_user_latest
+
+
+def test_async_database_url_swaps_drivers():
+    assert async_database_url("sqlite:///./app.db") == "sqlite+aiosqlite:///./app.db"
+    assert async_database_url("mysql+pymysql://u:p@db:3306/labs") == "mysql+aiomysql://u:p@db:3306/labs"
+
+
+def test_read_endpoints_run_on_the_async_engine(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'async.db'}"
+    sync_engine = create_engine(url, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(sync_engine)
+    SyncSession = sessionmaker(bind=sync_engine, autoflush=False)
+    async_engine = create_async_engine(async_database_url(url))
+    monkeypatch.setattr(database, "_async_sessionmaker", async_sessionmaker(async_engine, expire_on_commit=False))
+    monkeypatch.setattr(settings, "database_async", True)
+
+    def override_get_db():
+        db = SyncSession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    original_startup = list(app.router.on_startup)
+    app.router.on_startup.clear()
+    try:
+        with TestClient(app) as client:
+            token = client.post("/api/auth/register", json={"email": "async@example.com", "password": "secret123"}).json()["token"]
+            headers = {"Authorization": f"Bearer {token}"}
+            with SyncSession() as db:
+                user_id = db.query(User.id).scalar()
+                glucose = BiomarkerReference(standard_name="Glucose", category="Metabolic Panel", common_aliases="[]")
+                reports = [
+                    LabReportRecord(user_id=user_id, patient_name="Async", report_date=date(2025, 1, 1)),
+                    LabReportRecord(user_id=user_id, patient_name="Async", report_date=date(2025, 2, 1)),
+                ]
+                db.add_all([glucose, *reports])
+                db.flush()
+                db.add_all(
+                    [
+                        TestResultRecord(doc_id=reports[0].doc_id, biomarker_id=glucose.id, test_name="GLUCOSE", value="90"),
+                        TestResultRecord(doc_id=reports[1].doc_id, biomarker_id=glucose.id, test_name="GLUCOSE", value="120"),
+                        TestResultRecord(doc_id=reports[1].doc_id, test_name="Zinc", value="70"),
+                    ]
+                )
+                db.flush()
+                rebuild_user_latest(db, user_id)
+                db.commit()
+                glucose_id = glucose.id
+
+            async_statements = []
+            event.listen(async_engine.sync_engine, "before_cursor_execute", lambda *args: async_statements.append(args[2]))
+            assert [r["report_date"] for r in client.get("/api/reports", headers=headers).json()] == ["2025-02-01", "2025-01-01"]
+            summary = client.get("/api/biomarkers/summary", headers=headers).json()
+            assert {item["biomarker_name"]: item["latest_value"] for item in summary} == {"Glucose": "120", "Zinc": "70"}
+            history = client.get(f"/api/biomarkers/{glucose_id}/history", headers=headers).json()
+            assert [point["value"] for point in history] == [90.0, 120.0]
+            assert client.get("/api/trends/overview", headers=headers).json()[0]["current"] == 120.0
+            snapshot = client.get("/api/dashboard/snapshot", headers=headers).json()
+            assert snapshot["unmapped"] == [{"test_name": "Zinc", "count": 1}]
+            assert snapshot["categories"] == client.get("/api/biomarkers/categories", headers=headers).json()
+            assert any("user_biomarker_latest" in sql for sql in async_statements)
+    finally:
+        app.router.on_startup[:] = original_startup
+        app.dependency_overrides.clear()
+        asyncio.run(async_engine.dispose())
+        sync_engine.dispose()
@@ -1,3 +1,15 @@
+from datetime import datetime, timedelta
+
+import pytest
+from passlib.hash import pbkdf2_sha256
+from pydantic import ValidationError
+
+from backend.config import Settings, settings
+from backend.models.user import RevokedToken, User, UserSession
+from backend.services.auth import clear_session_cache, purge_expired_revocations
+from backend.services.session_sweeper import SessionSweeper
+
+
 def test_health(client):
     response = client.get("/health")
     assert response.status_code == 200
@@ -26,3 +38,90 @@ def test_error_envelope_on_invalid_login(client):
     payload = response.json()
     assert "error" in payload
     assert payload["error"]["code"] == "HTTP_ERROR"
+
+
+def test_session_lookup_is_cached_until_logout(client, captured_sql):
+    token = client.post(
+        "/api/auth/register",
+        json={"email": "cached@example.com", "password": "secret123", "full_name": "Cached User"},
+    ).json()["token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/api/reports", headers=headers).status_code == 200
+
+    with captured_sql() as statements:
+        assert client.get("/api/reports", headers=headers).status_code == 200
+    assert not any("user_sessions" in sql for sql in statements)
+
+    assert client.post("/api/auth/logout", headers=headers).status_code == 200
+    assert client.get("/api/reports", headers=headers).status_code == 401
+
+
+def test_expired_session_is_rejected_read_only_and_swept(client, db_session, session_factory):
+    token = client.post("/api/auth/register", json={"email": "old@example.com", "password": "secret123"}).json()["token"]
+    live = client.post("/api/auth/login", json={"email": "old@example.com", "password": "secret123"}).json()["token"]
+    db_session.query(UserSession).filter(UserSession.id == token).update({"expires_at": datetime.utcnow() - timedelta(seconds=1)})
+    db_session.commit()
+    clear_session_cache()
+
+    assert client.get("/api/reports", headers={"Authorization": f"Bearer {token}"}).status_code == 401
+    assert db_session.query(UserSession).count() == 2
+
+    assert SessionSweeper(interval_seconds=60, batch_size=1, session_factory=session_factory).sweep_once() == 1
+    assert [row.id for row in db_session.query(UserSession).all()] == [live]
+
+
+def test_signed_tokens_skip_the_sessions_table(client, db_session, captured_sql, monkeypatch):
+    monkeypatch.setattr(settings, "auth_token_mode", "signed")
+    monkeypatch.setattr(settings, "auth_secret_key", "test-secret")
+    first = client.post("/api/auth/register", json={"email": "signed@example.com", "password": "secret123"}).json()["token"]
+    second = client.post("/api/auth/login", json={"email": "signed@example.com", "password": "secret123"}).json()["token"]
+    assert db_session.query(UserSession).count() == 0
+
+    with captured_sql() as statements:
+        assert client.get("/api/reports", headers={"Authorization": f"Bearer {first}"}).status_code == 200
+    assert not any("user_sessions" in sql for sql in statements)
+
+    assert client.get("/api/reports", headers={"Authorization": f"Bearer {first}x"}).status_code == 401
+
+    assert client.post("/api/auth/logout", headers={"Authorization": f"Bearer {first}"}).status_code == 200
+    assert client.get("/api/reports", headers={"Authorization": f"Bearer {first}"}).status_code == 401
+    # The revocation is shared: a replica with nothing cached (or an evicted entry) still rejects it.
+    clear_session_cache()
+    assert client.get("/api/reports", headers={"Authorization": f"Bearer {first}"}).status_code == 401
+    revoked = db_session.query(RevokedToken).one()
+    assert purge_expired_revocations(db_session, now=revoked.expires_at - timedelta(seconds=1)) == 0
+    assert purge_expired_revocations(db_session, now=revoked.expires_at + timedelta(seconds=1)) == 1
+    assert client.get("/api/reports", headers={"Authorization": f"Bearer {second}"}).status_code == 200
+
+    response = client.post("/api/auth/logout?everywhere=true", headers={"Authorization": f"Bearer {second}"})
+    assert response.status_code == 200
+    assert client.get("/api/reports", headers={"Authorization": f"Bearer {second}"}).status_code == 401
+
+
+def test_signed_mode_without_a_secret_key_fails_at_startup():
+    with pytest.raises(ValidationError, match="AUTH_SECRET_KEY"):
+        Settings(_env_file=None, auth_token_mode="signed", auth_secret_key=None)
+    assert Settings(_env_file=None, auth_token_mode="signed", auth_secret_key="k").auth_secret_key == "k"
+
+
+def test_login_rehashes_password_when_rounds_change(client, db_session):
+    legacy_hash = pbkdf2_sha256.using(rounds=1000).hash("secret123")
+    db_session.add(User(email="legacy@example.com", password_hash=legacy_hash))
+    db_session.commit()
+
+    response = client.post("/api/auth/login", json={"email": "legacy@example.com", "password": "secret123"})
+    assert response.status_code == 200
+    user = db_session.query(User).filter(User.email == "legacy@example.com").one()
+    db_session.refresh(user)
+    assert user.password_hash != legacy_hash
+    assert f"${settings.password_hash_rounds}$" in user.password_hash
+    assert client.post("/api/auth/login", json={"email": "legacy@example.com", "password": "secret123"}).status_code == 200
+    assert client.post("/api/auth/login", json={"email": "legacy@example.com", "password": "wrong"}).status_code == 401
+
+
+def test_auth_endpoints_keep_database_work_off_the_event_loop(client, captured_sql):
+    credentials = {"email": "loop@example.com", "password": "secret123"}
+    with captured_sql() as statements:
+        assert client.post("/api/auth/register", json=credentials).status_code == 200
+        assert client.post("/api/auth/login", json=credentials).status_code == 200
+    assert statements and not any(statements.on_event_loop)
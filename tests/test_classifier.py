@@ -0,0 +1,220 @@
+import json
+import threading
+import time
+
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import sessionmaker
+
+from backend.database import Base
+from backend.models.biomarker import BiomarkerCatalogState, BiomarkerReference, ClassificationCacheEntry
+from backend.services import classifier
+
+
+def _seed(db_session):
+    db_session.add_all(
+        [
+            BiomarkerReference(standard_name="Glucose", category="Metabolic Panel", common_aliases='["GLUCOSE", "FASTING GLUCOSE"]'),
+            BiomarkerReference(standard_name="ALT", category="Liver Function", common_aliases='["ALT", "SGPT"]'),
+        ]
+    )
+    db_session.commit()
+
+
+def test_classify_uses_exact_and_fuzzy_matches(db_session, monkeypatch):
+    _seed(db_session)
+    monkeypatch.setattr(classifier.settings, "classifier_enable_llm_fallback", False)
+    glucose = db_session.query(BiomarkerReference).filter_by(standard_name="Glucose").one()
+    alt = db_session.query(BiomarkerReference).filter_by(standard_name="ALT").one()
+
+    assert classifier.classify_test_name(db_session, "sgpt") == alt.id
+    assert classifier.classify_test_name(db_session, "Fasting Glucose.") == glucose.id
+    assert classifier.classify_test_name(db_session, "FASTNG GLUCOSE") == glucose.id
+    assert classifier.classify_test_name(db_session, "Zinc") is None
+
+
+def test_alias_index_built_once_and_invalidated_on_new_alias(db_session, monkeypatch):
+    _seed(db_session)
+    monkeypatch.setattr(classifier.settings, "classifier_enable_llm_fallback", False)
+    builds = []
+    original_build = classifier._build_alias_index
+
+    def counting_build(db):
+        builds.append(1)
+        return original_build(db)
+
+    monkeypatch.setattr(classifier, "_build_alias_index", counting_build)
+    classifier.classify_many(db_session, ["GLUCOSE", "SGPT", "HGB", "Zinc"])
+    assert len(builds) == 1
+
+    alt = db_session.query(BiomarkerReference).filter_by(standard_name="ALT").one()
+    classifier._save_alias_if_new(db_session, alt, "Alanine Aminotransferase")
+    assert "Alanine Aminotransferase" in json.loads(alt.common_aliases)
+    db_session.commit()
+    assert classifier.classify_test_name(db_session, "ALANINE AMINOTRANSFERASE") == alt.id
+    assert len(builds) == 2
+
+
+def test_rolled_back_alias_never_reaches_the_index(db_session, monkeypatch):
+    _seed(db_session)
+    monkeypatch.setattr(classifier.settings, "classifier_enable_llm_fallback", False)
+    alt = db_session.query(BiomarkerReference).filter_by(standard_name="ALT").one()
+    classifier._save_alias_if_new(db_session, alt, "Alanine Aminotransferase")
+    assert "alanineaminotransferase" in classifier._get_alias_index(db_session).exact
+    db_session.rollback()
+
+    index = classifier._get_alias_index(db_session)
+    assert "alanineaminotransferase" not in index.exact
+
+
+def test_alias_learned_by_another_process_is_picked_up(db_session, monkeypatch):
+    _seed(db_session)
+    monkeypatch.setattr(classifier.settings, "classifier_enable_llm_fallback", False)
+    assert classifier.classify_test_name(db_session, "Alanine Aminotransferase") is None
+    db_session.commit()
+
+    # Another worker learns the alias: same tables, but no invalidation reaches this process.
+    alt = db_session.query(BiomarkerReference).filter_by(standard_name="ALT").one()
+    db_session.execute(
+        update(BiomarkerReference)
+        .where(BiomarkerReference.id == alt.id)
+        .values(common_aliases='["ALT", "SGPT", "Alanine Aminotransferase"]')
+    )
+    classifier.bump_catalog_version(db_session)
+    db_session.commit()
+
+    assert classifier.classify_test_name(db_session, "Alanine Aminotransferase") == alt.id
+    entry = db_session.get(ClassificationCacheEntry, "alanineaminotransferase")
+    assert entry.catalog_version == str(db_session.get(BiomarkerCatalogState, 1).version) == "1"
+
+
+def test_build_started_before_invalidation_is_not_kept(db_session, monkeypatch):
+    _seed(db_session)
+    original_build = classifier._build_alias_index
+
+    def build_then_invalidate(db):
+        index = original_build(db)
+        classifier.invalidate_alias_index()  # a commit landed while this build was reading
+        return index
+
+    monkeypatch.setattr(classifier, "_build_alias_index", build_then_invalidate)
+    classifier._get_alias_index(db_session)
+    assert classifier._alias_index is None
+
+
+def test_classify_many_scores_batch_and_sends_leftovers_to_llm_once(db_session, monkeypatch):
+    _seed(db_session)
+    glucose = db_session.query(BiomarkerReference).filter_by(standard_name="Glucose").one()
+    alt = db_session.query(BiomarkerReference).filter_by(standard_name="ALT").one()
+    llm_calls = []
+
+    def fake_llm_match_many(db, test_names):
+        llm_calls.append(list(test_names))
+        return {name: None for name in test_names}
+
+    monkeypatch.setattr(classifier, "_llm_match_many", fake_llm_match_many)
+    result = classifier.classify_many(db_session, ["GLUCOSE", "glucose", "SGPT", "FASTNG GLUCOSE", "Zinc", "Copper"])
+
+    assert result == {
+        "GLUCOSE": glucose.id,
+        "glucose": glucose.id,
+        "SGPT": alt.id,
+        "FASTNG GLUCOSE": glucose.id,
+        "Zinc": None,
+        "Copper": None,
+    }
+    assert llm_calls == [["Zinc", "Copper"]]
+
+
+class _StubLLM:
+    def __init__(self, decide):
+        self.decide = decide
+        self.prompts: list[str] = []
+
+    def complete(self, prompt: str):
+        self.prompts.append(prompt)
+        names = json.loads(prompt.split("Raw test names: ", 1)[1].split("\n", 1)[0])
+        matches = [{"test_name": name, **self.decide(name)} for name in names]
+        return type("Completion", (), {"text": json.dumps({"matches": matches})})()
+
+
+def test_llm_fallback_batches_unmatched_names_into_one_request(db_session, monkeypatch):
+    _seed(db_session)
+    alt = db_session.query(BiomarkerReference).filter_by(standard_name="ALT").one()
+
+    def decide(name):
+        if name == "Alanine Aminotransferase":
+            return {"match_id": alt.id, "confidence": 0.95}
+        if name == "Serum Transaminase":
+            return {"match_id": alt.id, "confidence": 0.5}
+        return {"match_id": None, "confidence": 0.0}
+
+    stub = _StubLLM(decide)
+    monkeypatch.setattr(classifier, "_get_llm_client", lambda: stub)
+    result = classifier.classify_many(db_session, ["GLUCOSE", "Alanine Aminotransferase", "Serum Transaminase", "Zinc"])
+
+    assert len(stub.prompts) == 1
+    assert result["Alanine Aminotransferase"] == alt.id
+    assert result["Serum Transaminase"] is None
+    assert result["Zinc"] is None
+    assert "Alanine Aminotransferase" in json.loads(alt.common_aliases)
+    assert "Serum Transaminase" not in json.loads(alt.common_aliases)
+
+
+def test_seen_names_are_served_from_decision_cache(db_session, monkeypatch):
+    _seed(db_session)
+    monkeypatch.setattr(classifier.settings, "classifier_enable_llm_fallback", False)
+    glucose = db_session.query(BiomarkerReference).filter_by(standard_name="Glucose").one()
+    first = classifier.classify_many(db_session, ["GLUCOSE", "FASTNG GLUCOSE", "Zinc"])
+    db_session.commit()
+
+    entries = {row.name_key: row for row in db_session.query(ClassificationCacheEntry).all()}
+    assert entries["glucose"].source == "exact"
+    assert entries["fastngglucose"].source == "fuzzy"
+    assert entries["zinc"].biomarker_id is None
+    assert entries["zinc"].expires_at is not None
+    assert entries["glucose"].expires_at is None
+
+    def fail(*args, **kwargs):
+        raise AssertionError("cached names must not be re-scored")
+
+    monkeypatch.setattr(classifier, "_fuzzy_match_many", fail)
+    monkeypatch.setattr(classifier, "_fuzzy_match_biomarker", fail)
+    monkeypatch.setattr(classifier, "_llm_match_many", fail)
+    # Drop the in-process layer so the table is what answers.
+    classifier.clear_decision_cache()
+    assert classifier.classify_many(db_session, ["GLUCOSE", "FASTNG GLUCOSE", "Zinc"]) == first
+    assert classifier.classify_test_name(db_session, "Fastng Glucose") == glucose.id
+
+
+def test_concurrent_ingests_caching_the_same_new_name_both_commit(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'classify.db'}", connect_args={"check_same_thread": False, "timeout": 10})
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    with Session() as db:
+        _seed(db)
+    monkeypatch.setattr(classifier.settings, "classifier_enable_llm_fallback", False)
+
+    first, second = Session(), Session()
+    classifier.classify_many(first, ["Zinc", "GLUCOSE"])
+    errors = []
+
+    def other_worker():
+        try:
+            classifier.classify_many(second, ["Zinc", "GLUCOSE"])
+            second.commit()
+        except Exception as exc:  # surfaced by the assertion below
+            errors.append(exc)
+
+    classifier.clear_decision_cache()  # the other worker has its own in-process cache
+    worker = threading.Thread(target=other_worker)
+    worker.start()
+    time.sleep(0.2)
+    first.commit()
+    worker.join()
+    first.close()
+    second.close()
+
+    assert errors == []
+    with Session() as db:
+        assert sorted(row.name_key for row in db.query(ClassificationCacheEntry)) == ["glucose", "zinc"]
+    engine.dispose()
@@ -0,0 +1,183 @@
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert, select, text, update
+from sqlalchemy.orm import sessionmaker
+
+from backend import database
+from backend.database import Base, InstrumentedQueuePool, engine_options, get_db, pool_status, tune_engine
+from backend.main import app
+from backend.models.lab_report import LabReportRecord, TestResultRecord
+from backend.models.user import User
+from backend.services.analytics import bump_data_version, ranked_results_subquery
+from backend.services.auth import clear_session_cache
+from backend.services.consistency import count_result_drift, repair_result_drift
+from backend.services.dashboard import history_query, latest_rows_query, unmapped_counts_query
+
+
+def test_sqlite_file_engine_gets_wal_and_pragmas(tmp_path):
+    url = f"sqlite:///{tmp_path / 'tuned.db'}"
+    engine = tune_engine(create_engine(url, **engine_options(url)))
+    with engine.connect() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert connection.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert connection.execute(text("PRAGMA cache_size")).scalar() < 0
+    assert isinstance(engine.pool, InstrumentedQueuePool)
+    engine.dispose()
+
+
+def test_in_memory_sqlite_skips_wal_and_pool_sizing():
+    options = engine_options("sqlite://")
+    assert "pool_size" not in options
+    engine = tune_engine(create_engine("sqlite://", **options))
+    with engine.connect() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar() == "memory"
+
+
+def test_pool_reports_waits_and_overflow(tmp_path):
+    url = f"sqlite:///{tmp_path / 'pool.db'}"
+    engine = create_engine(url, **{**engine_options(url), "pool_size": 1, "max_overflow": 1})
+    first, second = engine.connect(), engine.connect()
+    assert pool_status(engine)["overflow"] == 1
+
+    waiter = threading.Thread(target=lambda: engine.connect().close())
+    waiter.start()
+    waiter.join(0.2)
+    first.close()
+    waiter.join()
+    second.close()
+
+    status = pool_status(engine)
+    assert status["checkouts"] == 3
+    assert status["connects"] == 2
+    assert status["waits"] == 1
+    assert status["overflow_peak"] == 1
+    assert status["checkout_ms_max"] >= 100
+    engine.dispose()
+
+
+def test_db_pool_endpoint_reports_the_app_engine():
+    body = TestClient(app).get("/health/db-pool").json()
+    assert "pool" in body["sync"]
+
+
+def test_reads_go_to_the_replica_outside_the_read_your_writes_window(tmp_path, monkeypatch):
+    primary_path, replica_path = tmp_path / "primary.db", tmp_path / "replica.db"
+    urls = [f"sqlite:///{path}" for path in (primary_path, replica_path)]
+    engines = [tune_engine(create_engine(url, **engine_options(url))) for url in urls]
+    Primary, Replica = (sessionmaker(bind=e, autoflush=False) for e in engines)
+    Base.metadata.create_all(engines[0])
+
+    def replicate():
+        with sqlite3.connect(primary_path) as source, sqlite3.connect(replica_path) as target:
+            source.backup(target)
+
+    def override_get_db():
+        db = Primary()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    clear_session_cache()
+    monkeypatch.setattr(database, "ReplicaSessionLocal", Replica)
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        client = TestClient(app)
+        token = client.post("/api/auth/register", json={"email": "replica@example.com", "password": "secret123"}).json()["token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        replicate()
+
+        with Primary() as db:
+            user_id = db.query(User.id).scalar()
+            db.add(LabReportRecord(user_id=user_id, patient_name="Replica", report_date=date(2025, 3, 1)))
+            bump_data_version(db, user_id)
+            db.commit()
+        # Just wrote: the replica hasn't caught up, so reads stay on the primary.
+        assert len(client.get("/api/reports", headers=headers).json()) == 1
+
+        with Primary() as db:
+            db.execute(update(User).values(data_modified_at=datetime.utcnow() - timedelta(hours=1)))
+            db.commit()
+        assert client.get("/api/reports", headers=headers).json() == []
+        replicate()
+        assert len(client.get("/api/reports", headers=headers).json()) == 1
+    finally:
+        app.dependency_overrides.clear()
+        for engine in engines:
+            engine.dispose()
+
+
+def _query_plan(connection, statement) -> list[str]:
+    sql = str(statement.compile(connection.engine, compile_kwargs={"literal_binds": True}))
+    return [row[3] for row in connection.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+
+
+def test_read_queries_use_the_composite_indexes():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    users = [f"user-{n}" for n in range(50)]
+    with engine.begin() as connection:
+        connection.execute(insert(User), [{"id": u, "email": f"{u}@example.com", "password_hash": "x"} for u in users])
+        reports = [
+            {"doc_id": f"{u}-{n}", "user_id": u, "patient_name": "P", "report_date": date(2025, 1, n + 1)}
+            for u in users
+            for n in range(5)
+        ]
+        connection.execute(insert(LabReportRecord), reports)
+        connection.execute(
+            insert(TestResultRecord),
+            [
+                {"doc_id": r["doc_id"], "user_id": r["user_id"], "report_date": r["report_date"], "biomarker_id": b, "test_name": f"T{b}"}
+                for r in reports
+                for b in range(1, 11)
+            ],
+        )
+        connection.execute(text("ANALYZE"))
+
+    with engine.connect() as connection:
+        # Per-user biomarker reads are one range scan of test_results, no join.
+        history = _query_plan(connection, history_query("user-0", 3))
+        unmapped = _query_plan(connection, unmapped_counts_query("user-0"))
+        for plan in (history, unmapped):
+            assert plan[0] == "SEARCH test_results USING INDEX ix_test_results_user_biomarker_date (user_id=? AND biomarker_id=?)"
+            assert not any("lab_reports" in step for step in plan)
+
+        # Summary and overview read the maintained latest table by its primary key...
+        latest = _query_plan(connection, latest_rows_query("user-0"))
+        assert latest[0].startswith("SEARCH user_biomarker_latest USING INDEX sqlite_autoindex_user_biomarker_latest_1 (user_id=?)")
+        # ...which is rebuilt from the ranked window query over the user's reports.
+        ranked = _query_plan(connection, select(ranked_results_subquery("user-0")))
+        assert any("lab_reports USING INDEX ix_lab_reports_user_report_date (user_id=?)" in step for step in ranked)
+        assert any("test_results USING INDEX ix_test_results_doc_biomarker (doc_id=?)" in step for step in ranked)
+
+        for plan in (history, unmapped, latest, ranked):
+            assert not any(step.startswith(("SCAN lab_reports", "SCAN test_results")) for step in plan)
+
+
+def test_consistency_check_repairs_drifted_result_columns(db_session):
+    user = User(email="drift@example.com", password_hash="x")
+    db_session.add(user)
+    db_session.flush()
+    report = LabReportRecord(user_id=user.id, patient_name="Drift", report_date=date(2025, 4, 1))
+    db_session.add(report)
+    db_session.flush()
+    result = TestResultRecord(doc_id=report.doc_id, test_name="GLUCOSE", value="90")
+    db_session.add(result)
+    db_session.commit()
+    assert (result.user_id, result.report_date) == (user.id, date(2025, 4, 1))
+    assert count_result_drift(db_session) == 0
+
+    report.report_date = date(2025, 5, 1)
+    db_session.commit()
+    assert count_result_drift(db_session) == 1
+
+    assert repair_result_drift(db_session) == 1
+    db_session.commit()
+    db_session.refresh(result)
+    db_session.refresh(user)
+    assert result.report_date == date(2025, 5, 1)
+    assert count_result_drift(db_session) == 0
+    assert user.data_version == 1
@@ -1,5 +1,21 @@
+import hashlib
+import io
+import os
+import tempfile
+import zipfile
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.database import Base
+from backend.models.biomarker import BiomarkerReference, ClassificationCacheEntry
+from backend.models.lab_report import IngestJob, LabReportRecord, ParseArtifact, TestResultRecord
 from backend.models.user import User
 from backend.schemas.lab_report import LabReport, PatientInfo, TestResult
+from backend.routers import reports
+from backend.services import classifier, ingest
+from backend.services.job_heartbeat import JobHeartbeat
 
 
 def _register_and_token(client) -> str:
@@ -14,8 +30,13 @@ def _register_and_token(client) -> str:
 def test_upload_report_with_mocked_parser(client, db_session, monkeypatch):
     token = _register_and_token(client)
 
-    def fake_parse_pdf_bytes(file_bytes: bytes, file_name: str, llama_api_key=None) -> str:
+    spooled_paths = []
+
+    def fake_parse_pdf_file(file_path: str, file_name: str, llama_api_key=None) -> str:
         assert file_name.endswith(".pdf")
+        with open(file_path, "rb") as handle:
+            assert handle.read() == b"%PDF-1.4 mock"
+        spooled_paths.append(file_path)
         return "mock parsed text"
 
     def fake_extract_lab_data(parsed_text: str, openai_api_key=None) -> LabReport:
@@ -37,17 +58,332 @@ def test_upload_report_with_mocked_parser(client, db_session, monkeypatch):
             ],
         )
 
-    monkeypatch.setattr("backend.routers.reports.parse_pdf_bytes", fake_parse_pdf_bytes)
-    monkeypatch.setattr("backend.routers.reports.extract_lab_data", fake_extract_lab_data)
+    monkeypatch.setattr("backend.services.ingest.parse_pdf_file", fake_parse_pdf_file)
+    monkeypatch.setattr("backend.services.ingest.extract_lab_data", fake_extract_lab_data)
 
+    headers = {"Authorization": f"Bearer {token}"}
     files = {"file": ("sample.pdf", b"%PDF-1.4 mock", "application/pdf")}
-    response = client.post("/api/reports/upload", files=files, headers={"Authorization": f"Bearer {token}"})
-    assert response.status_code == 200
-    payload = response.json()
+    response = client.post("/api/reports/upload", files=files, headers=headers)
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+
+    job_response = client.get(f"/api/reports/jobs/{job_id}", headers=headers)
+    assert job_response.status_code == 200
+    job = job_response.json()
+    assert job["status"] == "completed"
+    assert job["progress"] == 100
+    payload = job["result"]
     assert payload["tests"] == 1
     assert payload["mapped_tests"] >= 0
-    assert "doc_id" in payload
+    assert payload["doc_id"] == job["doc_id"]
+    stored = db_session.query(TestResultRecord).filter(TestResultRecord.doc_id == payload["doc_id"]).all()
+    assert payload["test_result_ids"] == [row.id for row in stored]
+    assert stored[0].test_name == "GLUCOSE"
+    assert stored[0].value == "95"
+    # The spool file handed to the parser is removed once the job finishes.
+    assert spooled_paths and not os.path.exists(spooled_paths[0])
 
     # Ensure report row persisted for the current user.
     user = db_session.query(User).filter(User.email == "uploader@example.com").first()
     assert user is not None
+    assert (stored[0].user_id, stored[0].report_date) == (user.id, date(2025, 1, 1))
+
+
+def test_failed_ingest_job_reports_error(client, monkeypatch):
+    token = _register_and_token(client)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    def broken_parse_pdf_file(file_path: str, file_name: str, llama_api_key=None) -> str:
+        raise RuntimeError("LLAMA_CLOUD_API_KEY is missing")
+
+    monkeypatch.setattr("backend.services.ingest.parse_pdf_file", broken_parse_pdf_file)
+    files = {"file": ("sample.pdf", b"%PDF-1.4 mock", "application/pdf")}
+    job_id = client.post("/api/reports/upload", files=files, headers=headers).json()["job_id"]
+
+    job = client.get(f"/api/reports/jobs/{job_id}", headers=headers).json()
+    assert job["status"] == "failed"
+    assert job["stage"] == "parsing"
+    assert job["error"] == "LLAMA_CLOUD_API_KEY is missing"
+    assert job["doc_id"] is None
+
+    assert client.get("/api/reports/jobs/not-a-job", headers=headers).status_code == 404
+
+
+def test_only_jobs_without_a_live_owner_are_failed(client, db_session, session_factory):
+    _register_and_token(client)
+    user = db_session.query(User).one()
+    live_spool, dead_spool = (tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) for _ in range(2))
+    live_spool.close()
+    dead_spool.close()
+    long_ago = datetime.utcnow() - timedelta(hours=1)
+    db_session.add_all(
+        [
+            # Another worker's job, still heartbeating: untouched.
+            IngestJob(id="live", user_id=user.id, owner="worker-b", spool_path=live_spool.name, status="running"),
+            # This process's job, last refreshed long ago but about to be refreshed again.
+            IngestJob(id="mine", user_id=user.id, owner="worker-a", heartbeat_at=long_ago),
+            # A crashed worker's jobs.
+            IngestJob(id="dead", user_id=user.id, owner="worker-c", spool_path=dead_spool.name, heartbeat_at=long_ago),
+            IngestJob(id="dead-running", user_id=user.id, owner="worker-c", status="running", heartbeat_at=long_ago),
+            IngestJob(id="done", user_id=user.id, status="completed", stage="completed", heartbeat_at=long_ago),
+        ]
+    )
+    db_session.commit()
+
+    heartbeat = JobHeartbeat(interval_seconds=30, stale_seconds=300, owner="worker-a", session_factory=session_factory)
+    assert heartbeat.beat_once() == 2
+    db_session.expire_all()
+    statuses = {job.id: job.status for job in db_session.query(IngestJob)}
+    assert statuses == {"live": "running", "mine": "queued", "dead": "failed", "dead-running": "failed", "done": "completed"}
+    assert "restart" in db_session.get(IngestJob, "dead").error
+    assert os.path.exists(live_spool.name) and not os.path.exists(dead_spool.name)
+    assert heartbeat.beat_once() == 0
+    os.unlink(live_spool.name)
+
+
+def test_failed_ingest_job_commits_nothing_but_its_status(tmp_path, monkeypatch):
+    # A file database, so the job status session and the ingest session are separate connections.
+    engine = create_engine(f"sqlite:///{tmp_path / 'ingest.db'}", connect_args={"check_same_thread": False, "timeout": 0.2})
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    with Session() as db:
+        user = User(email="atomic@example.com", password_hash="x")
+        db.add_all([user, BiomarkerReference(standard_name="Glucose", category="Metabolic Panel", common_aliases='["GLUCOSE"]')])
+        db.flush()
+        db.add(IngestJob(id="job", user_id=user.id))
+        db.commit()
+    classifier.invalidate_alias_index()
+    classifier.clear_decision_cache()
+
+    def failing_record_new_results(*args):
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(ingest, "SessionLocal", Session)
+    monkeypatch.setattr(ingest, "parse_pdf_file", lambda file_path, file_name: "parsed")
+    extracted = LabReport(
+        patient_info=PatientInfo(name="Atomic Patient"),
+        test_results=[TestResult(test_name="GLUCOSE", value="95"), TestResult(test_name="Mystery Marker", value="1")],
+    )
+    monkeypatch.setattr(ingest, "extract_lab_data", lambda text: extracted)
+    monkeypatch.setattr(ingest, "record_new_results", failing_record_new_results)
+    monkeypatch.setattr(classifier.settings, "classifier_enable_llm_fallback", False)
+    spool = tmp_path / "report.pdf"
+    spool.write_bytes(b"%PDF-1.4 atomic")
+
+    ingest.run_ingest_job("job", str(spool), "report.pdf")
+
+    with Session() as db:
+        job = db.get(IngestJob, "job")
+        assert (job.status, job.error) == ("failed", "disk full")
+        assert db.query(LabReportRecord).count() == 0
+        assert db.query(ClassificationCacheEntry).count() == 0
+    classifier.invalidate_alias_index()
+    classifier.clear_decision_cache()
+    engine.dispose()
+
+
+def test_reupload_is_served_from_parse_cache_and_can_dedupe(client, db_session, monkeypatch):
+    token = _register_and_token(client)
+    headers = {"Authorization": f"Bearer {token}"}
+    parse_calls = []
+
+    def fake_parse_pdf_file(file_path: str, file_name: str, llama_api_key=None) -> str:
+        parse_calls.append(file_name)
+        return "mock parsed text"
+
+    def fake_extract_lab_data(parsed_text: str, openai_api_key=None) -> LabReport:
+        return LabReport(
+            patient_info=PatientInfo(name="Mock Patient"),
+            test_results=[TestResult(test_name="GLUCOSE", value="95")],
+        )
+
+    monkeypatch.setattr("backend.services.ingest.parse_pdf_file", fake_parse_pdf_file)
+    monkeypatch.setattr("backend.services.ingest.extract_lab_data", fake_extract_lab_data)
+
+    def upload(url: str) -> dict:
+        files = {"file": ("sample.pdf", b"%PDF-1.4 same bytes", "application/pdf")}
+        job_id = client.post(url, files=files, headers=headers).json()["job_id"]
+        return client.get(f"/api/reports/jobs/{job_id}", headers=headers).json()
+
+    first = upload("/api/reports/upload")
+    second = upload("/api/reports/upload")
+    assert first["status"] == second["status"] == "completed"
+    assert first["doc_id"] != second["doc_id"]
+    assert parse_calls == ["sample.pdf"]
+
+    digest = hashlib.sha256(b"%PDF-1.4 same bytes").hexdigest()
+    assert db_session.get(ParseArtifact, digest) is not None
+    assert db_session.query(LabReportRecord).filter(LabReportRecord.file_sha256 == digest).count() == 2
+
+    deduped = upload("/api/reports/upload?dedupe=true")
+    assert deduped["doc_id"] == first["doc_id"]
+    assert deduped["result"]["duplicate"] is True
+    assert deduped["result"]["tests"] == 1
+    assert db_session.query(LabReportRecord).count() == 2
+
+
+def test_empty_or_outdated_parse_artifacts_are_not_reused(client, db_session, monkeypatch):
+    token = _register_and_token(client)
+    headers = {"Authorization": f"Bearer {token}"}
+    parse_calls = []
+    extracted = [LabReport(patient_info=PatientInfo(name="Mock Patient"))]
+
+    def fake_parse_pdf_file(file_path: str, file_name: str, llama_api_key=None) -> str:
+        parse_calls.append(file_name)
+        return "mock parsed text"
+
+    monkeypatch.setattr("backend.services.ingest.parse_pdf_file", fake_parse_pdf_file)
+    monkeypatch.setattr("backend.services.ingest.extract_lab_data", lambda text: extracted[-1])
+
+    def upload() -> dict:
+        files = {"file": ("sample.pdf", b"%PDF-1.4 flaky", "application/pdf")}
+        job_id = client.post("/api/reports/upload", files=files, headers=headers).json()["job_id"]
+        return client.get(f"/api/reports/jobs/{job_id}", headers=headers).json()
+
+    digest = hashlib.sha256(b"%PDF-1.4 flaky").hexdigest()
+    assert upload()["result"]["tests"] == 0
+    assert db_session.get(ParseArtifact, digest) is None
+
+    extracted.append(
+        LabReport(patient_info=PatientInfo(name="Mock Patient"), test_results=[TestResult(test_name="GLUCOSE", value="95")])
+    )
+    assert upload()["result"]["tests"] == 1
+    assert upload()["result"]["tests"] == 1
+    assert parse_calls == ["sample.pdf"] * 2
+
+    # A new parser or prompt changes EXTRACTOR_VERSION; the old artifact is re-parsed and replaced.
+    monkeypatch.setattr("backend.services.ingest.EXTRACTOR_VERSION", "next")
+    assert upload()["status"] == "completed"
+    assert len(parse_calls) == 3
+    db_session.expire_all()
+    assert db_session.get(ParseArtifact, digest).extractor_version == "next"
+
+
+def test_upload_over_size_limit_is_rejected(client, monkeypatch):
+    token = _register_and_token(client)
+    monkeypatch.setattr("backend.services.uploads.settings.upload_max_bytes", 1024)
+    monkeypatch.setattr("backend.services.uploads.settings.upload_chunk_bytes", 256)
+
+    files = {"file": ("big.pdf", b"%PDF" + b"0" * 2048, "application/pdf")}
+    response = client.post("/api/reports/upload", files=files, headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 413
+    assert "upload limit" in response.json()["error"]["details"]["reason"]
+
+
+def test_bulk_upload_ingests_pdfs_and_zip_members_independently(client, db_session, monkeypatch):
+    token = _register_and_token(client)
+    headers = {"Authorization": f"Bearer {token}"}
+    db_session.add(BiomarkerReference(standard_name="Glucose", category="Metabolic Panel", common_aliases='["GLUCOSE"]'))
+    db_session.commit()
+
+    def fake_parse_pdf_file(file_path: str, file_name: str, llama_api_key=None) -> str:
+        if file_name == "corrupt.pdf":
+            raise RuntimeError("Could not parse corrupt.pdf")
+        return f"parsed {file_name}"
+
+    def fake_extract_lab_data(parsed_text: str, openai_api_key=None) -> LabReport:
+        return LabReport(
+            patient_info=PatientInfo(name="Bulk Patient"),
+            test_results=[TestResult(test_name="GLUCOSE", value="95"), TestResult(test_name="Mystery Marker", value="1")],
+        )
+
+    monkeypatch.setattr("backend.services.ingest.parse_pdf_file", fake_parse_pdf_file)
+    monkeypatch.setattr("backend.services.ingest.extract_lab_data", fake_extract_lab_data)
+    monkeypatch.setattr("backend.services.classifier.settings.classifier_enable_llm_fallback", False)
+
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("2023/march.pdf", b"%PDF-1.4 march")
+        zf.writestr("2023/corrupt.pdf", b"%PDF-1.4 corrupt")
+        zf.writestr("2023/notes.txt", b"not a report")
+    files = [
+        ("files", ("january.pdf", b"%PDF-1.4 january", "application/pdf")),
+        ("files", ("history.zip", archive.getvalue(), "application/zip")),
+    ]
+    response = client.post("/api/reports/bulk-upload", files=files, headers=headers)
+    assert response.status_code == 202
+    queued = response.json()["jobs"]
+    assert {job["status"] for job in queued} == {"queued"}
+
+    # Each PDF became its own ingest job on the shared queue (inline here, so they have already run).
+    jobs = [client.get(f"/api/reports/jobs/{job['job_id']}", headers=headers).json() for job in queued]
+    by_name = {job["filename"]: job for job in jobs}
+    assert set(by_name) == {"january.pdf", "march.pdf", "corrupt.pdf"}
+    assert by_name["corrupt.pdf"]["status"] == "failed"
+    assert by_name["corrupt.pdf"]["error"] == "Could not parse corrupt.pdf"
+    assert by_name["corrupt.pdf"]["doc_id"] is None
+    for name in ("january.pdf", "march.pdf"):
+        assert by_name[name]["status"] == "completed"
+        assert by_name[name]["result"]["tests"] == 2
+        assert by_name[name]["result"]["unmapped_tests_count"] == 1
+    assert db_session.query(LabReportRecord).count() == 2
+    assert all(not os.path.exists(job.spool_path) for job in db_session.query(IngestJob))
+
+
+def test_bulk_upload_checks_the_file_limit_before_spooling(client, db_session, monkeypatch):
+    token = _register_and_token(client)
+    monkeypatch.setattr("backend.routers.reports.settings.bulk_upload_max_files", 2)
+    spooled = []
+    real_spool_upload = reports.spool_upload
+
+    async def counting_spool_upload(upload):
+        spooled.append(upload.filename)
+        return await real_spool_upload(upload)
+
+    monkeypatch.setattr(reports, "spool_upload", counting_spool_upload)
+    files = [("files", (f"{n}.pdf", b"%PDF-1.4", "application/pdf")) for n in range(4)]
+    response = client.post("/api/reports/bulk-upload", files=files, headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 413
+    assert spooled == ["0.pdf", "1.pdf"]
+    assert db_session.query(IngestJob).count() == 0
+
+
+def test_bulk_upload_rejects_unsupported_files(client):
+    token = _register_and_token(client)
+    files = [("files", ("notes.txt", b"hello", "text/plain"))]
+    response = client.post("/api/reports/bulk-upload", files=files, headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 400
+
+
+def test_latest_biomarkers_follow_uploads_and_deletes(client, db_session, monkeypatch):
+    token = _register_and_token(client)
+    headers = {"Authorization": f"Bearer {token}"}
+    db_session.add(BiomarkerReference(standard_name="Glucose", category="Metabolic Panel", common_aliases='["GLUCOSE"]'))
+    db_session.commit()
+
+    def fake_parse_pdf_file(file_path: str, file_name: str, llama_api_key=None) -> str:
+        with open(file_path, "rb") as handle:
+            return handle.read().decode()
+
+    def fake_extract_lab_data(parsed_text: str, openai_api_key=None) -> LabReport:
+        report_date, value = parsed_text.split("|")
+        return LabReport(
+            patient_info=PatientInfo(name="Mock Patient"),
+            report_date=report_date,
+            test_results=[TestResult(test_name="GLUCOSE", value=value, unit="MG/DL")],
+        )
+
+    monkeypatch.setattr("backend.services.ingest.parse_pdf_file", fake_parse_pdf_file)
+    monkeypatch.setattr("backend.services.ingest.extract_lab_data", fake_extract_lab_data)
+
+    doc_ids = []
+    # Uploaded out of date order: the incremental update must still pick the newest report.
+    for content in (b"2025-03-01|120", b"2025-01-01|90", b"2025-02-01|100"):
+        response = client.post("/api/reports/upload", files={"file": ("r.pdf", content, "application/pdf")}, headers=headers)
+        job = client.get(f"/api/reports/jobs/{response.json()['job_id']}", headers=headers).json()
+        doc_ids.append(job["doc_id"])
+
+    summary = client.get("/api/biomarkers/summary", headers=headers).json()
+    assert [(item["biomarker_name"], item["latest_value"]) for item in summary] == [("Glucose", "120")]
+    trend = client.get("/api/trends/overview", headers=headers).json()[0]
+    assert (trend["previous"], trend["current"]) == (100.0, 120.0)
+    assert trend["previous_report_date"] == "2025-02-01"
+
+    response = client.delete(f"/api/reports/{doc_ids[0]}", headers=headers)
+    assert response.status_code == 200
+    assert client.get(f"/api/reports/{doc_ids[0]}", headers=headers).status_code == 404
+
+    summary = client.get("/api/biomarkers/summary", headers=headers).json()
+    assert summary[0]["latest_value"] == "100"
+    trend = client.get("/api/trends/overview", headers=headers).json()[0]
+    assert (trend["previous"], trend["current"]) == (90.0, 100.0)
@@ -1,9 +1,17 @@
-from datetime import date, datetime
+import asyncio
+from datetime import date, datetime, timezone
+from email.utils import format_datetime
 
-from backend.models.biomarker import BiomarkerReference
+import pytest
+
+from backend.models.biomarker import BiomarkerCatalogState, BiomarkerReference
 from backend.models.lab_report import LabReportRecord, TestResultRecord
 from backend.models.user import User
+from backend.services.analytics import rebuild_user_latest
 from backend.services.auth import hash_password
+from backend.services.classifier import bump_catalog_version, invalidate_alias_index
+from backend.services.response_cache import SharedResponseCache, set_response_cache
+from backend.services.trend_analyzer import parse_value
 
 
 def _create_user_and_token(client, db_session):
@@ -50,6 +58,8 @@ def test_trends_overview_returns_delta(client, db_session):
             TestResultRecord(doc_id=r2.doc_id, biomarker_id=biomarker.id, test_name="GLUCOSE", value="100"),
         ]
     )
+    db_session.flush()
+    rebuild_user_latest(db_session, user.id)
     db_session.commit()
 
     response = client.get("/api/trends/overview", headers={"Authorization": f"Bearer {token}"})
@@ -59,3 +69,263 @@ def test_trends_overview_returns_delta(client, db_session):
     assert payload[0]["biomarker"] == "Glucose"
     assert payload[0]["direction"] in {"up", "down", "stable"}
     assert "category" in payload[0]
+
+
+@pytest.mark.parametrize(
+    "raw, expected",
+    [
+        ("95", (95.0, None)),
+        ("12.5 H", (12.5, None)),
+        ("1,234", (1234.0, None)),
+        ("<5", (5.0, "<")),
+        ("≥ 60", (60.0, ">=")),
+        ("1.2-3.4", (2.3, "range")),
+        ("-3", (-3.0, None)),
+        ("Negative", (None, None)),
+        (None, (None, None)),
+    ],
+)
+def test_parse_value(raw, expected):
+    numeric, qualifier = parse_value(raw)
+    assert qualifier == expected[1]
+    assert numeric == pytest.approx(expected[0]) if expected[0] is not None else numeric is None
+
+
+def test_history_reads_typed_values(client, db_session):
+    user, token = _create_user_and_token(client, db_session)
+    biomarker = BiomarkerReference(standard_name="CRP", category="Inflammation", common_aliases='["CRP"]')
+    report = LabReportRecord(user_id=user.id, patient_name="Trend User", report_date=date(2025, 3, 1))
+    db_session.add_all([biomarker, report])
+    db_session.flush()
+    db_session.add(TestResultRecord(doc_id=report.doc_id, biomarker_id=biomarker.id, test_name="CRP", value="<0.5"))
+    db_session.commit()
+
+    response = client.get(f"/api/biomarkers/{biomarker.id}/history", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    point = response.json()[0]
+    assert point["value"] == 0.5
+    assert point["value_qualifier"] == "<"
+    assert point["raw_value"] == "<0.5"
+
+
+def test_summary_returns_latest_result_per_biomarker(client, db_session):
+    user, token = _create_user_and_token(client, db_session)
+    glucose = BiomarkerReference(standard_name="Glucose", category="Metabolic Panel", common_aliases='["GLUCOSE"]')
+    db_session.add(glucose)
+    reports = [
+        LabReportRecord(user_id=user.id, patient_name="Trend User", report_date=None),
+        LabReportRecord(user_id=user.id, patient_name="Trend User", report_date=date(2025, 3, 1)),
+        LabReportRecord(user_id=user.id, patient_name="Trend User", report_date=date(2025, 1, 1)),
+    ]
+    db_session.add_all(reports)
+    db_session.flush()
+    db_session.add_all(
+        [
+            TestResultRecord(doc_id=reports[0].doc_id, biomarker_id=glucose.id, test_name="GLUCOSE", value="80"),
+            TestResultRecord(doc_id=reports[1].doc_id, biomarker_id=glucose.id, test_name="GLUCOSE", value="110", flag="High"),
+            TestResultRecord(doc_id=reports[2].doc_id, biomarker_id=glucose.id, test_name="GLUCOSE", value="95"),
+            TestResultRecord(doc_id=reports[2].doc_id, test_name="Zinc", value="70"),
+            TestResultRecord(doc_id=reports[0].doc_id, test_name="Zinc", value="75"),
+        ]
+    )
+    db_session.flush()
+    rebuild_user_latest(db_session, user.id)
+    db_session.commit()
+
+    response = client.get("/api/biomarkers/summary", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    by_name = {item["biomarker_name"]: item for item in response.json()}
+    assert set(by_name) == {"Glucose", "Zinc"}
+    assert by_name["Glucose"]["latest_value"] == "110"
+    assert by_name["Glucose"]["report_date"] == "2025-03-01"
+    assert by_name["Glucose"]["flag"] == "High"
+    assert by_name["Zinc"]["latest_value"] == "70"
+    assert by_name["Zinc"]["category"] == "Other"
+
+
+def test_categories_counts_latest_results(client, db_session):
+    user, token = _create_user_and_token(client, db_session)
+    glucose = BiomarkerReference(standard_name="Glucose", category="Metabolic Panel", common_aliases='["GLUCOSE"]')
+    sodium = BiomarkerReference(standard_name="Sodium", category="Metabolic Panel", common_aliases='["SODIUM"]')
+    old, new = (
+        LabReportRecord(user_id=user.id, patient_name="Trend User", report_date=date(2025, 1, 1)),
+        LabReportRecord(user_id=user.id, patient_name="Trend User", report_date=date(2025, 2, 1)),
+    )
+    db_session.add_all([glucose, sodium, old, new])
+    db_session.flush()
+    db_session.add_all(
+        [
+            TestResultRecord(doc_id=old.doc_id, biomarker_id=glucose.id, test_name="GLUCOSE", value="90"),
+            TestResultRecord(doc_id=new.doc_id, biomarker_id=glucose.id, test_name="GLUCOSE", value="130", flag="High"),
+            TestResultRecord(doc_id=old.doc_id, biomarker_id=sodium.id, test_name="SODIUM", value="150", flag="High"),
+            TestResultRecord(doc_id=new.doc_id, biomarker_id=sodium.id, test_name="SODIUM", value="140", flag=""),
+            TestResultRecord(doc_id=new.doc_id, test_name="Zinc", value="70"),
+        ]
+    )
+    db_session.flush()
+    rebuild_user_latest(db_session, user.id)
+    db_session.commit()
+
+    response = client.get("/api/biomarkers/categories", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    assert response.json() == [
+        {"category": "Metabolic Panel", "total": 2, "flagged": 1, "normal": 1},
+        {"category": "Other", "total": 1, "flagged": 0, "normal": 1},
+    ]
+
+
+def test_dashboard_snapshot_bundles_views_with_etag(client, db_session):
+    user, token = _create_user_and_token(client, db_session)
+    headers = {"Authorization": f"Bearer {token}"}
+    glucose = BiomarkerReference(standard_name="Glucose", category="Metabolic Panel", common_aliases='["GLUCOSE"]')
+    old, new = (
+        LabReportRecord(user_id=user.id, patient_name="Trend User", report_date=date(2025, 1, 1)),
+        LabReportRecord(user_id=user.id, patient_name="Trend User", report_date=date(2025, 2, 1)),
+    )
+    db_session.add_all([glucose, old, new])
+    db_session.flush()
+    db_session.add_all(
+        [
+            TestResultRecord(doc_id=old.doc_id, biomarker_id=glucose.id, test_name="GLUCOSE", value="90"),
+            TestResultRecord(doc_id=new.doc_id, biomarker_id=glucose.id, test_name="GLUCOSE", value="120", flag="High"),
+            TestResultRecord(doc_id=old.doc_id, test_name="Zinc", value="70"),
+            TestResultRecord(doc_id=new.doc_id, test_name="Zinc", value="72"),
+        ]
+    )
+    db_session.flush()
+    rebuild_user_latest(db_session, user.id)
+    db_session.commit()
+
+    response = client.get("/api/dashboard/snapshot", headers=headers)
+    assert response.status_code == 200
+    snapshot = response.json()
+    assert snapshot["summary"] == client.get("/api/biomarkers/summary", headers=headers).json()
+    assert snapshot["categories"] == client.get("/api/biomarkers/categories", headers=headers).json()
+    assert snapshot["trends"] == client.get("/api/trends/overview", headers=headers).json()
+    assert snapshot["unmapped"] == [{"test_name": "Zinc", "count": 2}]
+
+    etag = response.headers["etag"]
+    cached = client.get("/api/dashboard/snapshot", headers={**headers, "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["etag"] == etag
+    assert client.get("/api/dashboard/snapshot", headers={**headers, "If-None-Match": '"stale"'}).status_code == 200
+
+
+def test_read_endpoints_answer_304_from_data_version(client, db_session, captured_sql):
+    user, token = _create_user_and_token(client, db_session)
+    headers = {"Authorization": f"Bearer {token}"}
+    report = LabReportRecord(user_id=user.id, patient_name="Trend User", report_date=date(2025, 1, 1))
+    db_session.add(report)
+    db_session.flush()
+    db_session.add(TestResultRecord(doc_id=report.doc_id, test_name="Zinc", value="70"))
+    db_session.commit()
+
+    first = client.get("/api/reports", headers=headers)
+    etag = first.headers["etag"]
+    assert client.get("/api/biomarkers/unmapped", headers=headers).headers["etag"] != etag
+
+    with captured_sql() as statements:
+        cached = client.get("/api/reports", headers={**headers, "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert not any("lab_reports" in sql or "test_results" in sql for sql in statements)
+
+    assert client.delete(f"/api/reports/{report.doc_id}", headers=headers).status_code == 200
+    refreshed = client.get("/api/reports", headers={**headers, "If-None-Match": etag})
+    assert refreshed.status_code == 200
+    assert refreshed.json() == []
+    assert refreshed.headers["etag"] != etag
+
+    last_modified = refreshed.headers["last-modified"]
+    assert client.get("/api/reports", headers={**headers, "If-Modified-Since": last_modified}).status_code == 304
+
+
+def test_catalog_changes_invalidate_validators(client, db_session):
+    user, token = _create_user_and_token(client, db_session)
+    headers = {"Authorization": f"Bearer {token}"}
+    first = client.get("/api/biomarkers/categories", headers=headers)
+    etag = first.headers["etag"]
+    assert "last-modified" not in first.headers
+
+    # Seeding or a learned alias renames and recategorises results without touching user data.
+    bump_catalog_version(db_session)
+    db_session.commit()
+    changed = client.get("/api/biomarkers/categories", headers={**headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    catalog_modified_at = db_session.get(BiomarkerCatalogState, 1).modified_at
+    assert changed.headers["last-modified"] == format_datetime(
+        catalog_modified_at.replace(tzinfo=timezone.utc), usegmt=True
+    )
+
+
+class _FakeSharedClient:
+    """Local stand-in for a Redis client: get / set(ex=, nx=) / delete over bytes."""
+
+    def __init__(self):
+        self.data: dict[str, bytes] = {}
+        self.ttls: dict[str, int] = {}
+        self.called_on_loop: list[bool] = []
+
+    def _record_caller(self):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            self.called_on_loop.append(False)
+        else:
+            self.called_on_loop.append(True)
+
+    def get(self, key):
+        self._record_caller()
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None, nx=False):
+        self._record_caller()
+        if nx and key in self.data:
+            return None
+        self.data[key] = value.encode()
+        self.ttls[key] = ex
+        return True
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+def test_analytics_responses_are_cached_per_data_version(client, db_session, captured_sql):
+    shared = _FakeSharedClient()
+    set_response_cache(SharedResponseCache(shared, ttl_seconds=60))
+    user, token = _create_user_and_token(client, db_session)
+    headers = {"Authorization": f"Bearer {token}"}
+    report = LabReportRecord(user_id=user.id, patient_name="Trend User", report_date=date(2025, 1, 1))
+    db_session.add(report)
+    db_session.flush()
+    db_session.add(TestResultRecord(doc_id=report.doc_id, test_name="Zinc", value="70"))
+    db_session.flush()
+    rebuild_user_latest(db_session, user.id)
+    db_session.commit()
+
+    first = client.get("/api/biomarkers/summary", headers=headers).json()
+    assert [item["biomarker_name"] for item in first] == ["Zinc"]
+    assert any(":biomarkers.summary:0" in key for key in shared.data)
+    epoch_key = SharedResponseCache.EPOCH_KEY
+    assert shared.ttls.pop(epoch_key) is None
+    assert set(shared.ttls.values()) == {60}
+
+    with captured_sql() as statements:
+        assert client.get("/api/biomarkers/summary", headers=headers).json() == first
+    assert not any("user_biomarker_latest" in sql for sql in statements)
+
+    # Deleting bumps the data version, so the next read misses and recomputes.
+    assert client.delete(f"/api/reports/{report.doc_id}", headers=headers).status_code == 200
+    assert client.get("/api/biomarkers/summary", headers=headers).json() == []
+
+    epochs = [shared.data[epoch_key].decode()]
+    invalidate_alias_index()
+    epochs.append(shared.data[epoch_key].decode())
+    # A lost epoch key is replaced by a fresh value, never by one whose responses may still be cached.
+    shared.delete(epoch_key)
+    client.get("/api/biomarkers/summary", headers=headers)
+    epochs.append(shared.data[epoch_key].decode())
+    assert len(set(epochs)) == 3
+    assert any(key.startswith(f"response:{epochs[-1]}:") for key in shared.data)
+    # Network round trips to the shared cache never block the event loop.
+    assert shared.called_on_loop and not any(shared.called_on_loop)